@@ -0,0 +1,186 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+
+# Бенчмарки горячих путей на синтетических библиотеках 1k/100k/1M терминов, Qt в режиме offscreen.
+# Запуск: python benchmarks/hotpaths.py [--sizes 1k,100k,1m] [-o results.json]
+# Каждая библиотека измеряется в отдельном процессе: соединения с базой привязаны к рабочей папке.
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+IMPORT_ROOT = os.path.dirname(REPO_DIR)
+DEFAULT_WORK_DIR = os.path.join(tempfile.gettempdir(), 'vocabify-bench')
+
+
+def timed(results, name, func, repeat, setup=None):
+    samples = []
+    for _ in range(repeat):
+        state = setup() if setup is not None else None
+        started = time.perf_counter()
+        func(state) if setup is not None else func()
+        samples.append((time.perf_counter() - started) * 1000)
+    results[name] = {
+        'min_ms': round(min(samples), 3),
+        'median_ms': round(statistics.median(samples), 3),
+        'max_ms': round(max(samples), 3),
+        'runs': repeat,
+    }
+
+
+def run_child(repeat):
+    # Выполняется в папке библиотеки
+    sys.path.insert(0, IMPORT_ROOT)
+    from PyQt6.QtWidgets import QApplication, QMessageBox
+    app = QApplication(sys.argv)
+    for name in ('information', 'warning', 'critical'):
+        setattr(QMessageBox, name, staticmethod(lambda *args, **kwargs: None))
+
+    from application.modules.MainWindow import MainWindow
+    from application.modules.MemorizationWindow import MemorizationWindow
+    from application.modules.CreateEditModuleWindow import CreateEditModuleWindow
+    from application.modules.Storage import Storage
+    from application.modules.ImageLoader import ImageLoader, ImageTask
+    from application.modules.StudySession import StudySession
+    from application.modules.AnswerChecker import prepare_candidates, choose_distractors
+
+    def wait(condition):
+        while not condition():
+            app.processEvents()
+            time.sleep(0.001)
+
+    results = {}
+    storage = Storage()
+    conn = storage.conn
+    module_id = conn.execute('SELECT MAX(id) FROM modules').fetchone()[0]
+    query = conn.execute('SELECT term FROM terms ORDER BY id DESC LIMIT 1').fetchone()[0].split()[0]
+
+    # Главное окно: загрузка списка модулей и первой порции карточек
+    window = MainWindow()
+    window.open_study_window = lambda *args: None
+    window.show_term_results = lambda *args: None
+
+    def update_modules():
+        window.update_modules()
+        while window.module_model.canFetchMore():
+            window.module_model.fetchMore()
+            if window.module_model.rowCount() >= 120:
+                break
+
+    timed(results, 'main_window.update_modules', update_modules, repeat)
+    timed(results, 'main_window.search', lambda: window.search_input.setText(query) or window.search(), repeat)
+    timed(results, 'storage.search_terms', lambda: storage.search_terms(query, limit=50), repeat)
+    definitions = prepare_candidates([row[0] for row in conn.execute('SELECT definition FROM terms LIMIT 10000')])
+    timed(results, 'answer_checker.distractors_10k',
+          lambda: choose_distractors(definitions[0][0], definitions, 3), repeat)
+    window.close()
+
+    # Изучение модуля и повторение
+    timed(results, 'memorization.load_terms', lambda: MemorizationWindow(module_id=module_id).close(), repeat)
+    study = MemorizationWindow(module_id=module_id)
+    study.show()
+
+    def show_terms():
+        for _ in range(50):
+            study.show_next_term()
+        for _ in range(50):
+            study.show_previous_term()
+
+    timed(results, 'memorization.show_term_x100', show_terms, repeat)
+    study.close()
+    image_path = conn.execute("SELECT image_path FROM terms WHERE image_path != '' LIMIT 1").fetchone()
+    if image_path:
+        timed(results, 'image_loader.decode', lambda: ImageTask(image_path[0], '', None).decode(), repeat)
+    timed(results, 'memorization.review_load', lambda: MemorizationWindow(review=True).close(), repeat)
+    session_modules = [row[0] for row in conn.execute('SELECT id FROM modules ORDER BY id LIMIT 50')]
+    timed(results, 'memorization.session_50_modules',
+          lambda: MemorizationWindow(session=StudySession.for_modules(session_modules)).close(), repeat)
+
+    # Редактор: открытие модуля, сохранение правки, вставка терминов из текстового поля
+    def open_editor():
+        editor = CreateEditModuleWindow(module_id=module_id)
+        wait(lambda: editor.term_loader is None)
+        editor.module_saved = True  # закрытие без вопроса о несохранённых изменениях
+        return editor
+
+    timed(results, 'editor.load_module_data', lambda: open_editor().close(), repeat)
+
+    def edit_and_save(editor):
+        model = editor.term_model
+        model.update_term(model.keys[0], {'definition': model.term(0)['definition'] + ' edited'})
+        editor.save_module()
+        wait(lambda: editor.save_task is None)
+
+    timed(results, 'editor.save_module', edit_and_save, repeat, setup=open_editor)
+
+    lines = '\n'.join(f"pasted {i}\tdefinition {i}" for i in range(1000))
+
+    def import_terms(editor):
+        editor.import_text_field.setPlainText(lines)
+        editor.import_terms()
+
+    timed(results, 'editor.import_terms_1000', import_terms, repeat, setup=open_editor)
+    # Фоновые декодеры изображений не должны пережить QApplication
+    ImageLoader.instance().pool.waitForDone()
+    print(json.dumps(results))
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_DIR, capture_output=True,
+                                text=True).stdout.strip()
+    except OSError:
+        commit = ''
+    from PyQt6.QtCore import QT_VERSION_STR, PYQT_VERSION_STR
+    return {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'qt': QT_VERSION_STR,
+        'pyqt': PYQT_VERSION_STR,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time Vocabify hot paths on synthetic libraries")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--sizes', default='1k,100k,1m', help="comma-separated: 1k, 100k, 1m or numbers")
+    parser.add_argument('--work-dir', default=DEFAULT_WORK_DIR, help="where generated libraries are kept")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('-o', '--output', help="JSON results file (default: print only)")
+    args = parser.parse_args()
+    if args.child:
+        run_child(args.repeat)
+        return 0
+
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [IMPORT_ROOT, env.get('PYTHONPATH')]))
+    env['QT_QPA_PLATFORM'] = 'offscreen'
+    report = {'environment': environment(), 'results': {}}
+    for size in args.sizes.split(','):
+        directory = os.path.join(args.work_dir, size)
+        print(f"[{size}] preparing library in {directory}", file=sys.stderr)
+        subprocess.run([sys.executable, os.path.join(BENCH_DIR, 'library.py'), directory, '--terms', size],
+                       env=env, check=True, stdout=subprocess.DEVNULL)
+        print(f"[{size}] measuring", file=sys.stderr)
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', '--repeat', str(args.repeat)],
+                                cwd=directory, env=env, check=True, capture_output=True, text=True).stdout
+        results = json.loads(output.strip().splitlines()[-1])
+        report['results'][size] = results
+        for name, timing in results.items():
+            print(f"{size:>6}  {name:<32} {timing['median_ms']:>10.2f} ms")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
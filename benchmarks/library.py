@@ -0,0 +1,127 @@
+import os
+import sys
+import json
+import zlib
+import time
+import random
+import struct
+import argparse
+
+# Генератор синтетических библиотек для бенчмарков: vocabify.db и media/ в отдельной папке.
+# Запуск: python benchmarks/library.py ПАПКА --terms 100000 [--images 50]
+# Готовая библиотека с теми же параметрами переиспользуется (см. library.json в папке).
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_ROOT = os.path.dirname(REPO_DIR)  # модули импортируются как application.modules.*
+if IMPORT_ROOT not in sys.path:
+    sys.path.insert(0, IMPORT_ROOT)
+
+SIZES = {'1k': 1000, '100k': 100000, '1m': 1000000}
+TERMS_PER_MODULE = 1000
+IMAGES = 50
+IMAGE_EVERY = 5  # изображение у каждого пятого термина
+IMAGE_SIZE = (1600, 1200)  # больше THUMBNAIL_SIZE, чтобы измерять и уменьшение
+BATCH_SIZE = 5000
+THEMES = ['Languages', 'Biology', 'History', 'Chemistry', 'Geography', 'Music', 'Law', 'Medicine']
+WORDS = ['кот', 'собака', 'дом', 'река', 'лес', 'город', 'книга', 'окно', 'apple', 'river', 'forest', 'window',
+         'enzyme', 'treaty', 'mountain', 'chord', 'statute', 'artery', 'valley', 'catalyst', 'empire', 'harmony']
+SCHEMA = 1  # меняется, когда меняется содержимое генерируемой библиотеки
+
+
+def write_png(path, width, height, seed):
+    # Градиент со сдвигом строк: быстро генерируется и сжимается не идеально, как реальные картинки
+    base = bytes((x * (seed % 7 + 1) + seed * 31) & 255 for x in range(width * 3))
+    raw = bytearray()
+    for y in range(height):
+        shift = (y * (seed % 5 + 1) * 3) % len(base)
+        raw += b'\x00' + base[shift:] + base[:shift]
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)))
+        f.write(chunk(b'IDAT', zlib.compress(bytes(raw), 6)))
+        f.write(chunk(b'IEND', b''))
+
+
+def make_words(rng, count):
+    return ' '.join(rng.choice(WORDS) for _ in range(count))
+
+
+def generate_library(directory, terms, terms_per_module=TERMS_PER_MODULE, images=IMAGES, seed=1):
+    from application.modules.Storage import Storage
+    from application.modules.MediaStore import MediaStore
+
+    params = {'schema': SCHEMA, 'terms': terms, 'terms_per_module': terms_per_module, 'images': images, 'seed': seed}
+    marker = os.path.join(directory, 'library.json')
+    if os.path.exists(marker):
+        with open(marker, encoding='utf-8') as f:
+            if json.load(f).get('params') == params:
+                return directory
+        raise SystemExit(f"{directory} holds a library generated with other parameters")
+
+    os.makedirs(directory, exist_ok=True)
+    cwd = os.getcwd()
+    os.chdir(directory)  # vocabify.db и media/ лежат относительно рабочей папки, как у приложения
+    try:
+        started = time.perf_counter()
+        rng = random.Random(seed)
+        storage = Storage()
+        media = MediaStore()
+
+        os.makedirs('source_images', exist_ok=True)
+        image_paths = []
+        for i in range(images):
+            source = os.path.join('source_images', f'{i}.png')
+            write_png(source, IMAGE_SIZE[0], IMAGE_SIZE[1], seed * 1000 + i)
+            image_paths.append(media.add(source))
+
+        written = 0
+        module_number = 0
+        while written < terms:
+            module_number += 1
+            count = min(terms_per_module, terms - written)
+            module_id = storage.save_module(None, f"{make_words(rng, 2).title()} {module_number}",
+                                            make_words(rng, 8), rng.choice(THEMES), [])
+            for start in range(0, count, BATCH_SIZE):
+                batch = []
+                for i in range(start, min(start + BATCH_SIZE, count)):
+                    number = written + i
+                    batch.append({
+                        "id": None,
+                        "term": f"{make_words(rng, rng.randint(1, 3))} {number}",
+                        "definition": make_words(rng, rng.randint(4, 16)),
+                        "complexity": rng.choice(["Easy", "Normal", "Normal", "Hard"]),
+                        "image_path": image_paths[number % len(image_paths)]
+                        if image_paths and number % IMAGE_EVERY == 0 else ""
+                    })
+                storage.append_terms(module_id, batch)
+            written += count
+
+        storage.conn.execute('PRAGMA optimize')
+        with open('library.json', 'w', encoding='utf-8') as f:
+            json.dump({'params': params, 'modules': module_number,
+                       'seconds': round(time.perf_counter() - started, 1)}, f)
+    finally:
+        os.chdir(cwd)
+    return directory
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Vocabify library")
+    parser.add_argument('directory')
+    parser.add_argument('--terms', default='1k', help="1k, 100k, 1m or a number")
+    parser.add_argument('--terms-per-module', type=int, default=TERMS_PER_MODULE)
+    parser.add_argument('--images', type=int, default=IMAGES)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    terms = SIZES.get(args.terms) or int(args.terms)
+    generate_library(args.directory, terms, args.terms_per_module, args.images, args.seed)
+    print(f"Library with {terms} terms in {args.directory}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
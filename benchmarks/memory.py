@@ -0,0 +1,82 @@
+import os
+import sys
+import json
+import argparse
+import tempfile
+import tracemalloc
+
+# Память сессии изучения на одном большом модуле: прежний список кортежей всех терминов
+# против StudyTerms (id в array и несколько страниц карточек), и список словарей редактора
+# против столбцов TermTableModel.
+# Запуск: python benchmarks/memory.py [--terms 100k] [--cards 500]
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+from library import SIZES, generate_library
+
+DEFAULT_WORK_DIR = os.path.join(tempfile.gettempdir(), 'vocabify-bench')
+
+
+def measure(func):
+    # Возвращает (байт удержано результатом, пик во время работы)
+    tracemalloc.start()
+    result = func()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure memory held by a study session over one large module")
+    parser.add_argument('--terms', default='100k', help="1k, 100k, 1m or a number")
+    parser.add_argument('--cards', type=int, default=500, help="cards to page through in the lazy session")
+    parser.add_argument('--work-dir', default=DEFAULT_WORK_DIR)
+    args = parser.parse_args()
+    terms = SIZES.get(args.terms) or int(args.terms)
+
+    # Весь синтетический словарь в одном модуле
+    directory = generate_library(os.path.join(args.work_dir, f'single-{args.terms}'), terms, terms_per_module=terms)
+    os.chdir(directory)
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication(sys.argv)
+    from application.modules.Storage import Storage
+    from application.modules.TermStore import StudyTerms
+    from application.modules.TermTableModel import TermTableModel
+
+    storage = Storage()
+    module_id = storage.conn.execute('SELECT MAX(id) FROM modules').fetchone()[0]
+
+    def tuples():
+        return [(term['id'], term['term'], term['definition'], term['image_path'])
+                for term in storage.get_module_terms(module_id)]
+
+    def lazy():
+        session = StudyTerms.for_module(storage, module_id)
+        for index in range(min(args.cards, len(session))):
+            session[index]
+        return session
+
+    def dicts():
+        return storage.get_module_terms(module_id)
+
+    def columns():
+        model = TermTableModel()
+        for batch in storage.iter_module_terms(module_id, batch_size=5000):
+            model.append_terms(batch)
+        return model
+
+    results = {}
+    for name, func in (('study.tuples', tuples), ('study.lazy', lazy),
+                       ('editor.dicts', dicts), ('editor.columns', columns)):
+        held, peak = measure(func)
+        results[name] = {'held_mb': round(held / 2 ** 20, 2), 'peak_mb': round(peak / 2 ** 20, 2)}
+        print(f"{name:<16} held {held / 2 ** 20:>9.2f} MB   peak {peak / 2 ** 20:>9.2f} MB", file=sys.stderr)
+    print(json.dumps({'terms': terms, 'results': results}))
+    app.quit()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,133 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+# Проверка холодного старта: что импортирует главное окно и через сколько появляется первый кадр.
+# Запуск: python benchmarks/startup.py [--library-dir папка_с_vocabify.db]
+# Код возврата 1, если превышен бюджет или при старте импортируются тяжёлые модули.
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_ROOT = os.path.dirname(REPO_DIR)  # модули импортируются как application.modules.*
+
+# Эти модули должны загружаться только при первом открытии соответствующего окна.
+# То же проверяет tests/test_startup_imports.py
+LAZY_MODULES = [
+    'PyQt6.QtSql',
+    'application.modules.CreateEditModuleWindow',
+    'application.modules.MemorizationWindow',
+    'application.modules.DuplicatesDialog',
+    'application.modules.StudySessionDialog',
+    'application.modules.TimingOverlay',
+    'application.modules.TermTableModel',
+    'application.modules.ImageLoader',
+    'application.modules.Importer',
+    'application.modules.Formats',
+    'application.modules.MediaStore',
+]
+
+IMPORT_BUDGET_MS = 250
+FIRST_WINDOW_BUDGET_MS = 1500
+
+
+def child_env():
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [IMPORT_ROOT, env.get('PYTHONPATH')]))
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    return env
+
+
+def measure_imports():
+    # -X importtime пишет в stderr строки "import time: self | cumulative | module"
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import application.modules.MainWindow'],
+                            env=child_env(), capture_output=True, text=True, check=True)
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        parts = [part.strip() for part in line[len('import time:'):].split('|')]
+        if parts[0].isdigit():
+            modules[parts[2]] = (int(parts[0]), int(parts[1]))
+    return modules
+
+
+def measure_first_window(library_dir):
+    started = time.time()
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child'], cwd=library_dir,
+                            env=child_env(), capture_output=True, text=True, check=True).stdout
+    marks = json.loads(output.strip().splitlines()[-1])
+    return {name: (moment - started) * 1000 for name, moment in marks.items()}
+
+
+def run_child():
+    # Выполняется в дочернем процессе: время первой отрисовки и окончания загрузки библиотеки
+    from PyQt6.QtCore import QObject, QEvent, QTimer
+    from PyQt6.QtWidgets import QApplication
+    from application.modules.MainWindow import MainWindow
+
+    marks = {'imported': time.time()}
+    app = QApplication(sys.argv)
+
+    class PaintWatcher(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Type.Paint and 'first_paint' not in marks:
+                marks['first_paint'] = time.time()
+            return False
+
+    original_init_modules = MainWindow.init_modules
+
+    def init_modules(window):
+        original_init_modules(window)
+        marks['library_loaded'] = time.time()
+        QTimer.singleShot(0, app.quit)
+
+    MainWindow.init_modules = init_modules
+    window = MainWindow()
+    watcher = PaintWatcher()
+    window.installEventFilter(watcher)
+    window.show()
+    app.exec()
+    print(json.dumps(marks))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Vocabify cold start")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--library-dir', help="directory with vocabify.db (default: empty library)")
+    parser.add_argument('--runs', type=int, default=5, help="best of N runs")
+    parser.add_argument('--import-budget-ms', type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument('--window-budget-ms', type=float, default=FIRST_WINDOW_BUDGET_MS)
+    args = parser.parse_args()
+    if args.child:
+        run_child()
+        return 0
+
+    failures = []
+    modules = measure_imports()
+    eager = [name for name in LAZY_MODULES if name in modules]
+    if eager:
+        failures.append(f"imported at startup: {', '.join(eager)}")
+    import_ms = min(measure_imports()['application.modules.MainWindow'][1] for _ in range(args.runs)) / 1000
+    print(f"import application.modules.MainWindow: {import_ms:.1f} ms (budget {args.import_budget_ms:.0f} ms)")
+    if import_ms > args.import_budget_ms:
+        failures.append("import budget exceeded")
+
+    with tempfile.TemporaryDirectory() as empty_dir:
+        runs = [measure_first_window(args.library_dir or empty_dir) for _ in range(args.runs)]
+    first_paint = min(run['first_paint'] for run in runs)
+    loaded = min(run['library_loaded'] for run in runs)
+    print(f"first window paint: {first_paint:.1f} ms (budget {args.window_budget_ms:.0f} ms)")
+    print(f"library loaded: {loaded:.1f} ms")
+    if first_paint > args.window_budget_ms:
+        failures.append("first window budget exceeded")
+
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,10 +1,22 @@
 from PyQt6.QtWidgets import QApplication
+import os
 import sys
+import logging
 from application.modules.MainWindow import MainWindow
+from application.modules.Instrumentation import configure_from_environment
 
 
 if __name__ == '__main__':
+    # Логирование настраивается один раз здесь, а не при импорте модулей окон.
+    # VOCABIFY_LOG_LEVEL=DEBUG включает журнал каждого действия на карточках и замеры span.
+    logging.basicConfig(level=os.environ.get('VOCABIFY_LOG_LEVEL', 'INFO').upper(),
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    show_overlay = configure_from_environment()
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
+    if show_overlay:
+        from application.modules.TimingOverlay import TimingOverlay
+        overlay = TimingOverlay()
+        overlay.show()
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,144 @@
+import re
+import heapq
+import random
+import unicodedata
+
+# Проверка введённых ответов и подбор неправильных вариантов для теста.
+# Расстояние Левенштейна считается битово-параллельным алгоритмом Майерса (Hyyrö): столбец
+# таблицы хранится в одном целом Python, поэтому символ ответа стоит несколько операций над int
+# при любой длине строки. Маски образца строятся один раз на пачку кандидатов.
+
+CORRECT, TYPO, WRONG = 0, 1, 2
+RESULT_NAMES = ["Correct", "Almost - check the spelling", "Wrong"]
+TYPO_RATIO = 0.25  # доля ошибочных символов, которая ещё считается опечаткой
+SAME_ANSWER_RATIO = 0.15  # варианты ближе этого к верному ответу не годятся в отвлекающие
+ALTERNATIVE_SEPARATORS = re.compile(r'\s*[;/|]\s*')
+
+_PUNCTUATION = re.compile(r'[^\w\s]+')
+_SPACES = re.compile(r'\s+')
+_DIACRITICS = re.compile('[\u0300-\u0305\u0307-\u036f]')
+
+
+def normalize(text):
+    # Регистр, диакритика, ё/е, пунктуация и лишние пробелы на правильность ответа не влияют.
+    # Кратка (U+0306) остаётся: й и и - разные буквы.
+    text = text.casefold().replace('ё', 'е')
+    if not text.isascii():
+        text = unicodedata.normalize('NFC', _DIACRITICS.sub('', unicodedata.normalize('NFKD', text)))
+    text = _PUNCTUATION.sub(' ', text)
+    return _SPACES.sub(' ', text).strip()
+
+
+def alternatives(expected):
+    # "кот; кошка" и "colour/color" - несколько допустимых ответов
+    return [variant for variant in (normalize(part) for part in ALTERNATIVE_SEPARATORS.split(expected)) if variant]
+
+
+def pattern_masks(pattern):
+    masks = {}
+    for position, char in enumerate(pattern):
+        masks[char] = masks.get(char, 0) | (1 << position)
+    return masks
+
+
+def distance_from_masks(masks, length, text):
+    if not length:
+        return len(text)
+    all_ones = (1 << length) - 1
+    last = 1 << (length - 1)
+    pv, mv, score = all_ones, 0, length
+    for char in text:
+        eq = masks.get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & all_ones)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = (ph << 1) | 1
+        mh <<= 1
+        pv = (mh | ~(xv | ph)) & all_ones
+        mv = ph & xv & all_ones
+    return score
+
+
+def distance(first, second):
+    return distance_from_masks(pattern_masks(first), len(first), second)
+
+
+def distances(pattern, candidates):
+    # Пачка кандидатов против одного образца: маски образца считаются один раз.
+    # Цикл идёт по более короткой строке - построить маски длинного кандидата дешевле, чем пройти его.
+    masks, length = pattern_masks(pattern), len(pattern)
+    return [distance_from_masks(masks, length, candidate) if len(candidate) <= length
+            else distance_from_masks(pattern_masks(candidate), len(candidate), pattern)
+            for candidate in candidates]
+
+
+def check_answer(answer, expected):
+    # Возвращает (CORRECT/TYPO/WRONG, ближайший допустимый ответ)
+    answer = normalize(answer)
+    variants = alternatives(expected) or [normalize(expected)]
+    if not answer:
+        return WRONG, variants[0]
+    best, best_distance = variants[0], None
+    for variant in variants:
+        if variant == answer:
+            return CORRECT, variant
+        value = distance(variant, answer)
+        if best_distance is None or value < best_distance:
+            best, best_distance = variant, value
+    # Одна ошибка в коротком слове - опечатка, длинным ответам прощается больше
+    if best_distance <= max(1, round(len(best) * TYPO_RATIO)):
+        return TYPO, best
+    return WRONG, best
+
+
+def comparison_units(text):
+    # Для отвлекающих вариантов длинные определения сравниваются по словам: последовательность
+    # короче в разы, а совпадающие слова и есть то, что делает вариант правдоподобным
+    words = text.split()
+    return words if len(words) > 2 else text
+
+
+def prepare_candidates(texts):
+    # Пул нормализуется один раз и переиспользуется для всех карточек модуля
+    return [(text, normalize(text)) for text in texts]
+
+
+def choose_distractors(correct, candidates, count, rng=random):
+    # Из пула (см. prepare_candidates) берёт count похожих на верный ответ, но заведомо других вариантов.
+    # Похожесть - доля правки по Левенштейну; случайный выбор среди лучших 3 * count.
+    # Разница длин - нижняя граница расстояния: кандидаты идут по ней, и перебор
+    # останавливается, как только граница хуже худшего из уже отобранных.
+    target = normalize(correct)
+    target_units = comparison_units(target)
+    masks, length = pattern_masks(target_units), len(target_units)
+    seen = {target}
+    pool = []
+    for candidate, text in candidates:
+        if text and text not in seen:
+            seen.add(text)
+            units = comparison_units(text)
+            if isinstance(units, list) != isinstance(target_units, list):
+                units = text.split() if isinstance(target_units, list) else text
+            longest = max(length, len(units))
+            pool.append((abs(length - len(units)) / longest, longest, units, candidate))
+    pool.sort(key=lambda item: item[0])
+
+    keep = count * 3
+    best = []  # куча (-доля, номер, кандидат) из keep лучших
+    for number, (bound, longest, units, candidate) in enumerate(pool):
+        if len(best) == keep and bound >= -best[0][0]:
+            break
+        ratio = distance_from_masks(masks, length, units) / longest
+        if ratio < SAME_ANSWER_RATIO:
+            continue
+        if len(best) < keep:
+            heapq.heappush(best, (-ratio, number, candidate))
+        elif ratio < -best[0][0]:
+            heapq.heapreplace(best, (-ratio, number, candidate))
+    best = [candidate for ratio, number, candidate in best]
+    return rng.sample(best, min(count, len(best)))
@@ -0,0 +1,41 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+# Запись файла целиком или никак: данные пишутся во временный файл рядом с целевым,
+# сбрасываются на диск и только потом подменяют целевой файл атомарным переименованием.
+
+
+@contextmanager
+def atomic_write(path, mode='w', encoding=None, newline=None):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, mode, encoding=encoding, newline=newline) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp создаёт файл с правами 0600; сохраняем права заменяемого файла
+        os.chmod(temp_path, os.stat(path).st_mode & 0o777 if os.path.exists(path) else 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    fsync_directory(directory)
+
+
+def fsync_file(path):
+    with open(path, 'rb') as f:
+        os.fsync(f.fileno())
+
+
+def fsync_directory(directory):
+    # Переименование становится надёжным только после сброса каталога; в Windows каталог открыть нельзя
+    if os.name == 'nt':
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
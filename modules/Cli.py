@@ -0,0 +1,239 @@
+import os
+import sys
+import tempfile
+import logging
+import argparse
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from application.modules import Database
+from application.modules.Database import SchemaError, get_connection
+from application.modules.Storage import Storage
+from application.modules.Importer import import_file, import_records
+from application.modules.AtomicFile import atomic_write
+from application.modules.MediaStore import MediaStore, MediaOwnerError, GC_GRACE_SECONDS
+from application.modules.Formats import READERS, iter_library_records, read_records, write_records, format_of
+from application.modules.Duplicates import NEAR_THRESHOLD, index_missing, find_duplicates
+
+# Консольный интерфейс без PyQt6: пакетный импорт, экспорт и обслуживание базы на сервере
+
+WORKER_BUSY_TIMEOUT_MS = 120000
+
+
+def unescape_separator(value):
+    return value.replace('\\t', '\t').replace('\\n', '\n')
+
+
+def _import_one(db_path, file_path, module_name, theme, term_separator, card_separator):
+    # Выполняется в отдельном процессе: своё соединение, запись сериализуется блокировкой SQLite
+    storage = Storage(db_path)
+    storage.conn.execute(f'PRAGMA busy_timeout = {WORKER_BUSY_TIMEOUT_MS}')
+    if format_of(file_path) in READERS:
+        # CSV/TSV/JSONL/apkg сами указывают модули; --module собирает всё в один модуль
+        module_id = storage.save_module(None, module_name, '', theme, []) if module_name else None
+        # Изображения из .apkg распаковываются во временную папку и переносятся в хранилище жёсткими ссылками
+        with tempfile.TemporaryDirectory(prefix='vocabify-') as media_dir:
+            records = read_records(file_path, media_dir, os.path.splitext(os.path.basename(file_path))[0])
+            result, created = import_records(records, storage, module_id, theme, MediaStore(db_path),
+                                             link_media=format_of(file_path) == '.apkg')
+        module_ids = [module_id] if module_id is not None else list(created.values())
+        return file_path, module_ids, result.imported, result.failed, result.duplicates
+    module_id = storage.save_module(None, module_name or os.path.splitext(os.path.basename(file_path))[0],
+                                    '', theme, [])
+    result = import_file(file_path, module_id, term_separator, card_separator, storage=storage)
+    return file_path, [module_id], result.imported, result.failed, result.duplicates
+
+
+def command_import(args):
+    # Миграции схемы выполняются один раз до запуска рабочих процессов
+    get_connection(args.db)
+    if args.module and len(args.files) > 1:
+        raise SystemExit("--module can only be used with a single file")
+
+    term_separator = unescape_separator(args.term_separator)
+    card_separator = unescape_separator(args.card_separator)
+    failed_files = 0
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        futures = {}
+        for file_path in args.files:
+            future = executor.submit(_import_one, args.db, file_path, args.module, args.theme,
+                                     term_separator, card_separator)
+            futures[future] = file_path
+        for future in as_completed(futures):
+            try:
+                file_path, module_ids, imported, failed, duplicates = future.result()
+            except Exception as e:
+                failed_files += 1
+                print(f"{futures[future]}: error: {e}", file=sys.stderr)
+                continue
+            modules = ', '.join(str(module_id) for module_id in module_ids)
+            print(f"{file_path}: modules {modules}, {imported} terms imported, {failed} failed, "
+                  f"{duplicates} already in the library")
+    return 1 if failed_files else 0
+
+
+def command_export(args):
+    storage = Storage(args.db)
+    records = iter_library_records(storage, args.modules or None)
+    if args.output and format_of(args.output) != '.txt':
+        count = write_records(args.output, records)
+        print(f"{count} terms exported to {args.output}")
+        return 0
+    output = atomic_write(args.output, 'w', encoding='utf-8', newline='') if args.output else nullcontext(sys.stdout)
+    with output as f:
+        f.writelines(f"{clean_field(record['term'])}\t{clean_field(record['definition'])}\n" for record in records)
+    return 0
+
+
+def clean_field(value):
+    # В формате "термин<TAB>определение" табуляция и перевод строки внутри поля недопустимы
+    return value.replace('\t', ' ').replace('\r', ' ').replace('\n', ' ')
+
+
+def command_stats(args):
+    storage = Storage(args.db)
+    conn = storage.conn
+    modules = storage.count_modules()
+    terms = conn.execute('SELECT COUNT(*) FROM terms').fetchone()[0]
+    due = storage.count_due()
+    page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+    page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+    print(f"Modules: {modules}")
+    print(f"Terms: {terms}")
+    print(f"Due for review: {due}")
+    print(f"Database size: {page_count * page_size / (1024 * 1024):.1f} MB")
+    files, size, references = MediaStore(args.db).stats()
+    print(f"Images: {files} files, {size / (1024 * 1024):.1f} MB, {references} references")
+    return 0
+
+
+def command_reindex(args):
+    Storage(args.db).reindex()
+    print("Search index rebuilt")
+    return 0
+
+
+def command_gc(args):
+    media = MediaStore(args.db)
+    adopted = media.adopt_legacy_images()
+    if adopted:
+        print(f"Moved {adopted} images from images/ into the media store")
+    try:
+        removed, freed = media.collect_garbage(args.grace)
+    except MediaOwnerError as e:
+        print(f"vocabify: {e}", file=sys.stderr)
+        return 1
+    print(f"Removed {removed} orphaned images ({freed / (1024 * 1024):.1f} MB)")
+    return 0
+
+
+def bounded_map(executor, func, items, window):
+    # executor.map забирает все элементы сразу; здесь в работе не больше window порций
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(func, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def command_dedupe(args):
+    storage = Storage(args.db)
+
+    def progress(done, total):
+        logging.info("Fingerprinted %d of %d terms", done, total)
+
+    # Отпечатки терминов, сохранённых до появления поиска дубликатов, считаются в нескольких процессах
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        indexed = index_missing(storage, progress,
+                                map_batches=lambda func, items: bounded_map(executor, func, items, args.jobs * 2))
+    if indexed:
+        print(f"Fingerprinted {indexed} terms")
+
+    groups = find_duplicates(storage, near=not args.exact_only, threshold=args.threshold)
+    details = {row[0]: row for row in storage.duplicate_details({term_id for group in groups
+                                                                 for term_id in group.term_ids})}
+    exact = [group for group in groups if group.exact]
+    print(f"Exact duplicates: {len(exact)} groups, {sum(len(group.term_ids) for group in exact)} terms")
+    if not args.exact_only:
+        print(f"Similar terms: {len(groups) - len(exact)} groups")
+    for group in groups:
+        print("exact" if group.exact else f"similar {group.similarity:.0%}")
+        for term_id in group.term_ids:
+            term_id, term, definition, complexity, image_path, norm_hash, modules = details[term_id]
+            print(f"  {term_id}\t{clean_field(term)}\t{clean_field(definition)}\t[{modules}]")
+
+    if args.merge_exact and exact:
+        # Остаётся самый старый термин группы
+        for group in exact:
+            storage.merge_terms(group.term_ids[0], group.term_ids[1:])
+        print(f"Merged {sum(len(group.term_ids) - 1 for group in exact)} exact duplicates")
+    return 0
+
+
+def command_vacuum(args):
+    conn = get_connection(args.db)
+    conn.execute('PRAGMA optimize')
+    conn.execute('VACUUM')
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    print("Database compacted")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='vocabify', description="Vocabify command-line tools")
+    parser.add_argument('--db', default=Database.DB_PATH, help="path to vocabify.db")
+    parser.add_argument('-v', '--verbose', action='store_true', help="log progress")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = commands.add_parser('import', help="import .txt, .csv, .tsv, .jsonl or .apkg files")
+    import_parser.add_argument('files', nargs='+')
+    import_parser.add_argument('--module', help="module name (single file only; default: file or deck name)")
+    import_parser.add_argument('--theme', default='')
+    import_parser.add_argument('--term-separator', default='\\t', help="between term and definition (default: \\t)")
+    import_parser.add_argument('--card-separator', default='\\n', help="between cards (default: \\n)")
+    import_parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                               help="files imported in parallel")
+    import_parser.set_defaults(handler=command_import)
+
+    export_parser = commands.add_parser('export', help="export terms; format follows the output extension")
+    export_parser.add_argument('modules', nargs='*', type=int, help="module ids (default: all)")
+    export_parser.add_argument('-o', '--output',
+                               help=".csv, .tsv, .jsonl, .apkg or .txt (default: term<TAB>definition lines to stdout)")
+    export_parser.set_defaults(handler=command_export)
+
+    stats_parser = commands.add_parser('stats', help="show library statistics")
+    stats_parser.set_defaults(handler=command_stats)
+
+    reindex_parser = commands.add_parser('reindex', help="rebuild the full-text search index")
+    reindex_parser.set_defaults(handler=command_reindex)
+
+    gc_parser = commands.add_parser('gc', help="delete images no term refers to")
+    gc_parser.add_argument('--grace', type=int, default=GC_GRACE_SECONDS, help="keep files newer than this many seconds")
+    gc_parser.set_defaults(handler=command_gc)
+
+    dedupe_parser = commands.add_parser('dedupe', help="find duplicate and similar terms")
+    dedupe_parser.add_argument('--exact-only', action='store_true', help="skip the similar-term search")
+    dedupe_parser.add_argument('--threshold', type=float, default=NEAR_THRESHOLD,
+                               help="trigram Jaccard similarity for similar terms (0-1)")
+    dedupe_parser.add_argument('--merge-exact', action='store_true',
+                               help="merge exact duplicates into the oldest term of each group")
+    dedupe_parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                               help="processes used to fingerprint existing terms")
+    dedupe_parser.set_defaults(handler=command_dedupe)
+
+    vacuum_parser = commands.add_parser('vacuum', help="compact the database")
+    vacuum_parser.set_defaults(handler=command_vacuum)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    try:
+        return args.handler(args)
+    except SchemaError as e:
+        print(f"vocabify: {e}", file=sys.stderr)
+        return 1
@@ -1,19 +1,141 @@
 import sys
-import json
 import sqlite3
-import os
-import shutil
+import tempfile
 import logging
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QTextEdit,
-    QPushButton, QComboBox, QListWidget, QListWidgetItem, QMessageBox, QInputDialog, QFileDialog,
-    QGroupBox, QGridLayout, QFormLayout, QDialog, QVBoxLayout, QGraphicsView, QGraphicsScene, QScrollArea, QGraphicsPixmapItem
+    QPushButton, QComboBox, QMessageBox, QInputDialog, QFileDialog,
+    QGroupBox, QGridLayout, QFormLayout, QDialog, QVBoxLayout, QGraphicsView, QGraphicsScene, QScrollArea, QGraphicsPixmapItem,
+    QProgressDialog, QTableView, QHeaderView, QAbstractItemView
 )
-from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QObject, QRunnable, QThreadPool
 from PyQt6.QtGui import QIcon, QPixmap
+from application.modules.Storage import Storage, SaveCancelled
+from application.modules.Importer import import_file, import_records
+from application.modules.MediaStore import MediaStore
+from application.modules.Instrumentation import span
+from application.modules.TermTableModel import TermTableModel, TermViewProxy, ComplexityDelegate, COMPLEXITY
+from application.modules.Formats import READERS, iter_library_records, read_records, write_records, format_of
+
+
+IMPORT_FILTER = ("Text Files (*.txt);;CSV/TSV Files (*.csv *.tsv);;JSON Lines (*.jsonl);;"
+                 "Anki Packages (*.apkg);;All Files (*)")
+EXPORT_FILTER = "CSV Files (*.csv);;TSV Files (*.tsv);;JSON Lines (*.jsonl);;Anki Packages (*.apkg)"
+
+
+class ImportSignals(QObject):
+    progress = pyqtSignal(int, int)
+    batch = pyqtSignal(list)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+
+class ImportTask(QRunnable):
+    # Потоковое чтение файла в фоновом потоке: пачки терминов уходят в редактор,
+    # в базу они попадают только при сохранении модуля
+    def __init__(self, file_path, term_separator, card_separator):
+        super().__init__()
+        self.file_path = file_path
+        self.term_separator = term_separator
+        self.card_separator = card_separator
+        self.cancelled = False
+        self.signals = ImportSignals()
+
+    def run(self):
+        try:
+            if format_of(self.file_path) in READERS:
+                # CSV/TSV/JSONL/apkg: все записи файла попадают в текущий модуль. Изображения переносятся
+                # в хранилище сразу, пока жива временная папка; без сохранения их уберёт сборщик мусора
+                with tempfile.TemporaryDirectory(prefix='vocabify-') as media_dir:
+                    result, _ = import_records(read_records(self.file_path, media_dir),
+                                               media=MediaStore(), link_media=format_of(self.file_path) == '.apkg',
+                                               is_cancelled=lambda: self.cancelled, on_batch=self.signals.batch.emit)
+            else:
+                result = import_file(self.file_path, None, self.term_separator, self.card_separator,
+                                     progress=self.signals.progress.emit, is_cancelled=lambda: self.cancelled,
+                                     on_batch=self.signals.batch.emit)
+        except (OSError, UnicodeDecodeError, ValueError, KeyError, sqlite3.Error) as e:
+            logging.error("Error importing file %s: %s", self.file_path, e)
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.finished.emit(result)
+
+
+class ExportSignals(QObject):
+    finished = pyqtSignal(int)
+    failed = pyqtSignal(str)
+
+
+class ExportTask(QRunnable):
+    # Экспорт читает модуль из базы порциями, поэтому работает и для очень больших модулей
+    def __init__(self, file_path, module_id):
+        super().__init__()
+        self.file_path = file_path
+        self.module_id = module_id
+        self.signals = ExportSignals()
+
+    def run(self):
+        try:
+            count = write_records(self.file_path, iter_library_records(Storage(), [self.module_id]))
+        except (OSError, ValueError, sqlite3.Error) as e:
+            logging.error("Error exporting module %s to %s: %s", self.module_id, self.file_path, e)
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.finished.emit(count)
+
+
+class SaveSignals(QObject):
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(int)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+
+class SaveTask(QRunnable):
+    # Сохраняет снимок модуля в фоне: изображения в хранилище, затем одна транзакция в базе
+    def __init__(self, module_id, name, description, theme, keys, terms):
+        super().__init__()
+        self.module_id = module_id
+        self.name = name
+        self.description = description
+        self.theme = theme
+        self.keys = keys  # ключи строк TermTableModel: по ним id вернутся в редактор после сохранения
+        self.terms = terms
+        self.source_image_paths = [term['image_path'] for term in terms]
+        self.new_terms = [term for term in terms if term.get('id') is None]
+        self.duplicates = 0  # сколько новых терминов уже есть в библиотеке
+        self.cancelled = False
+        self.signals = SaveSignals()
+
+    def run(self):
+        try:
+            with span('media.add_all', terms=len(self.terms)):
+                MediaStore().add_all(self.terms)
+            if self.cancelled:
+                raise SaveCancelled()
+            storage = Storage()
+            module_id = storage.save_module(self.module_id, self.name, self.description, self.theme, self.terms,
+                                            progress=self.signals.progress.emit,
+                                            is_cancelled=lambda: self.cancelled)
+            self.duplicates = storage.count_duplicates(term['id'] for term in self.new_terms)
+        except SaveCancelled:
+            logging.info("Saving module %s cancelled", self.module_id)
+            self.signals.cancelled.emit()
+            return
+        except sqlite3.Error as e:
+            logging.error("Error saving module to database: %s", e)
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.finished.emit(module_id)
+
+    def apply_results(self, term_model):
+        # Вызывается в потоке интерфейса: переносим id новых терминов и пути изображений в редактор
+        term_model.apply_saved(self.keys, self.terms, self.source_image_paths)
+
+    def snapshot(self):
+        return (self.name, self.description, self.theme,
+                [(term['term'], term['definition'], term['complexity'], term['image_path']) for term in self.terms])
 
-# Настройка логгера
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 
 class CreateEditModuleWindow(QMainWindow):
     update_signal = pyqtSignal()
@@ -23,11 +145,14 @@ class CreateEditModuleWindow(QMainWindow):
         self.setWindowTitle("Create/Edit Module")
         self.setGeometry(100, 100, 800, 600)
         self.setWindowIcon(QIcon('icon.ico'))
-        self.temp_terms = []  # Временный список для хранения терминов
-        self.current_term_id = None  # ID текущего выбранного термина
+        self.current_term_key = None  # Ключ строки выбранного термина в term_model
         self.module_id = module_id
         self.parent = parent
         self.module_saved = False  # Флаг, указывающий, что модуль был успешно сохранен
+        self.term_loader = None  # Генератор порций терминов при открытии большого модуля
+        self.import_task = None
+        self.export_task = None
+        self.save_task = None
 
         self.init_ui()
         self.init_db()
@@ -92,10 +217,13 @@ class CreateEditModuleWindow(QMainWindow):
 
         self.import_button = QPushButton("Import Data")
         self.import_button.clicked.connect(self.import_data)
+        self.export_button = QPushButton("Export Data")
+        self.export_button.clicked.connect(self.export_data)
         self.import_text_field = QTextEdit()
         self.import_text_field.setPlaceholderText("Term 1\tDefinition 1\nTerm 2\tDefinition 2\nTerm 3\tDefinition 3")
 
         import_layout.addWidget(self.import_button)
+        import_layout.addWidget(self.export_button)
         import_layout.addWidget(self.import_text_field)
 
         import_group.setLayout(import_layout)
@@ -149,58 +277,68 @@ class CreateEditModuleWindow(QMainWindow):
         buttons_group.setLayout(buttons_layout)
         self.layout.addWidget(buttons_group)
 
-        # List of Terms
-        self.term_list = QListWidget()
-        self.term_list.itemClicked.connect(self.edit_term)
-        self.layout.addWidget(self.term_list)
+        # Terms table: модель хранит термины по столбцам, прокси фильтрует и сортирует только представление
+        self.term_filter_input = QLineEdit()
+        self.term_filter_input.setPlaceholderText("Filter terms...")
+        self.term_filter_input.textChanged.connect(self.filter_terms)
+        self.layout.addWidget(self.term_filter_input)
+
+        self.term_model = TermTableModel(self)
+        self.term_proxy = TermViewProxy(self)
+        self.term_proxy.setSourceModel(self.term_model)
+        self.term_table = QTableView()
+        self.term_table.setModel(self.term_proxy)
+        self.term_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.term_table.setEditTriggers(QAbstractItemView.EditTrigger.DoubleClicked |
+                                        QAbstractItemView.EditTrigger.EditKeyPressed)
+        self.term_table.setItemDelegateForColumn(COMPLEXITY, ComplexityDelegate(self.term_table))
+        self.term_table.setWordWrap(False)
+        # Фиксированная высота строк: представлению не нужно измерять каждую из 100k строк
+        self.term_table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.term_table.verticalHeader().setDefaultSectionSize(self.fontMetrics().height() + 8)
+        header = self.term_table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        header.setStretchLastSection(True)
+        header.setSectionsClickable(True)
+        header.setSortIndicatorShown(True)
+        header.setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        header.sortIndicatorChanged.connect(self.sort_terms)
+        self.term_table.selectionModel().currentRowChanged.connect(self.edit_term)
+        self.layout.addWidget(self.term_table)
 
     def init_db(self):
-        self.conn = sqlite3.connect('vocabify.db')
-        self.cursor = self.conn.cursor()
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS terms (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                term TEXT NOT NULL,
-                definition TEXT NOT NULL,
-                complexity TEXT DEFAULT 'Normal',
-                image_path TEXT
-            )
-        ''')
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS modules (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                theme TEXT,
-                length INTEGER NOT NULL
-            )
-        ''')
-        self.conn.commit()
+        self.storage = Storage()
+        self.conn = self.storage.conn
 
     def load_module_data(self):
-        try:
-            with open('modules.json', 'r') as f:
-                modules_json = json.load(f)
-        except (FileNotFoundError, ValueError):
-            modules_json = {}
-
-        if str(self.module_id) in modules_json:
-            module_data = modules_json[str(self.module_id)]
+        module_data = self.storage.get_module(self.module_id)
+        if module_data:
             self.module_name_input.setText(module_data['name'])
             self.module_description_input.setText(module_data['description'])
+            self.module_theme_input.setText(module_data['theme'] or '')
+
+            # Термины подгружаются порциями, чтобы окно появилось сразу
+            self.term_model.reset()
+            self.term_loader = self.storage.iter_module_terms(self.module_id)
+            self.set_term_actions_enabled(False)
+            QTimer.singleShot(0, self.load_next_terms_batch)
 
-            self.temp_terms = []
-            for term_id in module_data['term_ids']:
-                self.cursor.execute('SELECT term, definition, complexity, image_path FROM terms WHERE id = ?',
-                                    (term_id,))
-                term_data = self.cursor.fetchone()
-                if term_data:
-                    self.temp_terms.append({
-                        "term": term_data[0],
-                        "definition": term_data[1],
-                        "complexity": term_data[2],
-                        "image_path": term_data[3]
-                    })
-            self.update_term_list()
+    def load_next_terms_batch(self):
+        if self.term_loader is None:
+            return
+        batch = next(self.term_loader, None)
+        if batch is None:
+            self.term_loader = None
+            self.set_term_actions_enabled(True)
+            return
+
+        self.term_model.append_terms(batch)
+        QTimer.singleShot(0, self.load_next_terms_batch)
+
+    def set_term_actions_enabled(self, enabled):
+        for button in (self.add_term_button, self.edit_term_button, self.delete_term_button,
+                       self.import_terms_button, self.import_button, self.save_button):
+            button.setEnabled(enabled)
 
     def add_term(self):
         term = self.term_input.text()
@@ -209,7 +347,8 @@ class CreateEditModuleWindow(QMainWindow):
         image_path = self.image_path_input.text()
 
         if term and definition:
-            self.temp_terms.append({
+            key = self.term_model.append_term({
+                "id": None,
                 "term": term,
                 "definition": definition,
                 "complexity": complexity,
@@ -219,30 +358,33 @@ class CreateEditModuleWindow(QMainWindow):
             self.term_input.clear()
             self.definition_input.clear()
             self.image_path_input.clear()
-            self.update_term_list()
-
-    def update_term_list(self):
-        self.term_list.clear()
-        for term in self.temp_terms:
-            item = QListWidgetItem(f"{term['term']}: {term['definition']}")
-            self.term_list.addItem(item)
-
-    def edit_term(self, item):
-        term_text = item.text()
-        term = term_text.split(":")[0].strip()
-        definition = term_text.split(":")[1].strip()
-
-        for i, term_data in enumerate(self.temp_terms):
-            if term_data['term'] == term and term_data['definition'] == definition:
-                self.term_input.setText(term_data['term'])
-                self.definition_input.setText(term_data['definition'])  # Используем setText() для загрузки обычного текста
-                self.complexity_combo.setCurrentText(term_data['complexity'])
-                self.image_path_input.setText(term_data['image_path'])
-                self.current_term_id = i
-                break
+            self.term_table.scrollTo(self.term_proxy.mapFromSource(
+                self.term_model.index(self.term_model.row_of(key), 0)))
+
+    def edit_term(self, current, previous=None):
+        if not current.isValid():
+            return
+        row = self.term_proxy.mapToSource(current).row()
+        term_data = self.term_model.term(row)
+        self.term_input.setText(term_data['term'])
+        self.definition_input.setText(term_data['definition'])  # Используем setText() для загрузки обычного текста
+        self.complexity_combo.setCurrentText(term_data['complexity'])
+        self.image_path_input.setText(term_data['image_path'])
+        self.current_term_key = self.term_model.keys[row]
+
+    def filter_terms(self, text):
+        self.term_proxy.set_filter_text(text)
+
+    def sort_terms(self, column, order):
+        # Сортировка по заголовку не меняет порядок терминов в модуле, который запишется при сохранении
+        self.term_proxy.sort(column, order)
+
+    def selected_term_keys(self):
+        rows = {self.term_proxy.mapToSource(index).row() for index in self.term_table.selectionModel().selectedRows()}
+        return [self.term_model.keys[row] for row in rows]
 
     def edit_selected_term(self):
-        if self.current_term_id is None:
+        if self.current_term_key is None:
             QMessageBox.warning(self, "Error", "No term selected.")
             return
 
@@ -252,47 +394,29 @@ class CreateEditModuleWindow(QMainWindow):
         image_path = self.image_path_input.text()
 
         if term and definition:
-            self.temp_terms[self.current_term_id] = {
+            # Строка ищется по ключу: он не меняется при сортировке, фильтре и удалении других строк
+            self.term_model.update_term(self.current_term_key, {
                 "term": term,
                 "definition": definition,
                 "complexity": complexity,
                 "image_path": image_path
-            }
+            })
 
             self.term_input.clear()
             self.definition_input.clear()
             self.image_path_input.clear()
-            self.update_term_list()
 
     def delete_selected_term(self):
-        if self.current_term_id is None:
+        keys = self.selected_term_keys()
+        if not keys and self.current_term_key is not None:
+            keys = [self.current_term_key]
+        if not keys:
             QMessageBox.warning(self, "Error", "No term selected.")
             return
 
-        # Удаляем термин из временного списка
-        term_to_delete = self.temp_terms[self.current_term_id]
-        del self.temp_terms[self.current_term_id]
-        self.update_term_list()
-
-        # Обновляем terms.json
-        self.ensure_json_file_exists('terms.json')
-        with open('terms.json', 'r') as f:
-            terms = json.load(f)
-
-        # Находим ID термина в базе данных
-        self.cursor.execute('SELECT id FROM terms WHERE term = ? AND definition = ?',
-                            (term_to_delete['term'], term_to_delete['definition']))
-        term_id = self.cursor.fetchone()
-        if term_id:
-            term_id = term_id[0]
-            if str(term_id) in terms:
-                if self.module_id in terms[str(term_id)]['module_ids']:
-                    terms[str(term_id)]['module_ids'].remove(self.module_id)
-                    if not terms[str(term_id)]['module_ids']:
-                        del terms[str(term_id)]
-
-            with open('terms.json', 'w') as f:
-                json.dump(terms, f, indent=4)
+        # Удаляем термины из таблицы, изменения попадут в базу при сохранении модуля
+        self.term_model.remove_keys(keys)
+        self.current_term_key = None
 
     def save_module(self):
         module_name = self.module_name_input.text()
@@ -302,132 +426,80 @@ class CreateEditModuleWindow(QMainWindow):
             QMessageBox.warning(self, "Error", "Module name is required.")
             return
 
-        if not self.temp_terms:
+        if not self.term_model.rowCount():
             QMessageBox.warning(self, "Error", "At least one term is required to save the module.")
             return
 
-        # Сохраняем термины в terms.db
-        term_ids = []
-        try:
-            with self.conn:
-                for term in self.temp_terms:
-                    # Вставляем термин в базу данных и получаем его ID
-                    self.cursor.execute('''
-                        INSERT INTO terms (term, definition, complexity, image_path)
-                        VALUES (?, ?, ?, ?)
-                    ''', (term['term'], term['definition'], term['complexity'], term['image_path']))
-                    term_id = self.cursor.lastrowid
-                    term_ids.append(term_id)
-
-                    # Копируем изображение в папку проекта, если оно есть
-                    if term['image_path']:
-                        term['image_path'] = self.copy_image_to_project_folder(term['image_path'], term_id)
-
-                    # Обновляем путь к изображению в базе данных
-                    self.cursor.execute('''
-                        UPDATE terms
-                        SET image_path = ?
-                        WHERE id = ?
-                    ''', (term['image_path'], term_id))
-        except sqlite3.Error as e:
-            logging.error(f"Error saving terms to database: {e}")
-            QMessageBox.critical(self, "Database Error", f"Error saving terms to database: {e}")
-            return
-
-        # Сохраняем модуль в modules.db
-        try:
-            with self.conn:
-                if self.module_id:
-                    self.cursor.execute('''
-                        UPDATE modules
-                        SET name = ?, theme = ?, length = ?
-                        WHERE id = ?
-                    ''', (module_name, module_theme, len(term_ids), self.module_id))
-                else:
-                    self.cursor.execute('''
-                        INSERT INTO modules (name, theme, length)
-                        VALUES (?, ?, ?)
-                    ''', (module_name, module_theme, len(term_ids)))
-                    self.module_id = self.cursor.lastrowid
-        except sqlite3.Error as e:
-            logging.error(f"Error saving module to database: {e}")
-            QMessageBox.critical(self, "Database Error", f"Error saving module to database: {e}")
-            return
-
-        # Сохраняем модуль в modules.json
-        module_data = {
-            "id": self.module_id,
-            "name": module_name,
-            "description": module_description,
-            "term_ids": term_ids,
-            "theme": module_theme
-        }
-        try:
-            self.save_module_to_json(module_data)
-        except Exception as e:
-            logging.error(f"Error saving module to JSON: {e}")
-            QMessageBox.critical(self, "JSON Error", f"Error saving module to JSON: {e}")
+        # Правки, сделанные во время сохранения, уйдут следующим сохранением сразу после текущего
+        if self.save_task is not None:
+            self.save_progress.setLabelText("Saving module... newer changes will be saved next.")
             return
+        self.start_save()
+
+    def start_save(self):
+        # Сохраняется снимок терминов, поэтому редактирование во время сохранения безопасно
+        self.save_task = SaveTask(self.module_id, self.module_name_input.text(),
+                                  self.module_description_input.toPlainText(), self.module_theme_input.text(),
+                                  list(self.term_model.keys), self.term_model.terms())
+        self.save_task.signals.progress.connect(self.on_save_progress)
+        self.save_task.signals.finished.connect(self.on_save_finished)
+        self.save_task.signals.failed.connect(self.on_save_failed)
+        self.save_task.signals.cancelled.connect(self.on_save_cancelled)
+
+        self.save_progress = QProgressDialog("Saving module...", "Cancel", 0, 1000, self)
+        self.save_progress.setMinimumDuration(300)
+        self.save_progress.canceled.connect(self.cancel_save)
+        self.import_button.setEnabled(False)
+        self.export_button.setEnabled(False)
+        QThreadPool.globalInstance().start(self.save_task)
+
+    def cancel_save(self):
+        if self.save_task is not None:
+            self.save_task.cancelled = True
+
+    def on_save_progress(self, done, total):
+        self.save_progress.setValue(int(done * 1000 / max(total, 1)))
+
+    def finish_save(self):
+        self.save_task = None
+        self.save_progress.reset()
+        self.import_button.setEnabled(True)
+        self.export_button.setEnabled(True)
+
+    def on_save_finished(self, module_id):
+        task = self.save_task
+        task.apply_results(self.term_model)
+        self.module_id = module_id
+        self.finish_save()
 
-        # Сохраняем термины в terms.json
-        try:
-            self.save_terms_to_json(term_ids)
-        except Exception as e:
-            logging.error(f"Error saving terms to JSON: {e}")
-            QMessageBox.critical(self, "JSON Error", f"Error saving terms to JSON: {e}")
+        current = (self.module_name_input.text(), self.module_description_input.toPlainText(),
+                   self.module_theme_input.text(), self.term_model.values())
+        if current != task.snapshot():
+            self.save_module()
             return
 
-        QMessageBox.information(self, "Success", "Module saved successfully.")
+        message = "Module saved successfully."
+        if task.duplicates:
+            message += (f" {task.duplicates} new terms are already in the library; "
+                        "use Duplicates in the main window to merge them.")
+        QMessageBox.information(self, "Success", message)
         self.module_saved = True  # Устанавливаем флаг, что модуль был успешно сохранен
         self.update_signal.emit()
         self.close()
 
-    def save_module_to_json(self, module_data):
-        self.ensure_json_file_exists('modules.json')
-        try:
-            with open('modules.json', 'r') as f:
-                modules = json.load(f)
-        except json.JSONDecodeError as e:
-            logging.error(f"Error loading modules JSON: {e}")
-            modules = {}
+    def on_save_failed(self, message):
+        self.finish_save()
+        QMessageBox.critical(self, "Database Error", f"Error saving module to database: {message}")
 
-        modules[module_data['id']] = module_data
-
-        try:
-            with open('modules.json', 'w') as f:
-                json.dump(modules, f, indent=4)
-        except IOError as e:
-            logging.error(f"Error writing modules JSON: {e}")
-            raise
-
-    def save_terms_to_json(self, term_ids):
-        self.ensure_json_file_exists('terms.json')
-        try:
-            with open('terms.json', 'r') as f:
-                terms = json.load(f)
-        except json.JSONDecodeError as e:
-            logging.error(f"Error loading terms JSON: {e}")
-            terms = {}
-
-        for term_id in term_ids:
-            if str(term_id) in terms:
-                if self.module_id not in terms[str(term_id)]['module_ids']:
-                    terms[str(term_id)]['module_ids'].append(self.module_id)
-            else:
-                terms[str(term_id)] = {
-                    "module_ids": [self.module_id],
-                    "image_path": self.temp_terms[term_ids.index(term_id)]['image_path']
-                }
-
-        try:
-            with open('terms.json', 'w') as f:
-                json.dump(terms, f, indent=4)
-        except IOError as e:
-            logging.error(f"Error writing terms JSON: {e}")
-            raise
+    def on_save_cancelled(self):
+        self.finish_save()
+        QMessageBox.information(self, "Save Cancelled", "Saving was cancelled. No changes were written.")
 
     def closeEvent(self, event):
-        if self.module_saved:
+        if self.save_task is not None:
+            QMessageBox.warning(self, "Saving", "Wait for the module to finish saving or cancel the save.")
+            event.ignore()
+        elif self.module_saved:
             event.accept()
         else:
             reply = QMessageBox.question(self, 'Confirmation', 'Are you sure you want to close the window?',
@@ -439,15 +511,82 @@ class CreateEditModuleWindow(QMainWindow):
                 event.ignore()
 
     def import_data(self):
-        file_path, _ = QFileDialog.getOpenFileName(self, "Select File", "", "Text Files (*.txt);;All Files (*)")
-        if file_path:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as file:
-                    data = file.read()
-                    self.import_text_field.setText(data)
-            except IOError as e:
-                logging.error(f"Error reading file: {e}")
-                QMessageBox.critical(self, "File Error", f"Error reading file: {e}")
+        file_path, _ = QFileDialog.getOpenFileName(self, "Select File", "", IMPORT_FILTER)
+        if not file_path:
+            return
+
+        term_separator = self.get_separator(self.separator_combo, self.custom_separator_input)
+        card_separator = self.get_separator(self.card_separator_combo, self.custom_card_separator_input)
+
+        self.import_progress = QProgressDialog("Importing terms...", "Cancel", 0, 1000, self)
+        self.import_progress.setWindowModality(Qt.WindowModality.WindowModal)
+        self.import_progress.setMinimumDuration(300)
+        if format_of(file_path) in READERS:
+            self.import_progress.setRange(0, 0)  # размер в записях заранее неизвестен
+
+        self.import_task = ImportTask(file_path, term_separator, card_separator)
+        self.import_task.signals.progress.connect(self.on_import_progress)
+        self.import_task.signals.batch.connect(self.term_model.append_terms)
+        self.import_task.signals.finished.connect(self.on_import_finished)
+        self.import_task.signals.failed.connect(self.on_import_failed)
+        self.import_progress.canceled.connect(self.cancel_import)
+        self.set_term_actions_enabled(False)
+        QThreadPool.globalInstance().start(self.import_task)
+
+    def cancel_import(self):
+        if self.import_task is not None:
+            self.import_task.cancelled = True
+
+    def on_import_progress(self, done, total):
+        self.import_progress.setValue(int(done * 1000 / total))
+
+    def on_import_failed(self, message):
+        self.import_task = None
+        self.import_progress.reset()
+        self.set_term_actions_enabled(True)
+        QMessageBox.critical(self, "File Error", f"Error importing file: {message}")
+
+    def on_import_finished(self, result):
+        self.import_task = None
+        self.import_progress.reset()
+        self.set_term_actions_enabled(True)
+
+        # Импортированные термины уже в таблице, повторы в библиотеке посчитает сохранение
+        if result.errors:
+            self.import_text_field.setText("\n".join(result.errors))
+            QMessageBox.warning(self, "Import Errors",
+                                f"{result.failed} cards could not be imported. Check the text field for details.")
+        elif result.cancelled:
+            QMessageBox.information(self, "Import Cancelled",
+                                    f"Import cancelled after {result.imported} terms. Save the module to keep them.")
+
+    def export_data(self):
+        if not self.module_id:
+            QMessageBox.warning(self, "Error", "Save the module before exporting it.")
+            return
+        file_path, _ = QFileDialog.getSaveFileName(self, "Export Module", self.module_name_input.text(), EXPORT_FILTER)
+        if not file_path:
+            return
+        if not format_of(file_path):
+            file_path += '.csv'
+
+        # Экспортируется сохранённое состояние модуля
+        self.export_button.setEnabled(False)
+        self.export_task = ExportTask(file_path, self.module_id)
+        self.export_task.signals.finished.connect(self.on_export_finished)
+        self.export_task.signals.failed.connect(self.on_export_failed)
+        QThreadPool.globalInstance().start(self.export_task)
+
+    def on_export_finished(self, count):
+        file_path = self.export_task.file_path
+        self.export_task = None
+        self.export_button.setEnabled(True)
+        QMessageBox.information(self, "Export", f"{count} terms exported to {file_path}.")
+
+    def on_export_failed(self, message):
+        self.export_task = None
+        self.export_button.setEnabled(True)
+        QMessageBox.critical(self, "File Error", f"Error exporting module: {message}")
 
     def import_terms(self):
         data = self.import_text_field.toPlainText()  # Используем toPlainText() для получения текста без форматирования
@@ -465,6 +604,7 @@ class CreateEditModuleWindow(QMainWindow):
                     definition = definition.strip()
                     if term and definition:
                         terms.append({
+                            "id": None,
                             "term": term,
                             "definition": definition,
                             "complexity": "Normal",
@@ -475,8 +615,7 @@ class CreateEditModuleWindow(QMainWindow):
                 except ValueError:
                     errors.append(card)
 
-        self.temp_terms.extend(terms)
-        self.update_term_list()
+        self.term_model.append_terms(terms)
 
         if errors:
             self.import_text_field.setText("\n".join(errors))
@@ -496,23 +635,6 @@ class CreateEditModuleWindow(QMainWindow):
         elif selected_separator == "Semicolon":
             return ";"
 
-    def ensure_json_file_exists(self, filename):
-        if not os.path.exists(filename):
-            with open(filename, 'w') as f:
-                json.dump({}, f)
-
-    def ensure_images_folder_exists(self):
-        if not os.path.exists('images'):
-            os.makedirs('images')
-
-    def copy_image_to_project_folder(self, source_path, term):
-        self.ensure_images_folder_exists()
-        filename = os.path.basename(source_path)
-        file_extension = os.path.splitext(filename)[1]
-        destination_path = os.path.join('images', f"{term}{file_extension}")
-        shutil.copy(source_path, destination_path)
-        return destination_path
-
     def upload_image(self):
         file_path, _ = QFileDialog.getOpenFileName(self, "Select Image", "",
                                                    "Images (*.png *.xpm *.jpg *.bmp);;All Files (*)")
@@ -0,0 +1,397 @@
+import os
+import json
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from application.modules.Scheduler import INITIAL_EASE
+
+DB_PATH = 'vocabify.db'
+MODULES_JSON = 'modules.json'
+TERMS_JSON = 'terms.json'
+
+PRAGMAS = [
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = NORMAL',
+    'PRAGMA foreign_keys = ON',
+    'PRAGMA busy_timeout = 5000',
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA cache_size = -32000',
+    'PRAGMA mmap_size = 268435456',
+]
+
+# Размер кэша подготовленных выражений sqlite3 на одно соединение
+CACHED_STATEMENTS = 256
+
+class SchemaError(sqlite3.DatabaseError):
+    pass
+
+
+_local = threading.local()
+_schema_lock = threading.Lock()
+_schema_checked = set()
+
+
+def get_connection(path=DB_PATH):
+    # Одно долгоживущее соединение на поток; схема проверяется один раз за запуск
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    conn = connections.get(path)
+    if conn is None:
+        conn = sqlite3.connect(path, cached_statements=CACHED_STATEMENTS)
+        try:
+            for pragma in PRAGMAS:
+                conn.execute(pragma)
+            ensure_schema(conn, path)
+        except BaseException:
+            conn.close()
+            raise
+        connections[path] = conn
+    return conn
+
+
+def close_connection(path=DB_PATH):
+    connections = getattr(_local, 'connections', {})
+    conn = connections.pop(path, None)
+    if conn is not None:
+        conn.close()
+
+
+@contextmanager
+def transaction(conn):
+    # BEGIN IMMEDIATE сразу берёт блокировку записи, поэтому выданные внутри id не пересекутся с другим потоком
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
+
+
+def ensure_schema(conn, path=DB_PATH):
+    with _schema_lock:
+        if path in _schema_checked:
+            return
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        for target_version, migrate in MIGRATIONS:
+            if version < target_version:
+                if migrate(conn) is False:
+                    # Запросы рассчитаны на последнюю версию схемы, поэтому со старой базой не работаем;
+                    # проверка повторится при следующем открытии
+                    raise SchemaError(f"Cannot upgrade {path} from schema version {version} to {target_version}, "
+                                      f"see the log for details")
+                conn.execute(f'PRAGMA user_version = {target_version}')
+                conn.commit()
+                version = target_version
+                logging.info("Database schema upgraded to version %d", version)
+        _schema_checked.add(path)
+
+
+def _migrate_v1(conn):
+    with conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS terms (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                term TEXT NOT NULL,
+                definition TEXT NOT NULL,
+                complexity TEXT DEFAULT 'Normal',
+                image_path TEXT
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS modules (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                theme TEXT,
+                length INTEGER NOT NULL
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS module_terms (
+                module_id INTEGER NOT NULL REFERENCES modules(id) ON DELETE CASCADE,
+                term_id INTEGER NOT NULL REFERENCES terms(id) ON DELETE CASCADE,
+                position INTEGER NOT NULL,
+                PRIMARY KEY (module_id, term_id)
+            ) WITHOUT ROWID
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_module_terms_position ON module_terms (module_id, position)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_module_terms_term ON module_terms (term_id)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_modules_name ON modules (name)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_modules_theme ON modules (theme)')
+
+        # Старые базы создавались без описания модуля - оно хранилось в modules.json
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(modules)')]
+        if 'description' not in columns:
+            conn.execute("ALTER TABLE modules ADD COLUMN description TEXT NOT NULL DEFAULT ''")
+
+    # JSON старых версий лежит рядом с файлом базы, а не в текущей папке (см. vocabify --db)
+    return migrate_json(conn, os.path.dirname(conn.execute('PRAGMA database_list').fetchone()[2]))
+
+
+def migrate_json(conn, directory=''):
+    # Одноразовый перенос modules.json/terms.json в таблицы modules и module_terms
+    modules_path = os.path.join(directory, MODULES_JSON)
+    modules_json = {}
+    if os.path.exists(modules_path):
+        try:
+            with open(modules_path, 'r') as f:
+                modules_json = json.load(f)
+        except (OSError, ValueError) as e:
+            # Повреждённый файл не должен стереть библиотеку, поэтому оставляем его на месте
+            logging.error("Cannot migrate %s, leaving it in place: %s", modules_path, e)
+            return False
+
+    with conn:
+        for key, module_data in modules_json.items():
+            module_id = int(key)
+            exists = conn.execute('SELECT 1 FROM modules WHERE id = ?', (module_id,)).fetchone()
+            if not exists:
+                continue
+            conn.execute('UPDATE modules SET description = ? WHERE id = ?',
+                         (module_data.get('description', ''), module_id))
+            term_ids = module_data.get('term_ids', [])
+            conn.execute('DELETE FROM module_terms WHERE module_id = ?', (module_id,))
+            conn.executemany(
+                'INSERT OR IGNORE INTO module_terms (module_id, term_id, position) '
+                'SELECT ?, id, ? FROM terms WHERE id = ?',
+                [(module_id, position, term_id) for position, term_id in enumerate(term_ids)])
+
+        # Модули, которых нет в modules.json, были удалены пользователем и не отображались
+        conn.execute('DELETE FROM modules WHERE id NOT IN (SELECT DISTINCT module_id FROM module_terms)')
+        # Старое сохранение удаляло и заново вставляло термины, оставляя в terms строки без модуля
+        conn.execute('DELETE FROM terms WHERE id NOT IN (SELECT term_id FROM module_terms)')
+        conn.execute('UPDATE modules SET length = (SELECT COUNT(*) FROM module_terms WHERE module_id = modules.id)')
+
+    for filename in (modules_path, os.path.join(directory, TERMS_JSON)):
+        if os.path.exists(filename):
+            os.replace(filename, filename + '.migrated')
+    logging.info("Migrated %d modules from JSON to SQLite", len(modules_json))
+    return True
+
+
+def _migrate_v2(conn):
+    # Полнотекстовый индекс: термины вместе с названием и темой модуля, отдельно - модули
+    with conn:
+        conn.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5 (
+                term, definition, module_name, theme, module_id UNINDEXED,
+                tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+            )
+        ''')
+        conn.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS module_search USING fts5 (
+                name, theme, description,
+                tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+            )
+        ''')
+        conn.executescript('''
+            CREATE TRIGGER IF NOT EXISTS module_terms_ai AFTER INSERT ON module_terms BEGIN
+                DELETE FROM search_index WHERE rowid = new.term_id;
+                INSERT INTO search_index (rowid, term, definition, module_name, theme, module_id)
+                SELECT t.id, t.term, t.definition, m.name, COALESCE(m.theme, ''), m.id
+                FROM terms t, modules m
+                WHERE t.id = new.term_id AND m.id = new.module_id;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS module_terms_ad AFTER DELETE ON module_terms BEGIN
+                DELETE FROM search_index WHERE rowid = old.term_id;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS terms_au AFTER UPDATE OF term, definition ON terms BEGIN
+                UPDATE search_index SET term = new.term, definition = new.definition WHERE rowid = new.id;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS modules_ai AFTER INSERT ON modules BEGIN
+                INSERT INTO module_search (rowid, name, theme, description)
+                VALUES (new.id, new.name, COALESCE(new.theme, ''), new.description);
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS modules_ad AFTER DELETE ON modules BEGIN
+                DELETE FROM module_search WHERE rowid = old.id;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS modules_au AFTER UPDATE OF name, theme, description ON modules
+            WHEN old.name IS NOT new.name OR old.theme IS NOT new.theme OR old.description IS NOT new.description
+            BEGIN
+                UPDATE module_search SET name = new.name, theme = COALESCE(new.theme, ''),
+                    description = new.description
+                WHERE rowid = new.id;
+                UPDATE search_index SET module_name = new.name, theme = COALESCE(new.theme, '')
+                WHERE rowid IN (SELECT term_id FROM module_terms WHERE module_id = new.id)
+                AND (old.name IS NOT new.name OR old.theme IS NOT new.theme);
+            END;
+        ''')
+    rebuild_search_index(conn)
+
+
+def rebuild_search_index(conn):
+    with conn:
+        conn.execute('DELETE FROM search_index')
+        # Строка индекса одна на термин, даже если после слияния дубликатов он входит в несколько модулей
+        conn.execute('''
+            INSERT INTO search_index (rowid, term, definition, module_name, theme, module_id)
+            SELECT t.id, t.term, t.definition, m.name, COALESCE(m.theme, ''), m.id
+            FROM terms t
+            JOIN modules m ON m.id = (SELECT MIN(module_id) FROM module_terms WHERE term_id = t.id)
+        ''')
+        conn.execute('DELETE FROM module_search')
+        conn.execute('''
+            INSERT INTO module_search (rowid, name, theme, description)
+            SELECT id, name, COALESCE(theme, ''), description FROM modules
+        ''')
+        conn.execute("INSERT INTO search_index (search_index) VALUES ('optimize')")
+        conn.execute("INSERT INTO module_search (module_search) VALUES ('optimize')")
+
+
+def initial_ease_sql(column):
+    # CASE-выражение с начальной лёгкостью из Scheduler.INITIAL_EASE для триггера и заполнения review_state
+    cases = ' '.join(f"WHEN '{complexity}' THEN {ease}" for complexity, ease in INITIAL_EASE.items()
+                     if complexity != 'Normal')
+    return f"CASE {column} {cases} ELSE {INITIAL_EASE['Normal']} END"
+
+
+def _migrate_v3(conn):
+    # Состояние интервального повторения; новая карточка сразу готова к показу
+    with conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS review_state (
+                term_id INTEGER PRIMARY KEY REFERENCES terms(id) ON DELETE CASCADE,
+                ease REAL NOT NULL,
+                interval REAL NOT NULL DEFAULT 0,
+                repetitions INTEGER NOT NULL DEFAULT 0,
+                lapses INTEGER NOT NULL DEFAULT 0,
+                due REAL NOT NULL,
+                last_review REAL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_review_state_due ON review_state (due)')
+        conn.executescript(f'''
+            CREATE TRIGGER IF NOT EXISTS terms_review_ai AFTER INSERT ON terms BEGIN
+                INSERT OR IGNORE INTO review_state (term_id, ease, due)
+                VALUES (new.id, {initial_ease_sql('new.complexity')}, CAST(strftime('%s', 'now') AS REAL));
+            END;
+        ''')
+        conn.execute(f'''
+            INSERT OR IGNORE INTO review_state (term_id, ease, due)
+            SELECT id, {initial_ease_sql('complexity')}, CAST(strftime('%s', 'now') AS REAL)
+            FROM terms
+        ''')
+
+
+def _migrate_v4(conn):
+    # Счётчики ссылок на файлы хранилища изображений (media/<ab>/<sha256>.<ext>)
+    with conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS media (
+                path TEXT PRIMARY KEY,
+                refs INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        ''')
+        conn.executescript('''
+            CREATE TRIGGER IF NOT EXISTS terms_media_ai AFTER INSERT ON terms
+            WHEN new.image_path LIKE 'media/%' BEGIN
+                INSERT INTO media (path, refs) VALUES (new.image_path, 1)
+                ON CONFLICT (path) DO UPDATE SET refs = refs + 1;
+            END;
+            CREATE TRIGGER IF NOT EXISTS terms_media_ad AFTER DELETE ON terms
+            WHEN old.image_path LIKE 'media/%' BEGIN
+                UPDATE media SET refs = refs - 1 WHERE path = old.image_path;
+            END;
+            CREATE TRIGGER IF NOT EXISTS terms_media_au AFTER UPDATE OF image_path ON terms
+            WHEN old.image_path IS NOT new.image_path BEGIN
+                UPDATE media SET refs = refs - 1 WHERE path = old.image_path;
+                INSERT INTO media (path, refs) SELECT new.image_path, 1 WHERE new.image_path LIKE 'media/%'
+                ON CONFLICT (path) DO UPDATE SET refs = refs + 1;
+            END;
+        ''')
+        conn.execute('''
+            INSERT OR REPLACE INTO media (path, refs)
+            SELECT image_path, COUNT(*) FROM terms WHERE image_path LIKE 'media/%' GROUP BY image_path
+        ''')
+
+
+def _migrate_v5(conn):
+    # Случайный ключ у каждой связи термина с модулем. Сессия изучения читает термины по индексу
+    # (module_id, shuffle_key) начиная с ключа-зерна, а не перемешивает весь список в памяти.
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(module_terms)')]
+    with conn:
+        if 'shuffle_key' not in columns:
+            conn.execute('ALTER TABLE module_terms ADD COLUMN shuffle_key INTEGER')
+        conn.execute('UPDATE module_terms SET shuffle_key = random() WHERE shuffle_key IS NULL')
+        conn.executescript('''
+            CREATE TRIGGER IF NOT EXISTS module_terms_shuffle_ai AFTER INSERT ON module_terms
+            WHEN new.shuffle_key IS NULL BEGIN
+                UPDATE module_terms SET shuffle_key = random()
+                WHERE module_id = new.module_id AND term_id = new.term_id;
+            END;
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_module_terms_shuffle ON module_terms (module_id, shuffle_key)')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS saved_searches (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL UNIQUE,
+                query TEXT NOT NULL
+            )
+        ''')
+
+
+def _migrate_v6(conn):
+    # Отпечатки для поиска дубликатов (см. Duplicates): norm_hash у термина и корзины LSH.
+    # Старые термины получают отпечатки при первой проверке дубликатов, а не при запуске.
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(terms)')]
+    with conn:
+        if 'norm_hash' not in columns:
+            conn.execute('ALTER TABLE terms ADD COLUMN norm_hash INTEGER')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_terms_norm_hash ON terms (norm_hash)')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS term_lsh (
+                bucket INTEGER NOT NULL,
+                term_id INTEGER NOT NULL REFERENCES terms(id) ON DELETE CASCADE,
+                PRIMARY KEY (bucket, term_id)
+            ) WITHOUT ROWID
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_term_lsh_term ON term_lsh (term_id)')
+        # После слияния дубликатов термин может входить в несколько модулей. Строка search_index одна
+        # на термин: при удалении связи она переходит к оставшемуся модулю и удаляется вместе с последней
+        # связью, а переименование модуля не трогает строки, привязанные к другому модулю
+        conn.executescript('''
+            DROP TRIGGER IF EXISTS module_terms_ad;
+            CREATE TRIGGER module_terms_ad AFTER DELETE ON module_terms BEGIN
+                DELETE FROM search_index WHERE rowid = old.term_id
+                AND NOT EXISTS (SELECT 1 FROM module_terms WHERE term_id = old.term_id);
+                UPDATE search_index SET (module_name, theme, module_id) = (
+                    SELECT m.name, COALESCE(m.theme, ''), m.id
+                    FROM module_terms mt JOIN modules m ON m.id = mt.module_id
+                    WHERE mt.term_id = old.term_id
+                    ORDER BY mt.module_id LIMIT 1
+                )
+                WHERE rowid = old.term_id AND module_id = old.module_id;
+            END;
+
+            DROP TRIGGER IF EXISTS modules_au;
+            CREATE TRIGGER modules_au AFTER UPDATE OF name, theme, description ON modules
+            WHEN old.name IS NOT new.name OR old.theme IS NOT new.theme OR old.description IS NOT new.description
+            BEGIN
+                UPDATE module_search SET name = new.name, theme = COALESCE(new.theme, ''),
+                    description = new.description
+                WHERE rowid = new.id;
+                UPDATE search_index SET module_name = new.name, theme = COALESCE(new.theme, '')
+                WHERE rowid IN (SELECT term_id FROM module_terms WHERE module_id = new.id)
+                AND module_id = new.id
+                AND (old.name IS NOT new.name OR old.theme IS NOT new.theme);
+            END;
+        ''')
+
+
+MIGRATIONS = [
+    (1, _migrate_v1),
+    (2, _migrate_v2),
+    (3, _migrate_v3),
+    (4, _migrate_v4),
+    (5, _migrate_v5),
+    (6, _migrate_v6),
+]
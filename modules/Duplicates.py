@@ -0,0 +1,170 @@
+import zlib
+import struct
+import hashlib
+from application.modules.AnswerChecker import normalize
+
+# Поиск повторяющихся терминов.
+# Точные дубликаты - одинаковый norm_hash: 64-битный хэш нормализованных термина и определения
+# (регистр, пунктуация, диакритика не различаются, см. AnswerChecker.normalize).
+# Почти-дубликаты - MinHash по символьным триграммам (с одной перестановкой) и LSH: 16 значений сигнатуры делятся на
+# BANDS полос, термины с совпавшей полосой попадают в одну корзину таблицы term_lsh. Кандидаты из
+# корзины проверяются точным коэффициентом Жаккара по триграммам. Пары с похожестью около 0.7
+# находятся с вероятностью выше 90%, а пары ниже 0.3 почти никогда не становятся кандидатами.
+
+NUM_HASHES = 16
+BANDS = 4
+ROWS = NUM_HASHES // BANDS
+SHINGLE = 3
+NEAR_THRESHOLD = 0.7  # порог Жаккара для почти-дубликатов
+FINGERPRINT_BATCH = 2000
+MAX_BUCKET = 20  # из корзины LSH сравниваются не больше стольких терминов
+_SIGNED = struct.Struct('<q')
+CELL_BITS = 4
+CELL_MASK = NUM_HASHES - 1
+DENSIFY_OFFSET = 1 << 28
+
+
+def fingerprint_text(term, definition):
+    return f"{normalize(term)}\n{normalize(definition)}"
+
+
+def text_hash(text):
+    # Знаковое 64-битное число, чтобы уместиться в INTEGER SQLite
+    return _SIGNED.unpack(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest())[0]
+
+
+def shingles(text):
+    if len(text) <= SHINGLE:
+        return {text}
+    return {text[i:i + SHINGLE] for i in range(len(text) - SHINGLE + 1)}
+
+
+def minhash(grams):
+    # MinHash с одной перестановкой: каждая триграмма хэшируется один раз (crc32), младшие биты
+    # выбирают ячейку сигнатуры, старшие - значение; пустые ячейки берут значение следующей непустой
+    signature = [None] * NUM_HASHES
+    for value in map(zlib.crc32, (gram.encode('utf-8') for gram in grams)):
+        cell, value = value & CELL_MASK, value >> CELL_BITS
+        current = signature[cell]
+        if current is None or value < current:
+            signature[cell] = value
+    filled = [cell for cell in range(NUM_HASHES) if signature[cell] is not None]
+    if len(filled) < NUM_HASHES:
+        for cell in range(NUM_HASHES):
+            if signature[cell] is None:
+                # Сдвиг на номер шага отличает подставленное значение от настоящего
+                steps = next(step for step in range(1, NUM_HASHES) if signature[(cell + step) % NUM_HASHES] is not None)
+                signature[cell] = signature[(cell + steps) % NUM_HASHES] + steps * DENSIFY_OFFSET
+    return signature
+
+
+def band_keys(signature):
+    keys = []
+    for band in range(BANDS):
+        values = struct.pack(f'<B{ROWS}Q', band, *signature[band * ROWS:(band + 1) * ROWS])
+        keys.append(_SIGNED.unpack(hashlib.blake2b(values, digest_size=8).digest())[0])
+    return keys
+
+
+def fingerprint(term, definition):
+    # (norm_hash, ключи корзин LSH) для одного термина
+    text = fingerprint_text(term, definition)
+    return text_hash(text), band_keys(minhash(shingles(text)))
+
+
+def jaccard(first, second):
+    first, second = shingles(first), shingles(second)
+    union = len(first | second)
+    return len(first & second) / union if union else 1.0
+
+
+def fingerprint_rows(rows):
+    # Для пула процессов: (id, term, definition) -> (id, norm_hash, ключи корзин)
+    return [(term_id,) + fingerprint(term, definition) for term_id, term, definition in rows]
+
+
+def index_missing(storage, progress=None, is_cancelled=None, batch_size=FINGERPRINT_BATCH, map_batches=map):
+    # Отпечатки для терминов, сохранённых до появления поиска дубликатов. Идёт порциями по id,
+    # поэтому прерванную проверку можно продолжить; map_batches позволяет считать в нескольких процессах.
+    total = storage.count_terms_without_fingerprint()
+    done = 0
+
+    def batches():
+        after_id = 0
+        while not (is_cancelled is not None and is_cancelled()):
+            rows = storage.terms_without_fingerprint(after_id, batch_size)
+            if not rows:
+                return
+            after_id = rows[-1][0]
+            yield rows
+
+    for fingerprints in map_batches(fingerprint_rows, batches()):
+        storage.set_fingerprints(fingerprints)
+        done += len(fingerprints)
+        if progress is not None:
+            progress(done, total)
+    return done
+
+
+class DuplicateGroup:
+    __slots__ = ('exact', 'term_ids', 'similarity')
+
+    def __init__(self, exact, term_ids, similarity=1.0):
+        self.exact = exact
+        self.term_ids = term_ids
+        self.similarity = similarity  # наименьшая похожесть среди найденных пар группы
+
+
+def find_duplicates(storage, near=True, threshold=NEAR_THRESHOLD, max_bucket=MAX_BUCKET):
+    # Группы точных дубликатов, затем группы похожих терминов с разными norm_hash
+    groups = [DuplicateGroup(True, term_ids) for term_ids in storage.exact_duplicate_groups()]
+    if not near:
+        return groups
+
+    candidates = set()
+    buckets = list(storage.iter_lsh_buckets(max_bucket))
+    for members in buckets:
+        for i, first in enumerate(members):
+            for second in members[i + 1:]:
+                candidates.add((first, second))
+    if not candidates:
+        return groups
+
+    # Триграммы каждого кандидата строятся один раз; пара проверяется пересечением множеств
+    grams = {}
+    hashes = {}
+    for row in storage.duplicate_details({term_id for pair in candidates for term_id in pair}):
+        grams[row[0]] = shingles(fingerprint_text(row[1], row[2]))
+        hashes[row[0]] = row[5]
+
+    # Объединение похожих пар в группы (система непересекающихся множеств)
+    parent = {}
+
+    def root(term_id):
+        while parent.setdefault(term_id, term_id) != term_id:
+            parent[term_id] = parent[parent[term_id]]  # сокращение пути
+            term_id = parent[term_id]
+        return term_id
+
+    similarity = {}
+    for first, second in candidates:
+        if first not in grams or second not in grams or hashes[first] == hashes[second]:
+            continue
+        first_grams, second_grams = grams[first], grams[second]
+        sizes = sorted((len(first_grams), len(second_grams)))
+        if sizes[0] < threshold * sizes[1]:
+            continue  # Жаккар не больше отношения размеров
+        common = len(first_grams & second_grams)
+        value = common / (sizes[0] + sizes[1] - common)
+        if value >= threshold:
+            first_root, second_root = root(first), root(second)
+            if first_root != second_root:
+                parent[second_root] = first_root
+            similarity[first_root] = min(similarity.get(first_root, 1.0), similarity.pop(second_root, 1.0), value)
+
+    members = {}
+    for term_id in list(parent):
+        members.setdefault(root(term_id), set()).add(term_id)
+    for term_root, term_ids in members.items():
+        groups.append(DuplicateGroup(False, sorted(term_ids), similarity.get(term_root, threshold)))
+    return groups
@@ -0,0 +1,203 @@
+import sqlite3
+import logging
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QProgressBar, QTreeWidget, QTreeWidgetItem,
+    QMessageBox, QAbstractItemView
+)
+from PyQt6.QtCore import Qt, QObject, QRunnable, QThreadPool, pyqtSignal
+from application.modules.Storage import Storage
+from application.modules.Duplicates import index_missing, find_duplicates
+
+MAX_SHOWN_GROUPS = 500  # больше групп в дереве не показываем, слияние всех точных дубликатов их тоже обработает
+
+
+class ScanSignals(QObject):
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(list, dict)
+    failed = pyqtSignal(str)
+
+
+class ScanTask(QRunnable):
+    # Отпечатки старых терминов и поиск групп дубликатов в фоновом потоке
+    def __init__(self):
+        super().__init__()
+        self.cancelled = False
+        self.signals = ScanSignals()
+
+    def run(self):
+        try:
+            storage = Storage()
+            index_missing(storage, self.signals.progress.emit, lambda: self.cancelled)
+            if self.cancelled:
+                return
+            groups = find_duplicates(storage)
+            shown = {term_id for group in groups[:MAX_SHOWN_GROUPS] for term_id in group.term_ids}
+            details = {row[0]: row for row in storage.duplicate_details(shown)}
+        except sqlite3.Error as e:
+            logging.error("Error scanning for duplicates: %s", e)
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.finished.emit(groups, details)
+
+
+class DuplicatesDialog(QDialog):
+    merged = pyqtSignal()
+
+    def __init__(self, storage, parent=None):
+        super().__init__(parent)
+        self.storage = storage
+        self.groups = []
+        self.scan_task = None
+        self.setWindowTitle("Duplicate Terms")
+        self.setGeometry(120, 120, 760, 520)
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+
+        self.status_label = QLabel("Looking for duplicates...")
+        layout.addWidget(self.status_label)
+        self.progress_bar = QProgressBar()
+        layout.addWidget(self.progress_bar)
+
+        # Группа - элемент верхнего уровня, её термины - дочерние; выбранный термин остаётся при слиянии
+        self.tree = QTreeWidget()
+        self.tree.setHeaderLabels(["Term", "Definition", "Modules"])
+        self.tree.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.tree.setColumnWidth(0, 200)
+        self.tree.setColumnWidth(1, 320)
+        layout.addWidget(self.tree)
+
+        buttons = QHBoxLayout()
+        self.merge_button = QPushButton("Merge Group")
+        self.merge_button.setToolTip("Keep the selected term (or the oldest one) and merge the others into it")
+        self.merge_button.clicked.connect(self.merge_selected_group)
+        buttons.addWidget(self.merge_button)
+        self.skip_button = QPushButton("Skip Group")
+        self.skip_button.clicked.connect(self.skip_selected_group)
+        buttons.addWidget(self.skip_button)
+        self.merge_exact_button = QPushButton("Merge All Exact")
+        self.merge_exact_button.clicked.connect(self.merge_all_exact)
+        buttons.addWidget(self.merge_exact_button)
+        self.rescan_button = QPushButton("Rescan")
+        self.rescan_button.clicked.connect(self.scan)
+        buttons.addWidget(self.rescan_button)
+        close_button = QPushButton("Close")
+        close_button.clicked.connect(self.close)
+        buttons.addWidget(close_button)
+        layout.addLayout(buttons)
+
+        self.scan()
+
+    def set_actions_enabled(self, enabled):
+        for button in (self.merge_button, self.skip_button, self.merge_exact_button, self.rescan_button):
+            button.setEnabled(enabled)
+
+    def scan(self):
+        self.tree.clear()
+        self.status_label.setText("Looking for duplicates...")
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setVisible(True)
+        self.set_actions_enabled(False)
+        self.scan_task = ScanTask()
+        self.scan_task.signals.progress.connect(self.on_scan_progress)
+        self.scan_task.signals.finished.connect(self.on_scan_finished)
+        self.scan_task.signals.failed.connect(self.on_scan_failed)
+        QThreadPool.globalInstance().start(self.scan_task)
+
+    def on_scan_progress(self, done, total):
+        self.status_label.setText(f"Fingerprinting terms: {done} of {total}")
+        self.progress_bar.setRange(0, max(total, 1))
+        self.progress_bar.setValue(done)
+
+    def on_scan_failed(self, message):
+        self.scan_task = None
+        self.progress_bar.setVisible(False)
+        self.set_actions_enabled(True)
+        QMessageBox.critical(self, "Database Error", f"Error scanning for duplicates: {message}")
+
+    def on_scan_finished(self, groups, details):
+        self.scan_task = None
+        self.groups = groups
+        self.progress_bar.setVisible(False)
+        self.set_actions_enabled(True)
+        for group in groups[:MAX_SHOWN_GROUPS]:
+            title = "Exact duplicates" if group.exact else f"Similar ({group.similarity:.0%})"
+            group_item = QTreeWidgetItem([title])
+            group_item.setData(0, Qt.ItemDataRole.UserRole, group)
+            for term_id in group.term_ids:
+                row = details.get(term_id)
+                if row is None:
+                    continue
+                term_item = QTreeWidgetItem([row[1], row[2], row[6]])
+                term_item.setData(0, Qt.ItemDataRole.UserRole, term_id)
+                term_item.setToolTip(1, row[2])
+                group_item.addChild(term_item)
+            self.tree.addTopLevelItem(group_item)
+            group_item.setExpanded(True)
+        self.update_status()
+
+    def update_status(self):
+        exact = sum(1 for group in self.groups if group.exact)
+        text = f"{exact} groups of exact duplicates, {len(self.groups) - exact} groups of similar terms."
+        if len(self.groups) > self.tree.topLevelItemCount():
+            text += f" Showing {self.tree.topLevelItemCount()}."
+        self.status_label.setText(text if self.groups else "No duplicates found.")
+
+    def selected_group_item(self):
+        item = self.tree.currentItem()
+        if item is None:
+            return None
+        return item.parent() or item
+
+    def merge_selected_group(self):
+        group_item = self.selected_group_item()
+        if group_item is None:
+            QMessageBox.warning(self, "Error", "Select a group or the term to keep.")
+            return
+        group = group_item.data(0, Qt.ItemDataRole.UserRole)
+        current = self.tree.currentItem()
+        keep_id = current.data(0, Qt.ItemDataRole.UserRole) if current is not group_item else group.term_ids[0]
+        try:
+            self.storage.merge_terms(keep_id, [term_id for term_id in group.term_ids if term_id != keep_id])
+        except sqlite3.Error as e:
+            logging.error("Error merging terms: %s", e)
+            QMessageBox.critical(self, "Database Error", f"Error merging terms: {e}")
+            return
+        self.remove_group(group_item)
+        self.merged.emit()
+
+    def skip_selected_group(self):
+        group_item = self.selected_group_item()
+        if group_item is not None:
+            self.remove_group(group_item)
+
+    def remove_group(self, group_item):
+        self.groups.remove(group_item.data(0, Qt.ItemDataRole.UserRole))
+        self.tree.takeTopLevelItem(self.tree.indexOfTopLevelItem(group_item))
+        self.update_status()
+
+    def merge_all_exact(self):
+        exact = [group for group in self.groups if group.exact]
+        if not exact:
+            return
+        reply = QMessageBox.question(self, "Merge Duplicates",
+                                     f"Merge {len(exact)} groups of exact duplicates, keeping the oldest term of each?\n\n"
+                                     "Modules will share the merged terms and their review progress. "
+                                     "Editing a shared term later gives that module its own copy.",
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                                     QMessageBox.StandardButton.No)
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        try:
+            for group in exact:
+                self.storage.merge_terms(group.term_ids[0], group.term_ids[1:])
+        except sqlite3.Error as e:
+            logging.error("Error merging terms: %s", e)
+            QMessageBox.critical(self, "Database Error", f"Error merging terms: {e}")
+        # Похожие группы могли ссылаться на удалённые термины - пересчитываем
+        self.merged.emit()
+        self.scan()
+
+    def closeEvent(self, event):
+        if self.scan_task is not None:
+            self.scan_task.cancelled = True
+        event.accept()
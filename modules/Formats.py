@@ -0,0 +1,330 @@
+import os
+import re
+import csv
+import json
+import html
+import time
+import random
+import shutil
+import sqlite3
+import hashlib
+import zipfile
+import tempfile
+from application.modules.AtomicFile import atomic_write
+
+# Потоковые читатели и писатели библиотеки: каждая запись - один термин вместе с данными его модуля.
+# Читатели и писатели работают с генераторами, поэтому память не зависит от размера файла.
+
+FIELDS = ['module', 'theme', 'term', 'definition', 'complexity', 'image_path']
+
+
+def make_record(module, theme, term, definition, complexity='Normal', image_path=''):
+    return {
+        'module': module,
+        'theme': theme or '',
+        'term': term,
+        'definition': definition,
+        'complexity': complexity or 'Normal',
+        'image_path': image_path or ''
+    }
+
+
+def iter_library_records(storage, module_ids=None):
+    # Модули берутся постранично, термины - порциями курсора
+    if module_ids is None:
+        modules = iter_all_modules(storage)
+    else:
+        modules = (storage.get_module(module_id) for module_id in module_ids)
+    for module in modules:
+        if module is None:
+            continue
+        for batch in storage.iter_module_terms(module['id']):
+            for term in batch:
+                yield make_record(module['name'], module['theme'], term['term'], term['definition'],
+                                  term['complexity'], term['image_path'])
+
+
+def iter_all_modules(storage, page_size=100):
+    last_id = 0
+    while True:
+        page = storage.list_modules_page(last_id, page_size)
+        if not page:
+            return
+        yield from page
+        last_id = page[-1]['id']
+
+
+# CSV / TSV
+
+def read_csv(path, delimiter=',', default_module=''):
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.DictReader(f, delimiter=delimiter)
+        for row in reader:
+            term = (row.get('term') or '').strip()
+            definition = (row.get('definition') or '').strip()
+            if not term or not definition:
+                continue
+            yield make_record(row.get('module') or default_module, row.get('theme'), term, definition,
+                              row.get('complexity'), row.get('image_path'))
+
+
+def write_csv(path, records, delimiter=','):
+    count = 0
+    with atomic_write(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS, delimiter=delimiter)
+        writer.writeheader()
+        for record in records:
+            writer.writerow(record)
+            count += 1
+    return count
+
+
+# JSONL
+
+def read_jsonl(path, default_module=''):
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            row = json.loads(line)
+            if not row.get('term') or not row.get('definition'):
+                continue
+            yield make_record(row.get('module') or default_module, row.get('theme'), row['term'], row['definition'],
+                              row.get('complexity'), row.get('image_path'))
+
+
+def write_jsonl(path, records):
+    count = 0
+    with atomic_write(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write('\n')
+            count += 1
+    return count
+
+
+# Anki .apkg (формат коллекции schema 11, который понимают все версии Anki)
+
+ANKI_SCHEMA = '''
+    CREATE TABLE col (id integer primary key, crt integer not null, mod integer not null, scm integer not null,
+        ver integer not null, dty integer not null, usn integer not null, ls integer not null, conf text not null,
+        models text not null, decks text not null, dconf text not null, tags text not null);
+    CREATE TABLE notes (id integer primary key, guid text not null, mid integer not null, mod integer not null,
+        usn integer not null, tags text not null, flds text not null, sfld integer not null, csum integer not null,
+        flags integer not null, data text not null);
+    CREATE TABLE cards (id integer primary key, nid integer not null, did integer not null, ord integer not null,
+        mod integer not null, usn integer not null, type integer not null, queue integer not null, due integer not null,
+        ivl integer not null, factor integer not null, reps integer not null, lapses integer not null,
+        left integer not null, odue integer not null, odid integer not null, flags integer not null,
+        data text not null);
+    CREATE TABLE revlog (id integer primary key, cid integer not null, usn integer not null, ease integer not null,
+        ivl integer not null, lastIvl integer not null, factor integer not null, time integer not null,
+        type integer not null);
+    CREATE TABLE graves (usn integer not null, oid integer not null, type integer not null);
+    CREATE INDEX ix_notes_usn on notes (usn);
+    CREATE INDEX ix_cards_usn on cards (usn);
+    CREATE INDEX ix_revlog_usn on revlog (usn);
+    CREATE INDEX ix_cards_nid on cards (nid);
+    CREATE INDEX ix_cards_sched on cards (did, queue, due);
+    CREATE INDEX ix_revlog_cid on revlog (cid);
+    CREATE INDEX ix_notes_csum on notes (csum);
+'''
+
+IMG_RE = re.compile(r'<img[^>]*src="([^"]+)"[^>]*>', re.IGNORECASE)
+BR_RE = re.compile(r'<br\s*/?>', re.IGNORECASE)
+TAG_RE = re.compile(r'<[^>]+>')
+
+
+def anki_model(model_id, now):
+    def field(name, ord_):
+        return {"name": name, "ord": ord_, "sticky": False, "rtl": False, "font": "Arial", "size": 20, "media": []}
+    return {
+        "id": model_id, "name": "Vocabify Basic", "type": 0, "mod": now, "usn": -1, "sortf": 0, "did": 1,
+        "tmpls": [{"name": "Card 1", "ord": 0, "qfmt": "{{Front}}",
+                   "afmt": "{{FrontSide}}<hr id=answer>{{Back}}", "did": None, "bqfmt": "", "bafmt": ""}],
+        "flds": [field("Front", 0), field("Back", 1)],
+        "css": ".card { font-family: arial; font-size: 20px; text-align: center; }",
+        "latexPre": "\\documentclass[12pt]{article}\n\\special{papersize=3in,5in}\n\\usepackage[utf8]{inputenc}\n"
+                    "\\usepackage{amssymb,amsmath}\n\\pagestyle{empty}\n\\setlength{\\parindent}{0in}\n"
+                    "\\begin{document}\n",
+        "latexPost": "\\end{document}", "latexsvg": False, "req": [[0, "any", [0]]], "tags": [], "vers": []
+    }
+
+
+def anki_deck(deck_id, name, now):
+    return {
+        "id": deck_id, "name": name, "mod": now, "usn": -1, "desc": "", "dyn": 0, "conf": 1, "collapsed": False,
+        "extendNew": 10, "extendRev": 50, "newToday": [0, 0], "revToday": [0, 0], "lrnToday": [0, 0],
+        "timeToday": [0, 0]
+    }
+
+
+ANKI_DECK_CONF = {
+    "1": {
+        "id": 1, "name": "Default", "mod": 0, "usn": 0, "maxTaken": 60, "autoplay": True, "timer": 0,
+        "replayq": True, "dyn": False,
+        "new": {"delays": [1, 10], "ints": [1, 4, 7], "initialFactor": 2500, "order": 1, "perDay": 20,
+                "bury": True, "separate": True},
+        "rev": {"perDay": 200, "ease4": 1.3, "fuzz": 0.05, "ivlFct": 1, "maxIvl": 36500, "bury": True,
+                "minSpace": 1},
+        "lapse": {"delays": [10], "mult": 0, "minInt": 1, "leechFails": 8, "leechAction": 0}
+    }
+}
+
+
+def field_to_html(text):
+    return html.escape(text).replace('\n', '<br>')
+
+
+def html_to_field(value):
+    return html.unescape(TAG_RE.sub('', BR_RE.sub('\n', value))).strip()
+
+
+def write_apkg(path, records, batch_size=1000):
+    now = int(time.time())
+    model_id = now * 1000
+    decks = {"1": anki_deck(1, "Default", now)}
+    deck_ids = {}
+    media = {}  # путь изображения -> имя файла внутри пакета
+    count = 0
+
+    fd, collection_path = tempfile.mkstemp(suffix='.anki2')
+    os.close(fd)
+    try:
+        collection = sqlite3.connect(collection_path)
+        collection.executescript(ANKI_SCHEMA)
+        with atomic_write(path, 'wb') as target, zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED) as package:
+            notes, cards = [], []
+            for record in records:
+                deck_name = record['module'] or "Vocabify"
+                deck_id = deck_ids.get(deck_name)
+                if deck_id is None:
+                    deck_id = deck_ids[deck_name] = model_id + len(deck_ids) + 1
+                    decks[str(deck_id)] = anki_deck(deck_id, deck_name, now)
+
+                back = field_to_html(record['definition'])
+                image_path = record['image_path']
+                if image_path and os.path.isfile(image_path):
+                    name = media.get(image_path)
+                    if name is None:
+                        name = media[image_path] = f"{len(media)}_{os.path.basename(image_path)}"
+                        package.write(image_path, str(len(media) - 1))
+                    back += f'<br><img src="{html.escape(name)}">'
+
+                count += 1
+                note_id = model_id + count
+                front = field_to_html(record['term'])
+                checksum = int(hashlib.sha1(record['term'].encode('utf-8')).hexdigest()[:8], 16)
+                guid = '%x' % random.getrandbits(64)
+                tags = f" {record['theme'].replace(' ', '_')} " if record['theme'] else ''
+                notes.append((note_id, guid, model_id, now, -1, tags, f"{front}\x1f{back}", front, checksum, 0, ''))
+                cards.append((note_id, note_id, deck_id, 0, now, -1, 0, 0, count, 0, 0, 0, 0, 0, 0, 0, 0, ''))
+                if len(notes) >= batch_size:
+                    _flush_anki_rows(collection, notes, cards)
+                    notes, cards = [], []
+            _flush_anki_rows(collection, notes, cards)
+
+            collection.execute('INSERT INTO col VALUES (1, ?, ?, ?, 11, 0, 0, 0, ?, ?, ?, ?, ?)', (
+                now, now * 1000, now * 1000, json.dumps({"nextPos": count + 1, "curModel": str(model_id)}),
+                json.dumps({str(model_id): anki_model(model_id, now)}), json.dumps(decks),
+                json.dumps(ANKI_DECK_CONF), json.dumps({})))
+            collection.commit()
+            collection.close()
+
+            package.write(collection_path, 'collection.anki2')
+            package.writestr('media', json.dumps({str(i): name for i, name in enumerate(media.values())}))
+    finally:
+        os.remove(collection_path)
+    return count
+
+
+def _flush_anki_rows(collection, notes, cards):
+    with collection:
+        collection.executemany('INSERT INTO notes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', notes)
+        collection.executemany('INSERT INTO cards VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', cards)
+
+
+def read_apkg(path, media_dir, default_module=''):
+    # Изображения из пакета распаковываются в media_dir по мере того, как на них ссылаются записи
+    with zipfile.ZipFile(path) as package:
+        names = package.namelist()
+        collection_name = next((name for name in ('collection.anki21', 'collection.anki2') if name in names), None)
+        if collection_name is None:
+            raise ValueError("Unsupported Anki package: no collection.anki2 or collection.anki21 inside")
+        media_map = json.loads(package.read('media')) if 'media' in names else {}
+        media_members = {name: member for member, name in media_map.items()}
+
+        fd, collection_path = tempfile.mkstemp(suffix='.anki2')
+        os.close(fd)
+        try:
+            with package.open(collection_name) as source, open(collection_path, 'wb') as target:
+                shutil.copyfileobj(source, target)
+            collection = sqlite3.connect(collection_path)
+            try:
+                decks = json.loads(collection.execute('SELECT decks FROM col').fetchone()[0])
+                deck_names = {int(deck_id): deck['name'] for deck_id, deck in decks.items()}
+                cursor = collection.execute('''
+                    SELECT n.flds, n.tags, c.did
+                    FROM notes n JOIN cards c ON c.nid = n.id AND c.ord = 0
+                    ORDER BY c.did, n.id
+                ''')
+                for fields, tags, deck_id in cursor:
+                    fields = fields.split('\x1f')
+                    if len(fields) < 2:
+                        continue
+                    images = IMG_RE.findall(fields[0] + fields[1])
+                    term, definition = html_to_field(fields[0]), html_to_field(fields[1])
+                    if not term or not definition:
+                        continue
+                    image_path = ''
+                    if images and images[0] in media_members:
+                        image_path = _extract_media(package, media_members[images[0]], images[0], media_dir)
+                    yield make_record(deck_names.get(deck_id) or default_module, tags.strip().split(' ')[0],
+                                      term, definition, 'Normal', image_path)
+            finally:
+                collection.close()
+        finally:
+            os.remove(collection_path)
+
+
+def _extract_media(package, member, name, media_dir):
+    os.makedirs(media_dir, exist_ok=True)
+    target = os.path.join(media_dir, os.path.basename(name))
+    if not os.path.exists(target):
+        with package.open(member) as source, open(target, 'wb') as f:
+            shutil.copyfileobj(source, f)
+    return target
+
+
+READERS = {
+    '.csv': lambda path, media_dir, default_module: read_csv(path, ',', default_module),
+    '.tsv': lambda path, media_dir, default_module: read_csv(path, '\t', default_module),
+    '.jsonl': lambda path, media_dir, default_module: read_jsonl(path, default_module),
+    '.apkg': lambda path, media_dir, default_module: read_apkg(path, media_dir, default_module),
+}
+
+WRITERS = {
+    '.csv': lambda path, records: write_csv(path, records, ','),
+    '.tsv': lambda path, records: write_csv(path, records, '\t'),
+    '.jsonl': write_jsonl,
+    '.apkg': write_apkg,
+}
+
+
+def format_of(path):
+    return os.path.splitext(path)[1].lower()
+
+
+def read_records(path, media_dir='images', default_module=''):
+    reader = READERS.get(format_of(path))
+    if reader is None:
+        raise ValueError(f"Unsupported import format: {path}")
+    return reader(path, media_dir, default_module)
+
+
+def write_records(path, records):
+    writer = WRITERS.get(format_of(path))
+    if writer is None:
+        raise ValueError(f"Unsupported export format: {path}")
+    return writer(path, records)
@@ -0,0 +1,203 @@
+import os
+import hashlib
+import threading
+import logging
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QSize, Qt, pyqtSignal
+from PyQt6.QtGui import QImage, QImageReader, QPixmap, QPixmapCache
+from application.modules.Database import DB_PATH
+from application.modules.Instrumentation import span
+
+THUMBNAILS_DIR = 'thumbnails'  # рядом с базой, как и хранилище изображений
+THUMBNAIL_SIZE = QSize(1024, 768)
+THUMBNAILS_MAX_BYTES = 256 * 1024 * 1024
+EVICT_TO = 0.75  # доля лимита после очистки: запас, чтобы не сканировать папку на каждой записи
+PIXMAP_CACHE_KB = 64 * 1024
+
+
+def cache_key(image_path):
+    # Ключ меняется вместе с файлом: путь + время изменения + размер
+    try:
+        stat = os.stat(image_path)
+    except OSError:
+        return None
+    raw = f"{os.path.abspath(image_path)}|{stat.st_mtime_ns}|{stat.st_size}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+class ThumbnailCache:
+    # Уменьшенные копии на диске. Время изменения файла отмечает последнее использование,
+    # сверх max_bytes удаляются давно не использованные
+    def __init__(self, directory, max_bytes=THUMBNAILS_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.total = None  # размер папки, считается при первой записи
+
+    def path(self, key):
+        return os.path.join(self.directory, key + '.png')
+
+    def read(self, key):
+        path = self.path(key)
+        image = QImage(path) if os.path.exists(path) else QImage()
+        if not image.isNull():
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        return image
+
+    def write(self, key, image):
+        # Пишем во временный файл и переименовываем, чтобы другой поток или следующий запуск
+        # не прочитал недописанную миниатюру
+        path = self.path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            if not image.save(temp_path, 'PNG'):
+                logging.error("Error saving thumbnail %s", path)
+                return
+            os.replace(temp_path, path)
+            size = os.path.getsize(path)
+        except OSError as e:
+            logging.error("Error saving thumbnail %s: %s", path, e)
+            return
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        with self.lock:
+            if self.total is None:
+                self.total = sum(size for _, _, size in self.entries())
+            else:
+                self.total += size
+            if self.total > self.max_bytes:
+                self.evict()
+
+    def entries(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.png'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, entry.path, stat.st_size))
+        return entries
+
+    def evict(self):
+        entries = sorted(self.entries())
+        total = sum(size for _, _, size in entries)
+        for _, path, size in entries:
+            if total <= self.max_bytes * EVICT_TO:
+                break
+            try:
+                os.remove(path)
+            except OSError as e:
+                logging.error("Error removing thumbnail %s: %s", path, e)
+                continue
+            total -= size
+        logging.debug("Thumbnail cache trimmed to %d bytes", total)
+        self.total = total
+
+
+class ImageSignals(QObject):
+    loaded = pyqtSignal(str, str, QImage)  # путь, ключ кэша, изображение (пустое, если не декодируется)
+
+
+class ImageTask(QRunnable):
+    def __init__(self, image_path, key, signals, thumbnails=None):
+        super().__init__()
+        self.image_path = image_path
+        self.key = key
+        self.signals = signals
+        self.thumbnails = thumbnails
+
+    def run(self):
+        with span('image.thumbnail_read'):
+            image = self.thumbnails.read(self.key)
+        if image.isNull():
+            with span('image.decode', path=self.image_path):
+                image = self.decode()
+            if not image.isNull():
+                with span('image.thumbnail_write'):
+                    self.thumbnails.write(self.key, image)
+        self.signals.loaded.emit(self.image_path, self.key, image)
+
+    def decode(self):
+        # QImageReader декодирует сразу в уменьшенном размере, не создавая полноразмерную копию
+        reader = QImageReader(self.image_path)
+        reader.setAutoTransform(True)
+        size = reader.size()
+        if size.isValid() and (size.width() > THUMBNAIL_SIZE.width() or size.height() > THUMBNAIL_SIZE.height()):
+            reader.setScaledSize(size.scaled(THUMBNAIL_SIZE, Qt.AspectRatioMode.KeepAspectRatio))
+        image = reader.read()
+        if image.isNull():
+            logging.error("Error decoding image %s: %s", self.image_path, reader.errorString())
+        return image
+
+
+class ImageLoader(QObject):
+    # Декодирование и уменьшение изображений в фоне; готовые QPixmap хранятся в QPixmapCache
+    image_ready = pyqtSignal(str, QPixmap)
+    image_failed = pyqtSignal(str)  # файла нет или он не декодируется
+
+    _instance = None
+
+    @classmethod
+    def instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, parent=None, db_path=DB_PATH):
+        super().__init__(parent)
+        QPixmapCache.setCacheLimit(PIXMAP_CACHE_KB)
+        self.thumbnails = ThumbnailCache(os.path.join(os.path.dirname(os.path.abspath(db_path)), THUMBNAILS_DIR))
+        self.pending = {}  # ключ кэша -> задача в очереди пула
+        self.signals = ImageSignals()
+        self.signals.loaded.connect(self.on_loaded)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max(1, min(4, QThreadPool.globalInstance().maxThreadCount() - 1)))
+
+    def cached(self, image_path):
+        key = cache_key(image_path)
+        if key is None:
+            return None
+        pixmap = QPixmapCache.find(key)
+        return pixmap if pixmap is not None and not pixmap.isNull() else None
+
+    def request(self, image_path):
+        key = cache_key(image_path)
+        if key is None:
+            logging.error("Image not found: %s", image_path)
+            self.image_failed.emit(image_path)
+            return
+        if key in self.pending:
+            return
+        pixmap = QPixmapCache.find(key)
+        if pixmap is not None and not pixmap.isNull():
+            self.image_ready.emit(image_path, pixmap)
+            return
+        task = ImageTask(image_path, key, self.signals, self.thumbnails)
+        task.setAutoDelete(False)
+        self.pending[key] = task
+        self.pool.start(task)
+
+    def forget(self, image_path):
+        # Снимаем ещё не начатое декодирование и освобождаем готовый QPixmap
+        key = cache_key(image_path)
+        if key is None:
+            return
+        task = self.pending.get(key)
+        if task is not None and self.pool.tryTake(task):
+            del self.pending[key]
+        QPixmapCache.remove(key)
+
+    def on_loaded(self, image_path, key, image):
+        self.pending.pop(key, None)
+        if image.isNull():
+            self.image_failed.emit(image_path)
+            return
+        # QPixmap можно создавать только в потоке интерфейса
+        pixmap = QPixmap.fromImage(image)
+        QPixmapCache.insert(key, pixmap)
+        self.image_ready.emit(image_path, pixmap)
@@ -0,0 +1,178 @@
+import os
+import logging
+from application.modules.Storage import Storage
+from application.modules.Instrumentation import timed
+
+CHUNK_SIZE = 1 << 20  # 1 МБ текста за одно чтение
+BATCH_SIZE = 5000  # терминов в одной транзакции
+MAX_ERRORS = 1000  # сколько нераспознанных карточек возвращать для показа
+MAX_CARD_LENGTH = 4 << 20  # символов; длиннее - почти наверняка выбран не тот разделитель карточек
+ERROR_PREVIEW_LENGTH = 200  # символов слишком длинной карточки в списке ошибок
+
+
+def iter_cards(stream, term_separator, card_separator, chunk_size=CHUNK_SIZE, max_card_length=MAX_CARD_LENGTH):
+    # Читает поток порциями и отдаёт (term, definition, None) или (None, None, card) для ошибок.
+    # Хвост порции без разделителя переносится в следующую, поэтому карточка не рвётся на границе чтения.
+    # Порции без разделителя только копятся, а делится хвост вместе с новой порцией - каждый символ
+    # просматривается постоянное число раз, даже если разделитель встречается редко.
+    tail, tail_length, oversized = [], 0, False
+    edge = ''  # конец хвоста, в котором может начинаться разделитель
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        if card_separator not in edge + chunk:
+            edge = (edge + chunk)[1 - len(card_separator):] if len(card_separator) > 1 else ''
+            tail.append(chunk)
+            tail_length += len(chunk)
+            if tail_length > max_card_length:
+                if not oversized:
+                    yield None, None, (f"{''.join(tail)[:ERROR_PREVIEW_LENGTH]}... "
+                                       f"(card longer than {max_card_length} characters)")
+                    oversized = True
+                # Карточка уже отброшена, для поиска разделителя на стыке хватает края
+                tail = [edge]
+                tail_length = len(edge)
+            continue
+        cards = (''.join(tail) + chunk).split(card_separator)
+        tail = [cards.pop()]
+        tail_length = len(tail[0])
+        edge = tail[0][1 - len(card_separator):] if len(card_separator) > 1 else ''
+        if oversized:
+            cards.pop(0)  # конец слишком длинной карточки
+            oversized = False
+        for card in cards:
+            parsed = parse_card(card, term_separator)
+            if parsed is not None:
+                yield parsed
+    if not oversized:
+        parsed = parse_card(''.join(tail), term_separator)
+        if parsed is not None:
+            yield parsed
+
+
+def parse_card(card, term_separator):
+    card = card.strip()
+    if not card:
+        return None
+    parts = card.split(term_separator, 1)
+    if len(parts) == 2:
+        term, definition = parts[0].strip(), parts[1].strip()
+        if term and definition:
+            return term, definition, None
+    return None, None, card
+
+
+class ImportResult:
+    def __init__(self):
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        self.cancelled = False
+        self.duplicates = 0  # импортированные термины, которые уже были в библиотеке
+
+
+def append_batch(storage, module_id, batch, result, on_batch=None):
+    if on_batch is not None:
+        # Пачка уходит в редактор модуля и попадёт в базу только при сохранении
+        on_batch(batch)
+        result.imported += len(batch)
+        return
+    term_ids = storage.append_terms(module_id, batch)
+    result.imported += len(term_ids)
+    result.duplicates += storage.count_duplicates(term_ids)
+
+
+@timed('import.file')
+def import_file(file_path, module_id, term_separator, card_separator, storage=None,
+                progress=None, is_cancelled=None, batch_size=BATCH_SIZE, on_batch=None):
+    # Потоковый импорт: в памяти только текущая порция файла и одна пачка терминов.
+    # С on_batch пачки передаются ему, а не пишутся в модуль module_id.
+    storage = storage or Storage()
+    result = ImportResult()
+    total_size = max(os.path.getsize(file_path), 1)
+    batch = []
+
+    with open(file_path, 'r', encoding='utf-8') as stream:
+        for term, definition, error in iter_cards(stream, term_separator, card_separator):
+            if error is not None:
+                result.failed += 1
+                if len(result.errors) < MAX_ERRORS:
+                    result.errors.append(error)
+                continue
+            batch.append({
+                "id": None,
+                "term": term,
+                "definition": definition,
+                "complexity": "Normal",
+                "image_path": ""
+            })
+            if len(batch) >= batch_size:
+                append_batch(storage, module_id, batch, result, on_batch)
+                batch = []
+                if progress is not None:
+                    progress(min(stream.buffer.tell(), total_size), total_size)
+                if is_cancelled is not None and is_cancelled():
+                    result.cancelled = True
+                    break
+
+    if batch and not result.cancelled:
+        append_batch(storage, module_id, batch, result, on_batch)
+    if progress is not None and not result.cancelled:
+        progress(total_size, total_size)
+    logging.info("Imported %d terms into module %s from %s (%d failed, %d duplicates)",
+                 result.imported, module_id, file_path, result.failed, result.duplicates)
+    return result
+
+
+@timed('import.records')
+def import_records(records, storage=None, module_id=None, theme='', media=None, link_media=False,
+                   is_cancelled=None, batch_size=BATCH_SIZE, on_batch=None):
+    # Записи из Formats: если module_id не задан, модули создаются по имени в порядке появления.
+    # Если передан media (MediaStore), изображения переносятся в хранилище до записи в базу.
+    # С on_batch все записи передаются ему пачками, модули не создаются.
+    # Возвращает результат импорта и словарь "имя модуля -> id".
+    storage = storage or Storage()
+    result = ImportResult()
+    module_ids = {}
+    batch = []
+    batch_module = module_id
+
+    for record in records:
+        target = module_id
+        if target is None and on_batch is None:
+            target = module_ids.get(record['module'])
+            if target is None:
+                target = storage.save_module(None, record['module'], '', record['theme'] or theme, [])
+                module_ids[record['module']] = target
+        if batch and target != batch_module:
+            store_media(media, batch, link_media)
+            append_batch(storage, batch_module, batch, result, on_batch)
+            batch = []
+        batch_module = target
+        batch.append({
+            "id": None,
+            "term": record['term'],
+            "definition": record['definition'],
+            "complexity": record['complexity'],
+            "image_path": record['image_path']
+        })
+        if len(batch) >= batch_size:
+            store_media(media, batch, link_media)
+            append_batch(storage, batch_module, batch, result, on_batch)
+            batch = []
+            if is_cancelled is not None and is_cancelled():
+                result.cancelled = True
+                break
+
+    if batch and not result.cancelled:
+        store_media(media, batch, link_media)
+        append_batch(storage, batch_module, batch, result, on_batch)
+    logging.info("Imported %d terms (%d new modules, %d duplicates)", result.imported, len(module_ids),
+                 result.duplicates)
+    return result, module_ids
+
+
+def store_media(media, batch, link):
+    if media is not None:
+        media.add_all(batch, link)
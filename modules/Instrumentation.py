@@ -0,0 +1,110 @@
+import os
+import json
+import time
+import atexit
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from application.modules.AtomicFile import atomic_write
+
+# Лёгкие замеры времени: span() вокруг запросов к базе, декодирования изображений, перестроения
+# списка модулей и сохранения. Без включённой трассировки и DEBUG-логирования span стоит
+# два вызова perf_counter_ns.
+#
+# VOCABIFY_TRACE=путь.json - записать трассировку в формате Chrome (chrome://tracing, Perfetto) при выходе
+# VOCABIFY_OVERLAY=1 - показать окно с последними замерами (см. TimingOverlay)
+
+TRACE_ENV = 'VOCABIFY_TRACE'
+OVERLAY_ENV = 'VOCABIFY_OVERLAY'
+MAX_TRACE_EVENTS = 200000
+
+logger = logging.getLogger('vocabify.perf')
+
+_trace = None  # deque событий трассировки, пока она включена
+_listeners = []  # функции (name, ms), например окно с замерами
+_lock = threading.Lock()
+_origin_ns = time.perf_counter_ns()
+
+
+@contextmanager
+def span(name, **args):
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        record(name, start, time.perf_counter_ns() - start, args)
+
+
+def timed(name):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record(name, start_ns, duration_ns, args=None):
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("%s took %.2f ms", name, duration_ns / 1e6)
+    if _trace is not None:
+        _trace.append({
+            'name': name,
+            'ph': 'X',
+            'ts': (start_ns - _origin_ns) / 1000,
+            'dur': duration_ns / 1000,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': args or {},
+        })
+    for listener in tuple(_listeners):
+        listener(name, duration_ns / 1e6)
+
+
+def add_listener(listener):
+    with _lock:
+        _listeners.append(listener)
+
+
+def remove_listener(listener):
+    with _lock:
+        if listener in _listeners:
+            _listeners.remove(listener)
+
+
+def start_trace(max_events=MAX_TRACE_EVENTS):
+    # Старые события вытесняются, поэтому долгая сессия не съест память
+    global _trace
+    _trace = deque(maxlen=max_events)
+
+
+def tracing():
+    return _trace is not None
+
+
+def stop_trace():
+    global _trace
+    events, _trace = _trace, None
+    return list(events or [])
+
+
+def write_trace(path, events=None):
+    events = list(_trace or []) if events is None else events
+    thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+    metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid,
+                 'args': {'name': thread_names.get(tid, f'thread {tid}')}}
+                for tid in {event['tid'] for event in events}]
+    with atomic_write(path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}, f)
+    logger.info("Wrote %d trace events to %s", len(events), path)
+
+
+def configure_from_environment():
+    path = os.environ.get(TRACE_ENV)
+    if path:
+        start_trace()
+        atexit.register(lambda: write_trace(path, stop_trace()))
+    return os.environ.get(OVERLAY_ENV) == '1'
@@ -0,0 +1,130 @@
+import sqlite3
+import logging
+from PyQt6.QtWidgets import QListWidget, QListWidgetItem
+from PyQt6.QtCore import Qt, QObject, QRunnable, QThreadPool, QTimer, QPoint, pyqtSignal
+from application.modules.Storage import Storage
+
+MODULE_RESULT = 'module'
+TERM_RESULT = 'term'
+
+
+class SearchSignals(QObject):
+    results = pyqtSignal(int, list)  # поколение запроса, порция результатов
+
+
+class SearchTask(QRunnable):
+    def __init__(self, search, generation, query, max_results):
+        super().__init__()
+        self.search = search
+        self.generation = generation
+        self.query = query
+        self.max_results = max_results
+        self.signals = search.signals
+
+    def is_stale(self):
+        return self.search.generation != self.generation
+
+    def run(self):
+        storage = Storage()
+        conn = storage.conn
+        # SQLite периодически вызывает обработчик и прерывает запрос, если пользователь уже ввёл новый текст
+        conn.set_progress_handler(self.is_stale, 1000)
+        try:
+            modules = storage.search_modules(self.query, columns=('name',), limit=5)
+            if self.is_stale():
+                return
+            if modules:
+                self.signals.results.emit(self.generation, [
+                    (MODULE_RESULT, module_id, name, None) for module_id, name, theme, length in modules])
+
+            # Одним запросом: каждая страница заново ранжировала бы все совпадения
+            terms = storage.search_terms(self.query, limit=self.max_results)
+            if self.is_stale():
+                return
+            if terms:
+                self.signals.results.emit(self.generation, [
+                    (TERM_RESULT, module_id, f"{term}: {definition}", module_name)
+                    for term_id, term, definition, module_id, module_name in terms])
+        except sqlite3.OperationalError as e:
+            if not self.is_stale():
+                logging.error("Search failed: %s", e)
+        finally:
+            conn.set_progress_handler(None, 0)
+
+
+class LiveSearch(QObject):
+    # Поиск по мере ввода: ввод откладывается на debounce_ms, запрос выполняется в пуле потоков
+    def __init__(self, line_edit, on_module_selected, debounce_ms=250, max_results=100):
+        super().__init__(line_edit)
+        self.line_edit = line_edit
+        self.on_module_selected = on_module_selected
+        self.max_results = max_results
+        self.generation = 0
+        self.signals = SearchSignals()
+        self.signals.results.connect(self.add_results)
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(2)
+        self.pool.setExpiryTimeout(-1)  # потоки и их соединения с базой живут всё время работы окна
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(debounce_ms)
+        self.timer.timeout.connect(self.start_search)
+
+        self.popup = SearchPopup(self.line_edit)
+        self.popup.itemActivated.connect(self.select_item)
+        self.popup.itemClicked.connect(self.select_item)
+
+        self.line_edit.textEdited.connect(self.schedule_search)
+
+    def schedule_search(self):
+        # Новый ввод сразу делает устаревшими все запущенные запросы
+        self.generation += 1
+        self.timer.start()
+
+    def start_search(self):
+        query = self.line_edit.text().strip()
+        self.popup.clear()
+        if not query:
+            self.popup.hide()
+            return
+        self.pool.start(SearchTask(self, self.generation, query, self.max_results))
+
+    def cancel(self):
+        self.generation += 1
+        self.timer.stop()
+        self.popup.hide()
+
+    def add_results(self, generation, results):
+        if generation != self.generation:
+            return
+        for kind, module_id, text, module_name in results:
+            if kind == MODULE_RESULT:
+                item = QListWidgetItem(f"Module: {text}")
+            else:
+                item = QListWidgetItem(f"{text} ({module_name})")
+            item.setData(Qt.ItemDataRole.UserRole, module_id)
+            self.popup.addItem(item)
+        self.popup.show_below(self.line_edit)
+
+    def select_item(self, item):
+        module_id = item.data(Qt.ItemDataRole.UserRole)
+        self.cancel()
+        self.on_module_selected(module_id)
+
+
+class SearchPopup(QListWidget):
+    def __init__(self, parent):
+        super().__init__(parent)
+        # ToolTip не забирает фокус у поля ввода, в отличие от Popup
+        self.setWindowFlags(Qt.WindowType.ToolTip)
+        self.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.setMouseTracking(True)
+
+    def show_below(self, widget):
+        width = max(widget.width(), 350)
+        height = min(self.sizeHintForRow(0) * self.count() + 2 * self.frameWidth(), 300)
+        self.setGeometry(widget.mapToGlobal(QPoint(widget.width() - width, widget.height())).x(),
+                         widget.mapToGlobal(QPoint(0, widget.height())).y(), width, height)
+        self.show()
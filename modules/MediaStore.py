@@ -0,0 +1,208 @@
+import os
+import time
+import shutil
+import hashlib
+import logging
+import threading
+from application.modules.AtomicFile import fsync_file, fsync_directory
+from application.modules.Database import DB_PATH, get_connection, transaction
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+MEDIA_DIR = 'media'
+LEGACY_IMAGES_DIR = 'images'
+READ_SIZE = 1 << 20
+FICLONE = 0x40049409  # ioctl копирования без дублирования блоков (btrfs, xfs)
+GC_GRACE_SECONDS = 3600  # свежие файлы могут принадлежать ещё не сохранённому модулю
+OWNER_FILE = '.library'  # имя базы, которой принадлежит хранилище
+
+
+class MediaOwnerError(Exception):
+    pass
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(READ_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def media_path(digest, extension):
+    # Путь хранится в базе через '/', чтобы триггеры узнавали его на любой платформе
+    return f"{MEDIA_DIR}/{digest[:2]}/{digest}{extension.lower()}"
+
+
+def is_stored(image_path):
+    return image_path.replace('\\', '/').startswith(MEDIA_DIR + '/')
+
+
+class MediaStore:
+    # Изображения хранятся по хэшу содержимого: одинаковые файлы лежат на диске один раз.
+    # Число ссылок ведёт таблица media, её обновляют триггеры на terms.
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        # Пути в базе относительны папке базы, как и modules.json при переносе, а не текущему каталогу
+        self.root = os.path.dirname(os.path.abspath(path))
+        self.marked = False
+
+    @property
+    def conn(self):
+        return get_connection(self.path)
+
+    def resolve(self, image_path):
+        return os.path.join(self.root, image_path)
+
+    def owner(self):
+        try:
+            with open(self.resolve(os.path.join(MEDIA_DIR, OWNER_FILE)), encoding='utf-8') as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return None
+
+    def mark_owner(self):
+        # Рядом могут лежать несколько баз; сборщик мусора чистит хранилище только своей
+        if self.marked:
+            return
+        os.makedirs(self.resolve(MEDIA_DIR), exist_ok=True)
+        try:
+            with open(self.resolve(os.path.join(MEDIA_DIR, OWNER_FILE)), 'x', encoding='utf-8') as f:
+                f.write(os.path.basename(self.path))
+        except FileExistsError:
+            pass
+        self.marked = True
+
+    def add(self, source_path, link=False):
+        # link=True разрешает жёсткую ссылку: только для файлов, которыми владеет само приложение,
+        # иначе правка исходного файла изменила бы и копию в хранилище
+        if is_stored(source_path) and os.path.exists(self.resolve(source_path)):
+            return source_path.replace('\\', '/')
+        digest = file_digest(source_path)
+        stored_path = media_path(digest, os.path.splitext(source_path)[1])
+        target_path = self.resolve(stored_path)
+        if not os.path.exists(target_path):
+            self.mark_owner()
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            # Один и тот же файл могут одновременно сохранять импорт и сохранение модуля в соседних потоках
+            temp_path = f"{target_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                self._clone(source_path, temp_path, link)
+                # Файл должен лечь на диск раньше, чем база сошлётся на него
+                fsync_file(temp_path)
+                os.replace(temp_path, target_path)
+                fsync_directory(os.path.dirname(target_path))
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+            logging.debug("Stored image %s as %s", source_path, stored_path)
+        return stored_path
+
+    @staticmethod
+    def _clone(source_path, target_path, link):
+        if link:
+            try:
+                os.link(source_path, target_path)
+                return
+            except OSError:
+                pass
+        if fcntl is not None:
+            try:
+                with open(source_path, 'rb') as source, open(target_path, 'wb') as target:
+                    fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+                return
+            except OSError:
+                pass
+        shutil.copyfile(source_path, target_path)
+
+    def add_all(self, terms, link=False):
+        # Заменяет image_path у терминов на путь в хранилище; недоступные файлы оставляет как есть
+        for term in terms:
+            if term['image_path'] and not is_stored(term['image_path']):
+                try:
+                    term['image_path'] = self.add(term['image_path'], link)
+                except OSError as e:
+                    logging.error("Error storing image %s: %s", term['image_path'], e)
+        return terms
+
+    def adopt_legacy_images(self, batch_size=1000):
+        # Переносит копии images/<term_id>.<ext> из старых версий в хранилище; одинаковые файлы схлопываются
+        conn = self.conn
+        rows = conn.execute(
+            "SELECT id, image_path FROM terms WHERE image_path != '' AND image_path NOT LIKE 'media/%'").fetchall()
+        updates = []
+        for term_id, image_path in rows:
+            if (os.path.normpath(os.path.dirname(image_path)) != LEGACY_IMAGES_DIR
+                    or not os.path.exists(self.resolve(image_path))):
+                continue
+            try:
+                updates.append((self.add(self.resolve(image_path), link=True), term_id))
+            except OSError as e:
+                logging.error("Error storing image %s: %s", image_path, e)
+        for start in range(0, len(updates), batch_size):
+            with transaction(conn):
+                conn.executemany('UPDATE terms SET image_path = ? WHERE id = ?', updates[start:start + batch_size])
+        return len(updates)
+
+    def collect_garbage(self, grace_seconds=GC_GRACE_SECONDS):
+        # Удаляет файлы хранилища без ссылок и старые копии images/<term_id>.<ext>, на которые не ссылается ни один термин
+        conn = self.conn
+        with transaction(conn):
+            conn.execute('DELETE FROM media WHERE refs <= 0')
+        referenced = {path for (path,) in conn.execute('SELECT path FROM media')}
+        referenced.update(os.path.normpath(path) for (path,) in conn.execute(
+            "SELECT DISTINCT image_path FROM terms WHERE image_path != '' AND image_path NOT LIKE 'media/%'"))
+        self.check_owner(referenced)
+
+        cutoff = time.time() - grace_seconds
+        removed, freed = 0, 0
+        for root in (MEDIA_DIR, LEGACY_IMAGES_DIR):
+            for directory, _, files in os.walk(self.resolve(root)):
+                for name in files:
+                    file_path = os.path.join(directory, name)
+                    relative_path = os.path.relpath(file_path, self.root)
+                    key = relative_path.replace(os.sep, '/') if root == MEDIA_DIR else os.path.normpath(relative_path)
+                    if key in referenced or name == OWNER_FILE:
+                        continue
+                    try:
+                        stat = os.stat(file_path)
+                        # ctime меняется и при создании жёсткой ссылки на старый файл
+                        if max(stat.st_mtime, stat.st_ctime) > cutoff:
+                            continue
+                        os.remove(file_path)
+                    except OSError as e:
+                        logging.error("Error removing orphaned image %s: %s", file_path, e)
+                        continue
+                    removed += 1
+                    freed += stat.st_size
+        logging.info("Media garbage collection removed %d files (%d bytes)", removed, freed)
+        return removed, freed
+
+    def check_owner(self, referenced):
+        # Удалять можно только файлы хранилища этой базы: чужая библиотека в той же папке потеряла бы изображения
+        owner = self.owner()
+        name = os.path.basename(self.path)
+        if owner is None:
+            # Хранилище из прежних версий без отметки принимается, если база ссылается хотя бы на один его файл
+            has_files = any(files for root in (MEDIA_DIR, LEGACY_IMAGES_DIR)
+                            for _, _, files in os.walk(self.resolve(root)))
+            if has_files and not any(os.path.exists(self.resolve(path)) for path in referenced):
+                raise MediaOwnerError(f"{self.resolve(MEDIA_DIR)} does not belong to {name}: "
+                                      f"none of its files are referenced by this database")
+            self.mark_owner()
+        elif owner != name:
+            raise MediaOwnerError(f"{self.resolve(MEDIA_DIR)} belongs to {owner}, not {name}")
+
+    def stats(self):
+        files, size = 0, 0
+        for directory, _, names in os.walk(self.resolve(MEDIA_DIR)):
+            for name in names:
+                if name == OWNER_FILE:
+                    continue
+                files += 1
+                size += os.path.getsize(os.path.join(directory, name))
+        references = self.conn.execute('SELECT COALESCE(SUM(refs), 0) FROM media').fetchone()[0]
+        return files, size, references
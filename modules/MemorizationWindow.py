@@ -1,25 +1,58 @@
 import sys
+import random
 import sqlite3
 import logging
-import json
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QComboBox, QListWidget,
     QListWidgetItem, QMessageBox, QInputDialog, QFileDialog, QGroupBox, QGridLayout, QFormLayout, QDialog,
     QVBoxLayout, QGraphicsView, QGraphicsScene, QScrollArea, QGraphicsPixmapItem, QLineEdit, QRadioButton,
     QButtonGroup, QTextEdit, QCheckBox, QSpinBox
 )
-from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer
 from PyQt6.QtGui import QIcon, QPixmap, QFont
+from application.modules.Storage import Storage
+from application.modules.Scheduler import GRADE_NAMES, schedule
+from application.modules.ImageLoader import ImageLoader
+from application.modules.TermStore import StudyTerm, StudyTerms
+from application.modules.StudySession import sample_terms
+from application.modules.AnswerChecker import CORRECT, RESULT_NAMES, check_answer, choose_distractors, prepare_candidates
+from application.modules.Instrumentation import span, timed
 
-# Настройка логгера
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+CARDS_MODE, QUIZ_MODE, TYPING_MODE = range(3)
+MODE_NAMES = ["Cards", "Quiz", "Typing"]
+CHOICES = 4  # вариантов ответа в тесте
+DISTRACTOR_POOL_SIZE = 200  # случайных определений модуля, из которых выбираются неверные варианты
 
 
 class MemorizationWindow(QMainWindow):
-    def __init__(self, module_id, parent=None):
+    def __init__(self, module_id=None, parent=None, review=False, session=None):
         super().__init__()
         self.module_id = module_id
         self.parent = parent
+        self.review = review  # Режим повторения: карточки, которые пора повторить, из всех модулей
+        self.session = session  # StudySession: несколько модулей, тема или сохранённый поиск
+        self.review_batch_size = 50
+        self.review_states = {}
+        # Оценки копятся и пишутся в базу пачкой: по таймеру, при заполнении буфера и при закрытии окна.
+        # Повторная оценка той же карточки заменяет предыдущую в буфере.
+        self.pending_reviews = {}
+        self.review_flush_size = 20
+        self.review_flush_timer = QTimer(self)
+        self.review_flush_timer.setSingleShot(True)
+        self.review_flush_timer.setInterval(2000)
+        self.review_flush_timer.timeout.connect(self.flush_reviews)
+        self.storage = Storage()
+        self.image_loader = ImageLoader.instance()
+        self.image_loader.image_ready.connect(self.on_image_ready)
+        self.image_loader.image_failed.connect(self.on_image_failed)
+        self.prefetch_ahead = 3  # сколько карточек прогревать в направлении движения
+        self.prefetch_behind = 1
+        self.direction = 1
+        self.prefetched = set()
+        self.mode = CARDS_MODE
+        self.distractor_pools = {}  # module_id -> определения для неверных вариантов
+        self.answer_term_id = None  # карточка, для которой показаны варианты или поле ответа
+        self.choices = []
         self.terms = self.load_terms()
         self.current_term_index = 0
         self.show_back = False  # Флаг для отображения обратной стороны карточки
@@ -57,6 +90,36 @@ class MemorizationWindow(QMainWindow):
 
         self.layout.addWidget(self.content_group)
 
+        # Quiz: варианты ответа
+        self.quiz_group = QGroupBox("Choose the definition")
+        self.quiz_layout = QVBoxLayout()
+        self.quiz_group.setLayout(self.quiz_layout)
+        self.choice_buttons = []
+        for choice in range(CHOICES):
+            button = QPushButton()
+            button.clicked.connect(lambda checked, choice=choice: self.choose_answer(choice))
+            self.quiz_layout.addWidget(button)
+            self.choice_buttons.append(button)
+        self.quiz_group.setVisible(False)
+        self.layout.addWidget(self.quiz_group)
+
+        # Typing: ввод термина по определению
+        self.typing_group = QGroupBox("Type the term")
+        self.typing_layout = QHBoxLayout()
+        self.typing_group.setLayout(self.typing_layout)
+        self.answer_input = QLineEdit()
+        self.answer_input.returnPressed.connect(self.check_typed_answer)
+        self.typing_layout.addWidget(self.answer_input)
+        self.check_button = QPushButton("Check")
+        self.check_button.clicked.connect(self.check_typed_answer)
+        self.typing_layout.addWidget(self.check_button)
+        self.typing_group.setVisible(False)
+        self.layout.addWidget(self.typing_group)
+
+        self.answer_label = QLabel()
+        self.answer_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.layout.addWidget(self.answer_label)
+
         # Navigation buttons
         self.nav_group = QGroupBox()
         self.nav_layout = QHBoxLayout()
@@ -74,69 +137,306 @@ class MemorizationWindow(QMainWindow):
         self.flip_button.clicked.connect(self.flip_card)
         self.nav_layout.addWidget(self.flip_button)
 
+        self.mode_combo = QComboBox()
+        self.mode_combo.addItems(MODE_NAMES)
+        self.mode_combo.currentIndexChanged.connect(self.set_mode)
+        self.nav_layout.addWidget(self.mode_combo)
+
         self.layout.addWidget(self.nav_group)
 
+        # Review grades
+        self.grade_group = QGroupBox("How well did you remember?")
+        self.grade_layout = QHBoxLayout()
+        self.grade_group.setLayout(self.grade_layout)
+        self.grade_buttons = []
+        for grade, name in enumerate(GRADE_NAMES):
+            button = QPushButton(name)
+            button.clicked.connect(lambda checked, grade=grade: self.grade_card(grade))
+            self.grade_layout.addWidget(button)
+            self.grade_buttons.append(button)
+        self.grade_group.setVisible(self.review)
+        self.layout.addWidget(self.grade_group)
+
+        if self.review:
+            self.setWindowTitle("Review Due Cards")
+        elif self.session is not None:
+            self.setWindowTitle(f"Study: {self.session.title}")
+
         # Initialize with the first term
         self.show_term()
 
     def load_terms(self):
         try:
-            with open('modules.json', 'r') as f:
-                modules = json.load(f)
-                term_ids = modules[str(self.module_id)]['term_ids']
-
-            conn = sqlite3.connect('vocabify.db')
-            cursor = conn.cursor()
-            cursor.execute('SELECT term, definition, image_path FROM terms WHERE id IN ({})'.format(','.join('?' for _ in term_ids)), term_ids)
-            terms = cursor.fetchall()
-            conn.close()
-            logging.info(f"Loaded {len(terms)} terms for module ID {self.module_id}")
+            if self.review:
+                return self.load_due_terms()
+            if self.session is not None:
+                terms = self.session.load(self.storage)
+                logging.info("Started study session %r with %d terms", self.session.title, len(terms))
+                return terms
+            # Тексты карточек читаются из базы по мере пролистывания, см. StudyTerms
+            terms = StudyTerms.for_module(self.storage, self.module_id)
+            logging.info("Loaded %d terms for module ID %s", len(terms), self.module_id)
             return terms
-        except (sqlite3.Error, json.JSONDecodeError) as e:
-            logging.error(f"Error loading terms from database or JSON file: {e}")
+        except sqlite3.Error as e:
+            logging.error("Error loading terms from database: %s", e)
             return []
 
+    def load_due_terms(self):
+        # Запрос должен видеть уже выставленные оценки, иначе карточки вернутся повторно
+        self.flush_reviews()
+        cards = self.storage.due_cards(self.review_batch_size)
+        self.review_states = {state.term_id: state for term, state in cards}
+        logging.info("Loaded %d due cards for review", len(cards))
+        return [StudyTerm(*term) for term, state in cards]
+
+    @timed('study.show_term')
     def show_term(self):
-        term, definition, image_path = self.terms[self.current_term_index]
+        if not self.terms:
+            if self.review:
+                self.term_label.setText("No cards to review.")
+            else:
+                self.term_label.setText("No terms in this session." if self.session else "No terms in this module.")
+            self.definition_label.clear()
+            self.image_label.clear()
+            for button in self.grade_buttons:
+                button.setEnabled(False)
+            self.quiz_group.setVisible(False)
+            self.typing_group.setVisible(False)
+            self.answer_label.clear()
+            return
+
+        card = self.terms[self.current_term_index]
+        term_id, term, definition, image_path = card.id, card.term, card.definition, card.image_path
+        # Уже оценённую карточку (после возврата кнопкой Previous) повторно не оцениваем
+        for button in self.grade_buttons:
+            button.setEnabled(self.show_back and term_id in self.review_states)
         if self.show_back:
             self.term_label.setText(term)
             self.definition_label.setText(definition)
             if image_path:
-                pixmap = QPixmap(image_path)
-                scaled_pixmap = pixmap.scaled(self.image_label.size(), Qt.AspectRatioMode.KeepAspectRatio)
-                self.image_label.setPixmap(scaled_pixmap)
+                # Изображение декодируется в фоне; из кэша оно показывается сразу
+                pixmap = self.image_loader.cached(image_path)
+                if pixmap is not None:
+                    self.set_card_image(pixmap)
+                else:
+                    self.image_label.setText("Loading image...")
+                    self.image_loader.request(image_path)
                 self.image_label.mousePressEvent = lambda event: self.view_image(image_path)
             else:
                 self.image_label.clear()
+        elif self.mode == TYPING_MODE:
+            # В режиме ввода вопросом служит определение
+            self.term_label.setText(definition)
+            self.definition_label.clear()
+            self.image_label.clear()
         else:
             self.term_label.setText(term)
             self.definition_label.clear()
             self.image_label.clear()
-        logging.info(f"Showing term: {term}")
+        self.update_answer_controls(card)
+        self.prefetch()
+        # Строка форматируется, только если DEBUG включён
+        logging.debug("Showing term: %s", term)
+
+    def prefetch(self):
+        # Прогреваем изображения ближайших карточек по ходу движения, дальние выбрасываем из кэша
+        window = [self.current_term_index]
+        window += [self.current_term_index + self.direction * step for step in range(1, self.prefetch_ahead + 1)]
+        window += [self.current_term_index - self.direction * step for step in range(1, self.prefetch_behind + 1)]
+        paths = []
+        for index in window:
+            if 0 <= index < len(self.terms) and self.terms[index].image_path:
+                paths.append(self.terms[index].image_path)
+
+        for path in self.prefetched - set(paths):
+            self.image_loader.forget(path)
+        for path in paths:
+            self.image_loader.request(path)
+        self.prefetched = set(paths)
+
+    def set_card_image(self, pixmap):
+        self.image_label.setPixmap(pixmap.scaled(self.image_label.size(), Qt.AspectRatioMode.KeepAspectRatio))
+
+    def on_image_ready(self, image_path, pixmap):
+        if not self.terms or not self.show_back:
+            return
+        if self.terms[self.current_term_index].image_path == image_path:
+            self.set_card_image(pixmap)
+
+    def on_image_failed(self, image_path):
+        if not self.terms or not self.show_back:
+            return
+        if self.terms[self.current_term_index].image_path == image_path:
+            self.image_label.setText("Image not available.")
+
+    def grade_card(self, grade):
+        if not self.terms:
+            return
+        term_id = self.terms[self.current_term_index].id
+        if term_id not in self.review_states:
+            return
+        state = schedule(self.review_states.pop(term_id), grade)
+        self.pending_reviews[term_id] = state
+        if len(self.pending_reviews) >= self.review_flush_size:
+            self.flush_reviews()
+        else:
+            self.review_flush_timer.start()
+        logging.debug("Graded term %s as %s, next review in %.1f days", term_id, GRADE_NAMES[grade], state.interval)
+
+        self.show_back = False
+        if self.current_term_index < len(self.terms) - 1:
+            self.current_term_index += 1
+        else:
+            # Порция закончилась - берём следующие карточки, срок которых уже наступил
+            self.terms = self.load_due_terms()
+            self.current_term_index = 0
+        self.show_term()
+
+    def flush_reviews(self):
+        self.review_flush_timer.stop()
+        if not self.pending_reviews:
+            return True
+        states = list(self.pending_reviews.values())
+        try:
+            self.storage.save_review_states(states)
+        except sqlite3.Error as e:
+            # Буфер сохраняется - следующая попытка запишет те же оценки
+            logging.error("Error saving review state: %s", e)
+            QMessageBox.critical(self, "Database Error", f"Error saving review state: {e}")
+            return False
+        self.pending_reviews.clear()
+        logging.info("Saved %d review states", len(states))
+        return True
+
+    def closeEvent(self, event):
+        self.flush_reviews()
+        if self.session is not None:
+            try:
+                self.session.finish(self.storage, self.terms)
+            except sqlite3.Error as e:
+                logging.error("Error reshuffling session terms: %s", e)
+        event.accept()
+
+    def set_mode(self, mode):
+        self.mode = mode
+        self.show_back = False
+        self.answer_term_id = None
+        self.content_group.setTitle(f"{MODE_NAMES[mode]} Mode")
+        self.show_term()
+        logging.debug("Switched to %s mode", MODE_NAMES[mode].lower())
 
     def set_cards_mode(self):
-        self.content_group.setTitle("Cards Mode")
+        self.mode_combo.setCurrentIndex(CARDS_MODE)
+
+    def set_quiz_mode(self):
+        self.mode_combo.setCurrentIndex(QUIZ_MODE)
+
+    def set_typing_mode(self):
+        self.mode_combo.setCurrentIndex(TYPING_MODE)
+
+    def update_answer_controls(self, card):
+        self.quiz_group.setVisible(self.mode == QUIZ_MODE)
+        self.typing_group.setVisible(self.mode == TYPING_MODE)
+        if self.mode == CARDS_MODE:
+            self.answer_label.clear()
+            return
+        if card.id != self.answer_term_id:
+            # Новая карточка: варианты подбираются один раз, до ответа
+            self.answer_term_id = card.id
+            self.answer_label.clear()
+            self.answer_input.clear()
+            if self.mode == QUIZ_MODE:
+                self.choices = self.quiz_choices(card)
+                for button, choice in zip(self.choice_buttons, self.choices):
+                    button.setText(choice)
+                    button.setStyleSheet("")
+                for index, button in enumerate(self.choice_buttons):
+                    button.setVisible(index < len(self.choices))
+        # После ответа карточка открыта, повторно отвечать нельзя
+        for button in self.choice_buttons:
+            button.setEnabled(not self.show_back)
+        self.answer_input.setEnabled(not self.show_back)
+        self.check_button.setEnabled(not self.show_back)
+        if self.mode == TYPING_MODE and not self.show_back:
+            self.answer_input.setFocus()
+
+    def quiz_choices(self, card):
+        module_id = self.module_id if self.module_id is not None else self.storage.term_module_id(card.id)
+        with span('study.distractors'):
+            distractors = choose_distractors(card.definition, self.distractor_pool(module_id), CHOICES - 1)
+        choices = distractors + [card.definition]
+        random.shuffle(choices)
+        return choices
+
+    def distractor_pool(self, module_id):
+        # Случайная выборка определений модуля по индексу shuffle_key; если их мало - добавляем модули той же темы
+        pool = self.distractor_pools.get(module_id)
+        if pool is not None:
+            return pool
+        pool = []
+        try:
+            if module_id is not None:
+                pool = [row[2] for row in sample_terms(self.storage, [module_id], DISTRACTOR_POOL_SIZE)]
+                module = self.storage.get_module(module_id)
+                if len(pool) < DISTRACTOR_POOL_SIZE and module and module['theme']:
+                    theme_modules = [other for other in self.storage.module_ids_for_theme(module['theme'])
+                                     if other != module_id]
+                    if theme_modules:
+                        pool += [row[2] for row in sample_terms(self.storage, theme_modules,
+                                                                DISTRACTOR_POOL_SIZE - len(pool))]
+        except sqlite3.Error as e:
+            logging.error("Error loading quiz choices: %s", e)
+        pool = self.distractor_pools[module_id] = prepare_candidates(pool)
+        return pool
+
+    def choose_answer(self, choice):
+        if not self.terms or self.show_back or choice >= len(self.choices):
+            return
+        card = self.terms[self.current_term_index]
+        correct = self.choices[choice] == card.definition
+        for button, text in zip(self.choice_buttons, self.choices):
+            if text == card.definition:
+                button.setStyleSheet("background-color: #c8e6c9;")
+        if not correct:
+            self.choice_buttons[choice].setStyleSheet("background-color: #ffcdd2;")
+        self.answer_label.setText(RESULT_NAMES[CORRECT] if correct else "Wrong")
+        logging.debug("Quiz answer for term %s: %s", card.id, 'correct' if correct else 'wrong')
+        self.show_back = True
+        self.show_term()
+
+    def check_typed_answer(self):
+        if not self.terms or self.show_back or self.mode != TYPING_MODE:
+            return
+        card = self.terms[self.current_term_index]
+        result, expected = check_answer(self.answer_input.text(), card.term)
+        if result == CORRECT:
+            self.answer_label.setText(RESULT_NAMES[result])
+        else:
+            self.answer_label.setText(f"{RESULT_NAMES[result]}: {card.term}")
+        logging.debug("Typed answer for term %s: %s", card.id, RESULT_NAMES[result])
+        self.show_back = True
         self.show_term()
-        logging.info("Switched to cards mode")
 
     def show_previous_term(self):
         if self.current_term_index > 0:
             self.current_term_index -= 1
+            self.direction = -1
             self.show_back = False  # Сбрасываем флаг при переходе к предыдущему термину
             self.show_term()
-            logging.info(f"Showing previous term: {self.terms[self.current_term_index][0]}")
+            logging.debug("Showing previous term %d", self.current_term_index)
 
     def show_next_term(self):
         if self.current_term_index < len(self.terms) - 1:
             self.current_term_index += 1
+            self.direction = 1
             self.show_back = False  # Сбрасываем флаг при переходе к следующему термину
             self.show_term()
-            logging.info(f"Showing next term: {self.terms[self.current_term_index][0]}")
+            logging.debug("Showing next term %d", self.current_term_index)
 
     def flip_card(self):
         self.show_back = not self.show_back
         self.show_term()
-        logging.info(f"Flipping card to {'back' if self.show_back else 'front'}")
+        logging.debug("Flipping card to %s", 'back' if self.show_back else 'front')
 
     def view_image(self, image_path):
         image_dialog = QDialog(self)
@@ -154,4 +454,4 @@ class MemorizationWindow(QMainWindow):
 
         image_dialog.setLayout(image_layout)
         image_dialog.exec()
-        logging.info(f"Viewing image: {image_path}")
+        logging.debug("Viewing image: %s", image_path)
@@ -0,0 +1,190 @@
+from PyQt6.QtWidgets import QStyledItemDelegate, QStyle
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QRect, QSize, QEvent, pyqtSignal
+from PyQt6.QtGui import QFont, QColor, QLinearGradient, QBrush, QPen, QFontMetrics
+from application.modules.Instrumentation import timed
+
+
+class ModuleListModel(QAbstractListModel):
+    ModuleRole = Qt.ItemDataRole.UserRole + 1
+
+    def __init__(self, storage, batch_size=30, parent=None, checkable=False):
+        super().__init__(parent)
+        self.storage = storage
+        self.batch_size = batch_size
+        self.total = 0  # кэшированное число модулей, пересчитывается только при reload
+        self.modules = []
+        self.checkable = checkable  # флажки выбора модулей, например для сессии изучения
+        self.checked = {}  # id -> название отмеченных модулей в порядке отметки
+
+    @timed('grid.reload')
+    def reload(self):
+        self.beginResetModel()
+        self.total = self.storage.count_modules()
+        self.modules = []
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.modules)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.modules):
+            return None
+        module = self.modules[index.row()]
+        if role == self.ModuleRole:
+            return module
+        if role == Qt.ItemDataRole.DisplayRole:
+            return f"{module['name']} ({module['length']})" if self.checkable else module['name']
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return module['description']
+        if role == Qt.ItemDataRole.CheckStateRole and self.checkable:
+            return Qt.CheckState.Checked if module['id'] in self.checked else Qt.CheckState.Unchecked
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        return flags | Qt.ItemFlag.ItemIsUserCheckable if self.checkable else flags
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not self.checkable or role != Qt.ItemDataRole.CheckStateRole or not index.isValid():
+            return False
+        module = self.modules[index.row()]
+        if Qt.CheckState(value) == Qt.CheckState.Checked:
+            self.checked[module['id']] = module['name']
+        else:
+            self.checked.pop(module['id'], None)
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.CheckStateRole])
+        return True
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return len(self.modules) < self.total
+
+    @timed('grid.fetch_more')
+    def fetchMore(self, parent=QModelIndex()):
+        # Представление запрашивает следующую порцию, когда пользователь докручивает до конца списка
+        if parent.isValid():
+            return
+        start = len(self.modules)
+        last_id = self.modules[-1]['id'] if self.modules else 0
+        batch = self.storage.list_modules_page(last_id, self.batch_size)
+        if not batch:
+            # Модули удалили после подсчёта - больше загружать нечего
+            self.total = start
+            return
+        self.beginInsertRows(QModelIndex(), start, start + len(batch) - 1)
+        self.modules.extend(batch)
+        self.endInsertRows()
+
+    def module_count(self):
+        return self.total
+
+
+class ModuleCardDelegate(QStyledItemDelegate):
+    edit_requested = pyqtSignal(int)
+    delete_requested = pyqtSignal(int)
+    study_requested = pyqtSignal(int)
+
+    CARD_SIZE = QSize(300, 150)
+    MARGIN = 6
+    BUTTON_SIZE = QSize(80, 30)
+    BUTTONS = [
+        ("Edit", QColor("#4CAF50"), QColor("#45a049")),
+        ("Delete", QColor("#f44336"), QColor("#e53935")),
+        ("Study", QColor("#2196F3"), QColor("#1e88e5")),
+    ]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Шрифты и метрики создаются один раз, а не для каждой карточки
+        self.name_font = QFont("Arial", 16, QFont.Weight.Bold)
+        self.text_font = QFont("Arial", 12)
+        self.name_metrics = QFontMetrics(self.name_font)
+        self.text_metrics = QFontMetrics(self.text_font)
+        self.hovered = None  # (строка, индекс кнопки) под курсором
+
+    def sizeHint(self, option, index):
+        return QSize(self.CARD_SIZE.width() + 2 * self.MARGIN, self.CARD_SIZE.height() + 2 * self.MARGIN)
+
+    def card_rect(self, option):
+        return option.rect.adjusted(self.MARGIN, self.MARGIN, -self.MARGIN, -self.MARGIN)
+
+    def button_rects(self, card):
+        rects = []
+        x = card.right() - 10 - len(self.BUTTONS) * (self.BUTTON_SIZE.width() + 5) + 5
+        y = card.bottom() - 10 - self.BUTTON_SIZE.height()
+        for _ in self.BUTTONS:
+            rects.append(QRect(x, y, self.BUTTON_SIZE.width(), self.BUTTON_SIZE.height()))
+            x += self.BUTTON_SIZE.width() + 5
+        return rects
+
+    def paint(self, painter, option, index):
+        module = index.data(ModuleListModel.ModuleRole)
+        if module is None:
+            return
+        card = self.card_rect(option)
+        painter.save()
+        painter.setRenderHint(painter.RenderHint.Antialiasing)
+
+        # Фоновый градиент карточки
+        gradient = QLinearGradient(0, card.top(), 0, card.bottom())
+        gradient.setColorAt(0, QColor("#f0f0f0"))
+        gradient.setColorAt(1, QColor("#e0e0e0"))
+        painter.setPen(QPen(QColor("#d0d0d0")) if not option.state & QStyle.StateFlag.State_Selected
+                       else QPen(QColor("#2196F3"), 2))
+        painter.setBrush(QBrush(gradient))
+        painter.drawRoundedRect(card, 6, 6)
+
+        text_rect = card.adjusted(10, 8, -10, -8)
+        painter.setPen(QColor("#000000"))
+        painter.setFont(self.name_font)
+        name_height = self.name_metrics.height()
+        painter.drawText(QRect(text_rect.left(), text_rect.top(), text_rect.width(), name_height),
+                         Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+                         self.name_metrics.elidedText(module['name'], Qt.TextElideMode.ElideRight, text_rect.width()))
+
+        painter.setFont(self.text_font)
+        line_height = self.text_metrics.height()
+        top = text_rect.top() + name_height + 2
+        painter.drawText(QRect(text_rect.left(), top, text_rect.width(), line_height),
+                         Qt.AlignmentFlag.AlignLeft, f"Terms: {module['length']}")
+        top += line_height + 2
+        description = module['description'].replace('\n', ' ')
+        painter.drawText(QRect(text_rect.left(), top, text_rect.width(), line_height),
+                         Qt.AlignmentFlag.AlignLeft,
+                         self.text_metrics.elidedText(description, Qt.TextElideMode.ElideRight, text_rect.width()))
+
+        for i, (rect, (label, color, hover_color)) in enumerate(zip(self.button_rects(card), self.BUTTONS)):
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(hover_color if self.hovered == (index.row(), i) else color)
+            painter.drawRoundedRect(rect, 5, 5)
+            painter.setPen(QColor("white"))
+            painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, label)
+
+        painter.restore()
+
+    def button_at(self, option, pos):
+        for i, rect in enumerate(self.button_rects(self.card_rect(option))):
+            if rect.contains(pos):
+                return i
+        return None
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.Type.MouseMove:
+            button = self.button_at(option, event.position().toPoint())
+            hovered = (index.row(), button) if button is not None else None
+            if hovered != self.hovered:
+                self.hovered = hovered
+                self.parent().viewport().update()
+            return False
+
+        if event.type() == QEvent.Type.MouseButtonRelease and event.button() == Qt.MouseButton.LeftButton:
+            button = self.button_at(option, event.position().toPoint())
+            if button is None:
+                return False
+            module_id = index.data(ModuleListModel.ModuleRole)['id']
+            (self.edit_requested, self.delete_requested, self.study_requested)[button].emit(module_id)
+            return True
+        return False
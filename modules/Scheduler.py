@@ -0,0 +1,53 @@
+import time
+
+# Оценки ответа в режиме повторения и соответствующее качество ответа в SM-2 (0-5)
+AGAIN, HARD, GOOD, EASY = 0, 1, 2, 3
+GRADE_NAMES = ["Again", "Hard", "Good", "Easy"]
+QUALITY = {AGAIN: 1, HARD: 3, GOOD: 4, EASY: 5}
+
+# Начальный коэффициент лёгкости зависит от сложности, выбранной в редакторе
+INITIAL_EASE = {"Easy": 2.7, "Normal": 2.5, "Hard": 2.1}
+MIN_EASE = 1.3
+DAY = 86400
+RELEARN_DELAY = 600  # забытая карточка возвращается через 10 минут
+
+
+class ReviewState:
+    __slots__ = ('term_id', 'ease', 'interval', 'repetitions', 'lapses', 'due', 'last_review')
+
+    def __init__(self, term_id, ease, interval, repetitions, lapses, due, last_review):
+        self.term_id = term_id
+        self.ease = ease
+        self.interval = interval  # в днях
+        self.repetitions = repetitions
+        self.lapses = lapses
+        self.due = due  # unix-время следующего показа
+        self.last_review = last_review
+
+    def as_row(self):
+        return (self.ease, self.interval, self.repetitions, self.lapses, self.due, self.last_review, self.term_id)
+
+
+def schedule(state, grade, now=None):
+    # SM-2 с отдельными коэффициентами для Hard/Easy; возвращает новое состояние, не меняя исходное
+    now = time.time() if now is None else now
+    quality = QUALITY[grade]
+    ease = state.ease + (0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    ease = max(MIN_EASE, ease)
+
+    if grade == AGAIN:
+        return ReviewState(state.term_id, ease, 0, 0, state.lapses + 1, now + RELEARN_DELAY, now)
+
+    repetitions = state.repetitions + 1
+    if repetitions == 1:
+        interval = 1
+    elif repetitions == 2:
+        interval = 6
+    else:
+        interval = state.interval * ease
+    if grade == HARD:
+        interval = max(1, interval * 0.8)
+    elif grade == EASY:
+        interval *= 1.3
+
+    return ReviewState(state.term_id, ease, interval, repetitions, state.lapses, now + interval * DAY, now)
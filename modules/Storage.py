@@ -0,0 +1,553 @@
+import re
+import time
+import logging
+from application.modules.Database import DB_PATH, get_connection, transaction, rebuild_search_index
+from application.modules.Scheduler import ReviewState
+from application.modules.Duplicates import fingerprint
+from application.modules.Instrumentation import span, timed
+
+
+SAVE_BATCH_SIZE = 2000  # строк между проверками отмены при сохранении модуля
+
+
+class SaveCancelled(Exception):
+    pass
+
+
+class Storage:
+    def __init__(self, path=DB_PATH):
+        self.path = path
+
+    @property
+    def conn(self):
+        # Соединение принадлежит текущему потоку и переиспользуется всеми окнами
+        return get_connection(self.path)
+
+    def list_modules(self):
+        cursor = self.conn.execute('SELECT id, name, theme, length, description FROM modules ORDER BY id')
+        return [self._module_row(row) for row in cursor]
+
+    @timed('db.list_modules_page')
+    def list_modules_page(self, after_id=0, limit=30):
+        # Keyset-пагинация: стоимость страницы не зависит от того, как далеко пролистан список
+        cursor = self.conn.execute('''
+            SELECT id, name, theme, length, description FROM modules
+            WHERE id > ? ORDER BY id LIMIT ?
+        ''', (after_id, limit))
+        return [self._module_row(row) for row in cursor]
+
+    @timed('db.count_modules')
+    def count_modules(self):
+        return self.conn.execute('SELECT COUNT(*) FROM modules').fetchone()[0]
+
+    @timed('db.get_module')
+    def get_module(self, module_id):
+        row = self.conn.execute('SELECT id, name, theme, length, description FROM modules WHERE id = ?',
+                                (module_id,)).fetchone()
+        return self._module_row(row) if row else None
+
+    def term_module_id(self, term_id):
+        row = self.conn.execute('SELECT module_id FROM module_terms WHERE term_id = ? LIMIT 1', (term_id,)).fetchone()
+        return row[0] if row else None
+
+    @timed('db.get_module_terms')
+    def get_module_terms(self, module_id):
+        return [term for batch in self.iter_module_terms(module_id) for term in batch]
+
+    def iter_module_terms(self, module_id, batch_size=500):
+        # Один запрос с JOIN по индексу (module_id, position) вместо SELECT на каждый термин
+        cursor = self.conn.execute('''
+            SELECT t.id, t.term, t.definition, t.complexity, t.image_path
+            FROM module_terms mt JOIN terms t ON t.id = mt.term_id
+            WHERE mt.module_id = ?
+            ORDER BY mt.position
+        ''', (module_id,))
+        while True:
+            with span('db.iter_module_terms', batch_size=batch_size):
+                rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield [{
+                "id": row[0],
+                "term": row[1],
+                "definition": row[2],
+                "complexity": row[3],
+                "image_path": row[4]
+            } for row in rows]
+
+    def iter_module_term_ids(self, module_id, batch_size=5000):
+        # Только id в порядке модуля: тексты терминов сессия изучения подгружает страницами через get_terms
+        cursor = self.conn.execute('''
+            SELECT term_id FROM module_terms WHERE module_id = ? ORDER BY position
+        ''', (module_id,))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield [row[0] for row in rows]
+
+    @timed('db.shuffled_term_page')
+    def shuffled_term_page(self, module_id, after, before=None, limit=64):
+        # Keyset-страница (shuffle_key, term_id, shared) после after; before - верхняя граница ключа для второго круга.
+        # shared - термин есть и в других модулях, в сессии по нескольким модулям он встретится повторно
+        sql = '''
+            SELECT shuffle_key, term_id, EXISTS (
+                SELECT 1 FROM module_terms other WHERE other.term_id = mt.term_id AND other.module_id != mt.module_id
+            )
+            FROM module_terms mt
+            WHERE module_id = ? AND (shuffle_key, term_id) > (?, ?)
+        '''
+        args = [module_id, after[0], after[1]]
+        if before is not None:
+            sql += ' AND shuffle_key < ?'
+            args.append(before)
+        sql += ' ORDER BY shuffle_key, term_id LIMIT ?'
+        args.append(limit)
+        return self.conn.execute(sql, args).fetchall()
+
+    @timed('db.search_term_ids')
+    def search_term_ids(self, query, seed, limit=None):
+        # Все найденные термины в порядке перемешивания с ключа seed; ранжирование bm25 здесь не нужно
+        match = self.match_expression(query)
+        if not match:
+            return []
+        cursor = self.conn.execute('''
+            SELECT mt.term_id
+            FROM search_index s JOIN module_terms mt ON mt.term_id = s.rowid AND mt.module_id = s.module_id
+            WHERE search_index MATCH ?
+            ORDER BY mt.shuffle_key < ?, mt.shuffle_key, mt.term_id
+            LIMIT ?
+        ''', (match, seed, -1 if limit is None else limit))
+        return [row[0] for row in cursor]
+
+    @timed('db.reshuffle_terms')
+    def reshuffle_terms(self, term_ids):
+        # Новые случайные ключи у показанных терминов: следующие сессии не повторяют один и тот же круг
+        with transaction(self.conn) as conn:
+            conn.executemany('UPDATE module_terms SET shuffle_key = random() WHERE term_id = ?',
+                             [(term_id,) for term_id in term_ids])
+
+    def module_ids_for_theme(self, theme):
+        return [row[0] for row in self.conn.execute('SELECT id FROM modules WHERE theme = ? ORDER BY id', (theme,))]
+
+    def count_module_terms(self, module_ids):
+        # Длины модулей хранятся в modules.length, поэтому счёт не зависит от числа терминов
+        total = 0
+        module_ids = list(module_ids)
+        for start in range(0, len(module_ids), 500):
+            chunk = module_ids[start:start + 500]
+            total += self.conn.execute(f'''
+                SELECT COALESCE(SUM(length), 0) FROM modules WHERE id IN ({', '.join('?' * len(chunk))})
+            ''', chunk).fetchone()[0]
+        return total
+
+    def list_themes(self):
+        return [row[0] for row in self.conn.execute('''
+            SELECT DISTINCT theme FROM modules WHERE theme IS NOT NULL AND theme != '' ORDER BY theme
+        ''')]
+
+    def list_saved_searches(self):
+        return self.conn.execute('SELECT id, name, query FROM saved_searches ORDER BY name').fetchall()
+
+    def save_search(self, name, query):
+        with self.conn:
+            self.conn.execute('''
+                INSERT INTO saved_searches (name, query) VALUES (?, ?)
+                ON CONFLICT (name) DO UPDATE SET query = excluded.query
+            ''', (name, query))
+
+    def delete_saved_search(self, search_id):
+        with self.conn:
+            self.conn.execute('DELETE FROM saved_searches WHERE id = ?', (search_id,))
+
+    def count_duplicates(self, term_ids):
+        # Сколько из данных терминов совпадает (после нормализации) с другими терминами библиотеки
+        count = 0
+        term_ids = list(term_ids)
+        for start in range(0, len(term_ids), 500):
+            chunk = term_ids[start:start + 500]
+            count += self.conn.execute(f'''
+                SELECT COUNT(*) FROM terms t
+                WHERE t.id IN ({', '.join('?' * len(chunk))}) AND EXISTS (
+                    SELECT 1 FROM terms other WHERE other.norm_hash = t.norm_hash AND other.id != t.id
+                )
+            ''', chunk).fetchone()[0]
+        return count
+
+    def terms_without_fingerprint(self, after_id=0, limit=2000):
+        return self.conn.execute('''
+            SELECT id, term, definition FROM terms WHERE norm_hash IS NULL AND id > ? ORDER BY id LIMIT ?
+        ''', (after_id, limit)).fetchall()
+
+    def count_terms_without_fingerprint(self):
+        return self.conn.execute('SELECT COUNT(*) FROM terms WHERE norm_hash IS NULL').fetchone()[0]
+
+    @timed('db.set_fingerprints')
+    def set_fingerprints(self, fingerprints):
+        # fingerprints: (term_id, norm_hash, ключи корзин LSH)
+        with transaction(self.conn) as conn:
+            conn.executemany('UPDATE terms SET norm_hash = ? WHERE id = ?',
+                             [(norm_hash, term_id) for term_id, norm_hash, keys in fingerprints])
+            conn.executemany('DELETE FROM term_lsh WHERE term_id = ?',
+                             [(term_id,) for term_id, norm_hash, keys in fingerprints])
+            conn.executemany('INSERT OR IGNORE INTO term_lsh (bucket, term_id) VALUES (?, ?)',
+                             [(key, term_id) for term_id, norm_hash, keys in fingerprints for key in keys])
+
+    @timed('db.exact_duplicate_groups')
+    def exact_duplicate_groups(self):
+        # GROUP BY идёт по индексу idx_terms_norm_hash, без сортировки всей таблицы
+        cursor = self.conn.execute('''
+            SELECT group_concat(id) FROM terms
+            WHERE norm_hash IS NOT NULL
+            GROUP BY norm_hash HAVING COUNT(*) > 1
+        ''')
+        return [sorted(int(term_id) for term_id in row[0].split(',')) for row in cursor]
+
+    def iter_lsh_buckets(self, max_size):
+        # Корзины LSH с несколькими терминами; слишком большие корзины (частые короткие тексты) урезаются
+        cursor = self.conn.execute('''
+            SELECT bucket, term_id FROM term_lsh
+            WHERE bucket IN (SELECT bucket FROM term_lsh GROUP BY bucket HAVING COUNT(*) > 1)
+            ORDER BY bucket, term_id
+        ''')
+        bucket, members = None, []
+        for key, term_id in cursor:
+            if key != bucket:
+                if len(members) > 1:
+                    yield members
+                bucket, members = key, []
+            if len(members) < max_size:
+                members.append(term_id)
+        if len(members) > 1:
+            yield members
+
+    @timed('db.duplicate_details')
+    def duplicate_details(self, term_ids):
+        # (id, term, definition, complexity, image_path, norm_hash, названия модулей через запятую)
+        rows = []
+        term_ids = list(term_ids)
+        for start in range(0, len(term_ids), 500):
+            chunk = term_ids[start:start + 500]
+            rows += self.conn.execute(f'''
+                SELECT t.id, t.term, t.definition, t.complexity, t.image_path, t.norm_hash,
+                       COALESCE((SELECT group_concat(m.name, ', ')
+                                 FROM module_terms mt JOIN modules m ON m.id = mt.module_id
+                                 WHERE mt.term_id = t.id), '')
+                FROM terms t WHERE t.id IN ({', '.join('?' * len(chunk))})
+            ''', chunk).fetchall()
+        return rows
+
+    @timed('db.merge_terms')
+    def merge_terms(self, keep_id, drop_ids):
+        # Связи дубликатов с модулями переходят к keep_id; в модуле, где keep_id уже есть, связь удаляется.
+        # Изображение дубликата переносится, если у оставляемого термина его нет.
+        with transaction(self.conn) as conn:
+            for drop_id in drop_ids:
+                if drop_id == keep_id:
+                    continue
+                shared = [row[0] for row in conn.execute('''
+                    SELECT module_id FROM module_terms
+                    WHERE term_id = ? AND module_id IN (SELECT module_id FROM module_terms WHERE term_id = ?)
+                ''', (drop_id, keep_id))]
+                conn.executemany('DELETE FROM module_terms WHERE module_id = ? AND term_id = ?',
+                                 [(module_id, drop_id) for module_id in shared])
+                conn.executemany('UPDATE modules SET length = length - 1 WHERE id = ?',
+                                 [(module_id,) for module_id in shared])
+                conn.execute('UPDATE module_terms SET term_id = ? WHERE term_id = ?', (keep_id, drop_id))
+                conn.execute('''
+                    UPDATE terms SET image_path = (SELECT image_path FROM terms WHERE id = ?)
+                    WHERE id = ? AND COALESCE(image_path, '') = ''
+                ''', (drop_id, keep_id))
+                conn.execute('DELETE FROM search_index WHERE rowid = ?', (drop_id,))
+                conn.execute('DELETE FROM terms WHERE id = ?', (drop_id,))
+        logging.info("Merged %d duplicate terms into term %s", len(drop_ids), keep_id)
+
+    @timed('db.get_terms')
+    def get_terms(self, term_ids):
+        # Строки (id, term, definition, image_path) в произвольном порядке
+        rows = []
+        term_ids = list(term_ids)
+        for start in range(0, len(term_ids), 500):
+            chunk = term_ids[start:start + 500]
+            rows += self.conn.execute(f'''
+                SELECT id, term, definition, image_path FROM terms WHERE id IN ({', '.join('?' * len(chunk))})
+            ''', chunk).fetchall()
+        return rows
+
+    def set_term_images(self, images):
+        # images: список пар (image_path, term_id)
+        with self.conn:
+            self.conn.executemany('UPDATE terms SET image_path = ? WHERE id = ?', images)
+
+    @timed('db.save_module')
+    def save_module(self, module_id, name, description, theme, terms, progress=None, is_cancelled=None):
+        # Записываем только разницу с базой: новые, изменённые и удалённые термины.
+        # Новым терминам присваивается term['id'], чтобы следующее сохранение их узнало.
+        # Изменённый термин, общий с другим модулем после слияния дубликатов, не правится на месте:
+        # модуль получает его копию с новым id и тем же состоянием повторения, другой модуль - прежний термин.
+        # Отмена (is_cancelled) откатывает всю транзакцию; id терминам присваиваются только после коммита.
+        with transaction(self.conn) as conn:
+            if module_id:
+                conn.execute('''
+                    UPDATE modules
+                    SET name = ?, theme = ?, length = ?, description = ?
+                    WHERE id = ?
+                ''', (name, theme, len(terms), description, module_id))
+            else:
+                cursor = conn.execute('''
+                    INSERT INTO modules (name, theme, length, description)
+                    VALUES (?, ?, ?, ?)
+                ''', (name, theme, len(terms), description))
+                module_id = cursor.lastrowid
+
+            existing = {}
+            cursor = conn.execute('''
+                SELECT t.id, mt.position, t.term, t.definition, t.complexity, t.image_path
+                FROM module_terms mt JOIN terms t ON t.id = mt.term_id
+                WHERE mt.module_id = ?
+            ''', (module_id,))
+            for row in cursor:
+                existing[row[0]] = (row[1], row[2:])
+
+            next_id = self._next_term_id(conn)
+
+            inserted, updated, moved, linked, new_ids, buckets = [], [], [], [], [], []
+            changed, copied, unlinked = [], [], []
+            for position, term in enumerate(terms):
+                values = (term['term'], term['definition'], term['complexity'], term['image_path'])
+                term_id = term.get('id')
+                if term_id not in existing:
+                    term_id = next_id
+                    next_id += 1
+                    new_ids.append((term, term_id))
+                    norm_hash, keys = fingerprint(term['term'], term['definition'])
+                    inserted.append((term_id,) + values + (norm_hash,))
+                    buckets += [(key, term_id) for key in keys]
+                    linked.append((module_id, term_id, position))
+                    continue
+                old_position, old_values = existing.pop(term_id)
+                if old_values != values:
+                    changed.append((term, term_id, values, position, old_position))
+                elif old_position != position:
+                    moved.append((position, module_id, term_id))
+            removed = [(term_id,) for term_id in existing]
+
+            shared = self._shared_term_ids(conn, module_id) if changed else set()
+            for term, term_id, values, position, old_position in changed:
+                norm_hash, keys = fingerprint(term['term'], term['definition'])
+                if term_id in shared:
+                    new_id = next_id
+                    next_id += 1
+                    new_ids.append((term, new_id))
+                    inserted.append((new_id,) + values + (norm_hash,))
+                    buckets += [(key, new_id) for key in keys]
+                    copied.append((new_id, term_id))
+                    unlinked.append((module_id, term_id))
+                    linked.append((module_id, new_id, position))
+                    continue
+                updated.append(values + (norm_hash, term_id))
+                buckets += [(key, term_id) for key in keys]
+                if old_position != position:
+                    moved.append((position, module_id, term_id))
+
+            steps = [
+                ('''
+                    INSERT INTO terms (id, term, definition, complexity, image_path, norm_hash)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', inserted),
+                ('''
+                    INSERT OR REPLACE INTO review_state (term_id, ease, interval, repetitions, lapses, due, last_review)
+                    SELECT ?, ease, interval, repetitions, lapses, due, last_review FROM review_state WHERE term_id = ?
+                ''', copied),
+                ('''
+                    UPDATE terms SET term = ?, definition = ?, complexity = ?, image_path = ?, norm_hash = ?
+                    WHERE id = ?
+                ''', updated),
+                # Отпечатки для поиска дубликатов обновляются вместе с терминами
+                ('DELETE FROM term_lsh WHERE term_id = ?', [(row[-1],) for row in updated]),
+                ('INSERT OR IGNORE INTO term_lsh (bucket, term_id) VALUES (?, ?)', buckets),
+                ('UPDATE module_terms SET position = ? WHERE module_id = ? AND term_id = ?', moved),
+                ('INSERT INTO module_terms (module_id, term_id, position) VALUES (?, ?, ?)', linked),
+                ('DELETE FROM module_terms WHERE module_id = ? AND term_id = ?',
+                 [(module_id, term_id) for (term_id,) in removed] + unlinked),
+                ('''
+                    DELETE FROM terms
+                    WHERE id = ? AND NOT EXISTS (SELECT 1 FROM module_terms WHERE term_id = terms.id)
+                ''', removed),
+            ]
+            total = sum(len(rows) for _, rows in steps)
+            done = 0
+            for sql, rows in steps:
+                for start in range(0, len(rows), SAVE_BATCH_SIZE):
+                    if is_cancelled is not None and is_cancelled():
+                        raise SaveCancelled()
+                    batch = rows[start:start + SAVE_BATCH_SIZE]
+                    conn.executemany(sql, batch)
+                    done += len(batch)
+                    if progress is not None:
+                        progress(done, total)
+
+        for term, term_id in new_ids:
+            term['id'] = term_id
+        logging.info("Saved module %s: %d inserted, %d updated, %d copied from shared, %d moved, %d removed",
+                     module_id, len(inserted) - len(copied), len(updated), len(copied), len(moved), len(removed))
+        return module_id
+
+    @staticmethod
+    def _shared_term_ids(conn, module_id):
+        # Термины модуля, на которые ссылается ещё хотя бы один модуль
+        return {term_id for (term_id,) in conn.execute('''
+            SELECT mt.term_id FROM module_terms mt
+            WHERE mt.module_id = ?
+              AND EXISTS (SELECT 1 FROM module_terms o WHERE o.term_id = mt.term_id AND o.module_id != mt.module_id)
+        ''', (module_id,))}
+
+    @timed('db.append_terms')
+    def append_terms(self, module_id, terms):
+        # Дописывает пачку новых терминов в конец модуля одной транзакцией
+        with transaction(self.conn) as conn:
+            next_id = self._next_term_id(conn)
+            position = conn.execute('SELECT COALESCE(MAX(position) + 1, 0) FROM module_terms WHERE module_id = ?',
+                                    (module_id,)).fetchone()[0]
+            rows, links, buckets = [], [], []
+            for term in terms:
+                term['id'] = next_id
+                norm_hash, keys = fingerprint(term['term'], term['definition'])
+                rows.append((next_id, term['term'], term['definition'], term['complexity'], term['image_path'],
+                             norm_hash))
+                links.append((module_id, next_id, position))
+                buckets += [(key, next_id) for key in keys]
+                next_id += 1
+                position += 1
+            conn.executemany('''
+                INSERT INTO terms (id, term, definition, complexity, image_path, norm_hash)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', rows)
+            conn.executemany('INSERT INTO module_terms (module_id, term_id, position) VALUES (?, ?, ?)', links)
+            conn.executemany('INSERT OR IGNORE INTO term_lsh (bucket, term_id) VALUES (?, ?)', buckets)
+            conn.execute('UPDATE modules SET length = length + ? WHERE id = ?', (len(terms), module_id))
+        return [term['id'] for term in terms]
+
+    @staticmethod
+    def _next_term_id(conn):
+        # Вызывается внутри BEGIN IMMEDIATE, поэтому выданные id не пересекутся с другим писателем
+        return conn.execute('''
+            SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'terms'), 0),
+                       COALESCE((SELECT MAX(id) FROM terms), 0)) + 1
+        ''').fetchone()[0]
+
+    @timed('db.delete_module')
+    def delete_module(self, module_id):
+        with self.conn:
+            # Термины принадлежат модулю, поэтому удаляем те, на которые больше никто не ссылается
+            self.conn.execute('''
+                DELETE FROM terms WHERE id IN (
+                    SELECT mt.term_id FROM module_terms mt
+                    WHERE mt.module_id = ? AND NOT EXISTS (
+                        SELECT 1 FROM module_terms other
+                        WHERE other.term_id = mt.term_id AND other.module_id != mt.module_id
+                    )
+                )
+            ''', (module_id,))
+            self.conn.execute('DELETE FROM modules WHERE id = ?', (module_id,))
+
+    @timed('db.search_modules')
+    def search_modules(self, query, columns=None, limit=20, offset=0):
+        match = self.match_expression(query, columns)
+        if not match:
+            return []
+        cursor = self.conn.execute('''
+            SELECT m.id, m.name, m.theme, m.length
+            FROM module_search JOIN modules m ON m.id = module_search.rowid
+            WHERE module_search MATCH ?
+            ORDER BY bm25(module_search, 10.0, 3.0, 1.0)
+            LIMIT ? OFFSET ?
+        ''', (match, limit, offset))
+        return cursor.fetchall()
+
+    @timed('db.search_terms')
+    def search_terms(self, query, limit=50, offset=0):
+        # Результаты ранжируются bm25: совпадение в термине весит больше, чем в определении или модуле.
+        # Ранжируются все совпадения, а rowid и id модуля делают порядок полным, чтобы страницы
+        # (offset) не пересекались и не теряли строки. Термин из нескольких модулей (после слияния
+        # дубликатов) возвращается для каждого из них.
+        match = self.match_expression(query)
+        if not match:
+            return []
+        cursor = self.conn.execute('''
+            SELECT c.rowid, c.term, c.definition, m.id, m.name FROM (
+                SELECT rowid, term, definition, bm25(search_index, 10.0, 2.0, 4.0, 3.0) AS rank
+                FROM search_index
+                WHERE search_index MATCH ?
+            ) c
+            JOIN module_terms mt ON mt.term_id = c.rowid
+            JOIN modules m ON m.id = mt.module_id
+            ORDER BY c.rank, c.rowid, m.id
+            LIMIT ? OFFSET ?
+        ''', (match, limit, offset))
+        return cursor.fetchall()
+
+    @timed('db.due_cards')
+    def due_cards(self, limit=50, now=None):
+        # Следующие карточки к повторению из всех модулей - один проход по индексу idx_review_state_due
+        now = time.time() if now is None else now
+        cursor = self.conn.execute('''
+            SELECT t.id, t.term, t.definition, t.image_path,
+                   r.ease, r.interval, r.repetitions, r.lapses, r.due, r.last_review
+            FROM review_state r JOIN terms t ON t.id = r.term_id
+            WHERE r.due <= ? AND EXISTS (SELECT 1 FROM module_terms mt WHERE mt.term_id = r.term_id)
+            ORDER BY r.due
+            LIMIT ?
+        ''', (now, limit))
+        cards = []
+        for row in cursor:
+            term_id, term, definition, image_path = row[:4]
+            cards.append(((term_id, term, definition, image_path), ReviewState(term_id, *row[4:])))
+        return cards
+
+    @timed('db.count_due')
+    def count_due(self, now=None):
+        now = time.time() if now is None else now
+        return self.conn.execute('''
+            SELECT COUNT(*) FROM review_state r
+            WHERE r.due <= ? AND EXISTS (SELECT 1 FROM module_terms mt WHERE mt.term_id = r.term_id)
+        ''', (now,)).fetchone()[0]
+
+    def save_review_state(self, state):
+        self.save_review_states([state])
+
+    @timed('db.save_review_states')
+    def save_review_states(self, states):
+        # Накопленные оценки записываются одной транзакцией
+        with transaction(self.conn) as conn:
+            conn.executemany('''
+                UPDATE review_state
+                SET ease = ?, interval = ?, repetitions = ?, lapses = ?, due = ?, last_review = ?
+                WHERE term_id = ?
+            ''', [state.as_row() for state in states])
+
+    @timed('db.reindex')
+    def reindex(self):
+        rebuild_search_index(self.conn)
+
+    @staticmethod
+    def match_expression(query, columns=None):
+        # Каждое слово ищется по префиксу; регистр (в том числе кириллицы) сворачивает токенизатор unicode61
+        tokens = re.findall(r'[^\W_]+', query)
+        if not tokens:
+            return ''
+        expression = ' '.join(f'"{token}"*' for token in tokens)
+        if columns:
+            expression = '{%s} : (%s)' % (' '.join(columns), expression)
+        return expression
+
+    @staticmethod
+    def _module_row(row):
+        module_id, name, theme, length, description = row
+        return {
+            'id': module_id,
+            'name': name,
+            'theme': theme,
+            'length': length,
+            'description': description
+        }
@@ -0,0 +1,90 @@
+import heapq
+import random
+from array import array
+from itertools import chain, islice
+from application.modules.TermStore import StudyTerms
+
+MIN_KEY = -2 ** 63
+PAGE_SIZE = 64  # строк за одно обращение к индексу каждого модуля
+
+
+def new_seed():
+    return random.randint(MIN_KEY, 2 ** 63 - 1)
+
+
+def iter_shuffle_keys(storage, module_id, start, before=None, page_size=PAGE_SIZE):
+    # Пары (shuffle_key, term_id) одного модуля по возрастанию ключа, страницами по индексу
+    after = (start, 0)  # term_id всегда больше 0, поэтому ключ start тоже попадает в выборку
+    while True:
+        rows = storage.shuffled_term_page(module_id, after, before, page_size)
+        yield from rows
+        if len(rows) < page_size:
+            return
+        after = rows[-1][:2]
+
+
+def iter_shuffled_term_ids(storage, module_ids, seed, page_size=PAGE_SIZE):
+    # Слияние потоков модулей по shuffle_key: сначала ключи от seed до конца, затем с начала до seed.
+    # Старт сессии - по одной странице индекса на модуль, независимо от их размера.
+    first = heapq.merge(*(iter_shuffle_keys(storage, module_id, seed, page_size=page_size)
+                          for module_id in module_ids))
+    second = heapq.merge(*(iter_shuffle_keys(storage, module_id, MIN_KEY, seed, page_size)
+                           for module_id in module_ids))
+    seen = set()  # только термины из нескольких модулей: остальные не могут повториться
+    for key, term_id, shared in chain(first, second):
+        if shared:
+            if term_id in seen:
+                continue
+            seen.add(term_id)
+        yield term_id
+
+
+def sample_terms(storage, module_ids, size, seed=None):
+    # Случайная выборка строк (id, term, definition, image_path) из модулей без чтения их целиком
+    term_ids = list(islice(iter_shuffled_term_ids(storage, module_ids, new_seed() if seed is None else seed), size))
+    return storage.get_terms(term_ids)
+
+
+class StudySession:
+    # Что изучать, кроме одного модуля: выбранные модули, тема или сохранённый поиск.
+    # seed задаёт место в порядке shuffle_key, с которого начинается сессия; limit ограничивает выборку.
+    # Сам порядок меняется после каждой сессии (см. finish), поэтому сессии не повторяют один круг.
+    def __init__(self, title, module_ids=(), theme=None, query=None, limit=None, seed=None):
+        self.title = title
+        self.module_ids = list(module_ids)
+        self.theme = theme
+        self.query = query
+        self.limit = limit or None
+        self.seed = new_seed() if seed is None else seed
+
+    @classmethod
+    def for_modules(cls, module_ids, names=(), limit=None, seed=None):
+        title = ', '.join(names) if 0 < len(names) <= 3 else f"{len(module_ids)} modules"
+        return cls(title, module_ids=module_ids, limit=limit, seed=seed)
+
+    @classmethod
+    def for_theme(cls, theme, limit=None, seed=None):
+        return cls(f"Theme: {theme}", theme=theme, limit=limit, seed=seed)
+
+    @classmethod
+    def for_search(cls, name, query, limit=None, seed=None):
+        return cls(f"Search: {name}", query=query, limit=limit, seed=seed)
+
+    def load(self, storage):
+        if self.query is not None:
+            # Найденные термины сортируются в базе; в памяти только их id
+            return StudyTerms(storage, array('q', storage.search_term_ids(self.query, self.seed, self.limit)))
+        module_ids = storage.module_ids_for_theme(self.theme) if self.theme is not None else self.module_ids
+        # Общие для нескольких модулей термины посчитаны по разу на модуль; поток просто кончится раньше
+        total = storage.count_module_terms(module_ids)
+        term_ids = iter_shuffled_term_ids(storage, module_ids, self.seed)
+        if self.limit is not None:
+            total = min(total, self.limit)
+            term_ids = islice(term_ids, self.limit)
+        return StudyTerms(storage, term_ids, total=total)
+
+    def finish(self, storage, terms):
+        # Прочитанные сессией термины получают новые ключи перемешивания - запись пропорциональна
+        # пройденным карточкам, а не размеру модулей
+        if isinstance(terms, StudyTerms) and terms.ids:
+            storage.reshuffle_terms(terms.ids)
@@ -0,0 +1,145 @@
+import sqlite3
+import logging
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QTabWidget, QWidget, QListView,
+    QComboBox, QLineEdit, QPushButton, QSpinBox, QDialogButtonBox, QMessageBox, QInputDialog
+)
+from application.modules.StudySession import StudySession
+from application.modules.ModuleListModel import ModuleListModel
+
+MODULES_TAB, THEME_TAB, SEARCH_TAB = range(3)
+
+
+class StudySessionDialog(QDialog):
+    # Выбор сессии изучения: несколько модулей, тема или сохранённый поиск
+    def __init__(self, storage, query='', parent=None):
+        super().__init__(parent)
+        self.storage = storage
+        self.setWindowTitle("Study Session")
+        self.setGeometry(150, 150, 420, 460)
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+
+        self.tabs = QTabWidget()
+        layout.addWidget(self.tabs)
+
+        # Modules: та же постраничная модель, что и в главном окне, следующая страница читается при прокрутке
+        self.module_model = ModuleListModel(storage, batch_size=100, parent=self, checkable=True)
+        self.module_model.reload()
+        self.module_list = QListView()
+        self.module_list.setUniformItemSizes(True)
+        self.module_list.setModel(self.module_model)
+        self.tabs.addTab(self.module_list, "Modules")
+
+        # Theme
+        theme_widget = QWidget()
+        theme_layout = QFormLayout()
+        theme_widget.setLayout(theme_layout)
+        self.theme_combo = QComboBox()
+        self.theme_combo.addItems(storage.list_themes())
+        theme_layout.addRow("Theme:", self.theme_combo)
+        self.tabs.addTab(theme_widget, "Theme")
+
+        # Saved search
+        search_widget = QWidget()
+        search_layout = QVBoxLayout()
+        search_widget.setLayout(search_layout)
+        self.search_combo = QComboBox()
+        self.search_combo.currentIndexChanged.connect(self.on_saved_search_selected)
+        search_layout.addWidget(self.search_combo)
+        self.query_input = QLineEdit(query)
+        self.query_input.setPlaceholderText("Search query...")
+        search_layout.addWidget(self.query_input)
+        search_buttons = QHBoxLayout()
+        save_button = QPushButton("Save Search")
+        save_button.clicked.connect(self.save_search)
+        search_buttons.addWidget(save_button)
+        delete_button = QPushButton("Delete Search")
+        delete_button.clicked.connect(self.delete_search)
+        search_buttons.addWidget(delete_button)
+        search_layout.addLayout(search_buttons)
+        search_layout.addStretch()
+        self.tabs.addTab(search_widget, "Saved Search")
+        self.load_saved_searches()
+        if query:
+            self.tabs.setCurrentIndex(SEARCH_TAB)
+
+        form = QFormLayout()
+        self.limit_spin = QSpinBox()
+        self.limit_spin.setRange(0, 1000000)
+        self.limit_spin.setSpecialValueText("All")  # 0 - все термины
+        form.addRow("Cards:", self.limit_spin)
+        layout.addLayout(form)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        buttons.button(QDialogButtonBox.StandardButton.Ok).setText("Start")
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+    def load_saved_searches(self, select_name=None):
+        self.search_combo.blockSignals(True)
+        self.search_combo.clear()
+        self.search_combo.addItem("New search", None)
+        for search_id, name, query in self.storage.list_saved_searches():
+            self.search_combo.addItem(name, (search_id, name, query))
+            if name == select_name:
+                self.search_combo.setCurrentIndex(self.search_combo.count() - 1)
+        self.search_combo.blockSignals(False)
+
+    def on_saved_search_selected(self, index):
+        saved = self.search_combo.itemData(index)
+        if saved is not None:
+            self.query_input.setText(saved[2])
+
+    def save_search(self):
+        query = self.query_input.text().strip()
+        if not query:
+            QMessageBox.warning(self, "Error", "Search query cannot be empty.")
+            return
+        saved = self.search_combo.currentData()
+        name, ok = QInputDialog.getText(self, "Save Search", "Name:", text=saved[1] if saved else query)
+        if not ok or not name.strip():
+            return
+        try:
+            self.storage.save_search(name.strip(), query)
+        except sqlite3.Error as e:
+            logging.error("Error saving search: %s", e)
+            QMessageBox.critical(self, "Database Error", f"Error saving search: {e}")
+            return
+        self.load_saved_searches(name.strip())
+
+    def delete_search(self):
+        saved = self.search_combo.currentData()
+        if saved is None:
+            return
+        self.storage.delete_saved_search(saved[0])
+        self.load_saved_searches()
+
+    def checked_modules(self):
+        return list(self.module_model.checked.items())
+
+    def session(self):
+        limit = self.limit_spin.value() or None
+        tab = self.tabs.currentIndex()
+        if tab == MODULES_TAB:
+            modules = self.checked_modules()
+            if not modules:
+                return None
+            return StudySession.for_modules([module_id for module_id, name in modules],
+                                            [name for module_id, name in modules], limit=limit)
+        if tab == THEME_TAB:
+            theme = self.theme_combo.currentText()
+            return StudySession.for_theme(theme, limit=limit) if theme else None
+        query = self.query_input.text().strip()
+        if not query:
+            return None
+        saved = self.search_combo.currentData()
+        name = saved[1] if saved is not None and saved[2] == query else query
+        return StudySession.for_search(name, query, limit=limit)
+
+    def accept(self):
+        if self.session() is None:
+            QMessageBox.warning(self, "Error", "Select modules, a theme or a search to study.")
+            return
+        super().accept()
@@ -0,0 +1,85 @@
+import sys
+from array import array
+from collections import OrderedDict
+from application.modules.Instrumentation import span
+
+
+class StudyTerm:
+    # Карточка сессии изучения; __slots__ вместо словаря экономит память на каждом объекте
+    __slots__ = ('id', 'term', 'definition', 'image_path')
+
+    def __init__(self, term_id, term, definition, image_path):
+        self.id = term_id
+        self.term = term
+        self.definition = definition
+        # Одно изображение часто повторяется у многих терминов - храним одну копию строки
+        self.image_path = sys.intern(image_path) if image_path else ''
+
+
+class StudyTerms:
+    # Термины модуля для MemorizationWindow. В памяти постоянно только id в порядке модуля
+    # (array, 8 байт на термин); тексты читаются из базы страницами вокруг текущей карточки,
+    # и хранятся лишь последние pages_kept страниц.
+    # term_ids - array или итератор id; итератор читается по мере продвижения по сессии,
+    # тогда total задаёт ожидаемое число карточек (см. StudySession).
+    def __init__(self, storage, term_ids, page_size=64, pages_kept=3, total=None):
+        self.storage = storage
+        if isinstance(term_ids, array):
+            self.ids, self.pending, self.total = term_ids, None, len(term_ids)
+        else:
+            self.ids, self.pending, self.total = array('q'), iter(term_ids), total
+        self.page_size = page_size
+        self.pages_kept = pages_kept
+        self.pages = OrderedDict()  # номер страницы -> список StudyTerm
+
+    @classmethod
+    def for_module(cls, storage, module_id, **kwargs):
+        term_ids = array('q')
+        for batch in storage.iter_module_term_ids(module_id):
+            term_ids.extend(batch)
+        return cls(storage, term_ids, **kwargs)
+
+    def __len__(self):
+        return self.total if self.pending is not None else len(self.ids)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def read_ids(self, count):
+        # Дочитывает id из итератора до count штук
+        while self.pending is not None and len(self.ids) < count:
+            term_id = next(self.pending, None)
+            if term_id is None:
+                # Поток кончился раньше ожидаемого (модуль изменили во время сессии)
+                self.pending = None
+            else:
+                self.ids.append(term_id)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        number, offset = divmod(index, self.page_size)
+        self.read_ids((number + 1) * self.page_size)
+        if not 0 <= index < len(self.ids):
+            raise IndexError(index)
+        page = self.pages.get(number)
+        if page is None:
+            page = self.load_page(number)
+        else:
+            self.pages.move_to_end(number)
+        return page[offset]
+
+    def load_page(self, number):
+        page_ids = self.ids[number * self.page_size:(number + 1) * self.page_size]
+        with span('study.load_page', page=number):
+            rows = {row[0]: row for row in self.storage.get_terms(page_ids)}
+        # Термин могли удалить, пока окно открыто - показываем пустую карточку, а не падаем
+        page = [StudyTerm(*rows[term_id]) if term_id in rows else StudyTerm(term_id, '', '', '')
+                for term_id in page_ids]
+        self.pages[number] = page
+        while len(self.pages) > self.pages_kept:
+            self.pages.popitem(last=False)
+        return page
+
+    def resident(self):
+        return sum(len(page) for page in self.pages.values())
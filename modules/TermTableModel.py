@@ -0,0 +1,420 @@
+import sys
+from PyQt6.QtWidgets import QStyledItemDelegate, QComboBox
+from PyQt6.QtCore import Qt, QAbstractTableModel, QAbstractProxyModel, QModelIndex
+
+COLUMNS = ['term', 'definition', 'complexity', 'image_path']
+HEADERS = ["Term", "Definition", "Complexity", "Image"]
+COMPLEXITIES = ["Easy", "Normal", "Hard"]
+TERM, DEFINITION, COMPLEXITY, IMAGE = range(4)
+RESET_REMOVED_RANGES = 32  # при большем числе отрезков удаляемых строк модель сбрасывается одним уведомлением
+RESET_CHANGED_ROWS = 32  # при большем числе изменённых строк фильтр и сортировка пересчитываются сбросом
+
+
+def intern(value):
+    # В старых базах complexity и image_path могут быть NULL
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class TermTableModel(QAbstractTableModel):
+    # Термины редактора хранятся по столбцам, у каждой строки постоянный ключ (key): он не меняется
+    # при сортировке и удалении других строк, в отличие от номера строки и id в базе (у новых терминов его нет)
+    KeyRole = Qt.ItemDataRole.UserRole + 1
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.keys = []
+        self.ids = []
+        self.columns = ([], [], [], [])
+        self.next_key = 1
+        self.rows_by_key = {}
+        self.valid_rows = 0  # rows_by_key верен для строк до valid_rows, хвост после удаления досчитывается при обращении
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.keys)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return self.columns[index.column()][index.row()]
+        if role == Qt.ItemDataRole.ToolTipRole and index.column() in (DEFINITION, IMAGE):
+            return self.columns[index.column()][index.row()]
+        if role == self.KeyRole:
+            return self.keys[index.row()]
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return HEADERS[section]
+        return section + 1
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEditable
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        # Редактирование прямо в таблице; пустые термин и определение не принимаются
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole:
+            return False
+        value = str(value).strip() if index.column() != DEFINITION else str(value)
+        if index.column() in (TERM, DEFINITION) and not value.strip():
+            return False
+        if index.column() == COMPLEXITY and value not in COMPLEXITIES:
+            return False
+        self.columns[index.column()][index.row()] = value
+        self.dataChanged.emit(index, index)
+        return True
+
+    def append_terms(self, terms):
+        if not terms:
+            return []
+        start = len(self.keys)
+        self.beginInsertRows(QModelIndex(), start, start + len(terms) - 1)
+        keys = list(range(self.next_key, self.next_key + len(terms)))
+        self.next_key += len(terms)
+        self.keys.extend(keys)
+        self.ids.extend(term.get('id') for term in terms)
+        self.columns[TERM].extend(term['term'] for term in terms)
+        self.columns[DEFINITION].extend(term['definition'] for term in terms)
+        # Сложность и путь к изображению повторяются у многих терминов - храним по одной копии строки
+        self.columns[COMPLEXITY].extend(intern(term['complexity']) for term in terms)
+        self.columns[IMAGE].extend(intern(term['image_path']) for term in terms)
+        if self.valid_rows == start:
+            self.rows_by_key.update(zip(keys, range(start, start + len(terms))))
+            self.valid_rows = len(self.keys)
+        self.endInsertRows()
+        return keys
+
+    def append_term(self, term):
+        return self.append_terms([term])[0]
+
+    def update_term(self, key, values):
+        row = self.row_of(key)
+        if row is None:
+            return False
+        for column, name in enumerate(COLUMNS):
+            if name in values:
+                self.columns[column][row] = values[name]
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(COLUMNS) - 1))
+        return True
+
+    def remove_keys(self, keys):
+        # Соседние строки удаляются одним уведомлением; снизу вверх, чтобы номера ещё не удалённых строк не сдвигались
+        rows = sorted({row for row in map(self.row_of, keys) if row is not None}, reverse=True)
+        if not rows:
+            return
+        ranges = []
+        last = first = rows[0]
+        for row in rows[1:]:
+            if row != first - 1:
+                ranges.append((first, last))
+                last = row
+            first = row
+        ranges.append((first, last))
+        if len(ranges) <= RESET_REMOVED_RANGES:
+            for first, last in ranges:
+                self.removeRows(first, last - first + 1)
+            return
+        # Разрозненное выделение: одна пересборка столбцов вместо сдвига списков на каждый отрезок
+        removed = set(rows)
+        self.beginResetModel()
+        for row in rows:
+            del self.rows_by_key[self.keys[row]]
+        for values in (self.keys, self.ids) + self.columns:
+            values[:] = [value for row, value in enumerate(values) if row not in removed]
+        self.valid_rows = min(self.valid_rows, rows[-1])
+        self.endResetModel()
+
+    def removeRows(self, row, count, parent=QModelIndex()):
+        if parent.isValid() or count <= 0 or row < 0 or row + count > len(self.keys):
+            return False
+        self.beginRemoveRows(QModelIndex(), row, row + count - 1)
+        for key in self.keys[row:row + count]:
+            self.rows_by_key.pop(key, None)
+        for values in (self.keys, self.ids) + self.columns:
+            del values[row:row + count]
+        self.valid_rows = min(self.valid_rows, row)
+        self.endRemoveRows()
+        return True
+
+    def row_of(self, key):
+        if self.valid_rows < len(self.keys):
+            start = self.valid_rows
+            self.rows_by_key.update(zip(self.keys[start:], range(start, len(self.keys))))
+            self.valid_rows = len(self.keys)
+        return self.rows_by_key.get(key)
+
+    def term(self, row):
+        term = {"id": self.ids[row]}
+        for column, name in zip(self.columns, COLUMNS):
+            term[name] = column[row]
+        return term
+
+    def terms(self):
+        # Словари для Storage.save_module в текущем порядке строк
+        return [dict(zip(['id'] + COLUMNS, values)) for values in zip(self.ids, *self.columns)]
+
+    def values(self):
+        return list(zip(*self.columns))
+
+    def reset(self, terms=()):
+        self.beginResetModel()
+        self.keys, self.ids, self.columns = [], [], ([], [], [], [])
+        self.rows_by_key, self.valid_rows = {}, 0
+        self.endResetModel()
+        self.append_terms(list(terms))
+
+    def apply_saved(self, keys, saved_terms, source_image_paths):
+        # Сохранение шло по снимку: переносим выданные id (новым терминам и копиям общих терминов)
+        # и пути в хранилище изображений, если строка за это время не была удалена, а изображение не заменено
+        images = self.columns[IMAGE]
+        for key, term, source_path in zip(keys, saved_terms, source_image_paths):
+            row = self.row_of(key)
+            if row is None:
+                continue
+            self.ids[row] = term['id']
+            if images[row] == source_path:
+                images[row] = term['image_path']
+        if self.keys:
+            self.dataChanged.emit(self.index(0, IMAGE), self.index(len(self.keys) - 1, IMAGE))
+
+
+class TermViewProxy(QAbstractProxyModel):
+    # Фильтр по подстроке и сортировка только для представления: порядок терминов в модуле не меняется.
+    # Без фильтра и сортировки строки совпадают с моделью и уведомления передаются как есть;
+    # иначе порядок строк хранится списком номеров строк модели и считается по столбцам без вызовов data()
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.needle = ''
+        self.sort_column = -1
+        self.sort_order = Qt.SortOrder.AscendingOrder
+        self.source_rows = None  # номера строк модели в порядке представления; None - тот же порядок, что в модели
+        self.proxy_rows = None  # обратное отображение, -1 у скрытых строк; считается при обращении
+
+    def setSourceModel(self, model):
+        super().setSourceModel(model)
+        model.modelAboutToBeReset.connect(self.beginResetModel)
+        model.modelReset.connect(self.on_source_reset)
+        model.rowsAboutToBeInserted.connect(self.on_rows_about_to_be_inserted)
+        model.rowsInserted.connect(self.on_rows_inserted)
+        model.rowsAboutToBeRemoved.connect(self.on_rows_about_to_be_removed)
+        model.rowsRemoved.connect(self.on_rows_removed)
+        model.dataChanged.connect(self.on_data_changed)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self.sourceModel().rowCount() if self.source_rows is None else len(self.source_rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.sourceModel().columnCount()
+
+    def hasChildren(self, parent=QModelIndex()):
+        return not parent.isValid() and self.rowCount() > 0
+
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or not (0 <= row < self.rowCount() and 0 <= column < self.columnCount()):
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=QModelIndex()):
+        return QModelIndex()
+
+    def mapToSource(self, proxy_index):
+        if not proxy_index.isValid():
+            return QModelIndex()
+        row = proxy_index.row() if self.source_rows is None else self.source_rows[proxy_index.row()]
+        return self.sourceModel().index(row, proxy_index.column())
+
+    def mapFromSource(self, source_index):
+        if not source_index.isValid():
+            return QModelIndex()
+        if self.source_rows is None:
+            return self.createIndex(source_index.row(), source_index.column())
+        row = self.proxy_row_map()[source_index.row()]
+        return self.createIndex(row, source_index.column()) if row >= 0 else QModelIndex()
+
+    def proxy_row_map(self):
+        if self.proxy_rows is None:
+            self.proxy_rows = [-1] * self.sourceModel().rowCount()
+            for proxy_row, source_row in enumerate(self.source_rows):
+                self.proxy_rows[source_row] = proxy_row
+        return self.proxy_rows
+
+    def set_filter_text(self, text):
+        needle = text.strip().casefold()
+        if needle != self.needle:
+            # Число строк меняется произвольно, поэтому представление пересобирается целиком
+            self.beginResetModel()
+            self.needle = needle
+            self.rebuild()
+            self.endResetModel()
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        # column = -1 возвращает порядок модуля
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        sources = [self.mapToSource(index) for index in persistent]
+        self.sort_column, self.sort_order = column, order
+        self.rebuild()
+        self.changePersistentIndexList(persistent, [self.mapFromSource(index) for index in sources])
+        self.layoutChanged.emit()
+
+    def rebuild(self):
+        self.proxy_rows = None
+        if not self.needle and self.sort_column < 0:
+            self.source_rows = None
+            return
+        rows = range(self.sourceModel().rowCount())
+        if self.needle:
+            rows = [row for row in rows if self.matches(row)]
+        if self.sort_column >= 0:
+            rows = sorted(rows, key=self.sort_key, reverse=self.sort_order == Qt.SortOrder.DescendingOrder)
+        self.source_rows = list(rows)
+
+    def matches(self, row):
+        columns = self.sourceModel().columns
+        return self.needle in columns[TERM][row].casefold() or self.needle in columns[DEFINITION][row].casefold()
+
+    def sort_key(self, row):
+        return (self.sourceModel().columns[self.sort_column][row] or '').casefold()
+
+    def comes_before(self, row, other):
+        # Тот же порядок, что у sorted() в rebuild: равные ключи остаются в порядке модели
+        if self.sort_column >= 0:
+            key, other_key = self.sort_key(row), self.sort_key(other)
+            if key != other_key:
+                return key < other_key if self.sort_order == Qt.SortOrder.AscendingOrder else key > other_key
+        return row < other
+
+    def sorted_position(self, row):
+        low, high = 0, len(self.source_rows)
+        while low < high:
+            middle = (low + high) // 2
+            if self.comes_before(self.source_rows[middle], row):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def on_source_reset(self):
+        self.rebuild()
+        self.endResetModel()
+
+    def on_rows_about_to_be_inserted(self, parent, first, last):
+        if self.source_rows is None:
+            self.beginInsertRows(QModelIndex(), first, last)
+
+    def on_rows_inserted(self, parent, first, last):
+        if self.source_rows is None:
+            self.endInsertRows()
+            return
+        if last != self.sourceModel().rowCount() - 1:
+            self.beginResetModel()
+            self.rebuild()
+            self.endResetModel()
+            return
+        # Добавленные в конец модуля термины показываются в конце таблицы до следующей сортировки
+        rows = [row for row in range(first, last + 1) if not self.needle or self.matches(row)]
+        if rows:
+            start = len(self.source_rows)
+            self.beginInsertRows(QModelIndex(), start, start + len(rows) - 1)
+            self.source_rows.extend(rows)
+            self.proxy_rows = None
+            self.endInsertRows()
+        else:
+            self.proxy_rows = None
+
+    def on_rows_about_to_be_removed(self, parent, first, last):
+        if self.source_rows is None:
+            self.beginRemoveRows(QModelIndex(), first, last)
+            return
+        # Удаляемые строки модели могут стоять в представлении вразброс: убираем их отрезками снизу вверх
+        rows = sorted((row for row in self.proxy_row_map()[first:last + 1] if row >= 0), reverse=True)
+        self.proxy_rows = None
+        if not rows:
+            return
+        last_row = first_row = rows[0]
+        for row in rows[1:]:
+            if row != first_row - 1:
+                self.remove_proxy_rows(first_row, last_row)
+                last_row = row
+            first_row = row
+        self.remove_proxy_rows(first_row, last_row)
+
+    def remove_proxy_rows(self, first, last):
+        self.beginRemoveRows(QModelIndex(), first, last)
+        del self.source_rows[first:last + 1]
+        self.endRemoveRows()
+
+    def on_rows_removed(self, parent, first, last):
+        if self.source_rows is None:
+            self.endRemoveRows()
+            return
+        count = last - first + 1
+        self.source_rows = [row - count if row > last else row for row in self.source_rows]
+        self.proxy_rows = None
+
+    def on_data_changed(self, top_left, bottom_right, roles=()):
+        if self.source_rows is not None:
+            columns = range(top_left.column(), bottom_right.column() + 1)
+            if (self.needle and (TERM in columns or DEFINITION in columns)) or self.sort_column in columns:
+                # Правка может скрыть строку, показать её или сдвинуть в порядке сортировки
+                if bottom_right.row() - top_left.row() >= RESET_CHANGED_ROWS:
+                    self.beginResetModel()
+                    self.rebuild()
+                    self.endResetModel()
+                    return
+                for row in range(top_left.row(), bottom_right.row() + 1):
+                    self.place_row(row)
+        if self.source_rows is None or top_left.row() == bottom_right.row():
+            top_left, bottom_right = self.mapFromSource(top_left), self.mapFromSource(bottom_right)
+            if top_left.isValid():
+                self.dataChanged.emit(top_left, bottom_right, roles)
+        elif self.source_rows:
+            self.dataChanged.emit(self.index(0, top_left.column()),
+                                  self.index(len(self.source_rows) - 1, bottom_right.column()), roles)
+
+    def place_row(self, row):
+        proxy_row = self.proxy_row_map()[row]
+        visible = not self.needle or self.matches(row)
+        if proxy_row < 0:
+            if visible:
+                position = self.sorted_position(row)
+                self.beginInsertRows(QModelIndex(), position, position)
+                self.source_rows.insert(position, row)
+                self.proxy_rows = None
+                self.endInsertRows()
+        elif not visible:
+            self.proxy_rows = None
+            self.remove_proxy_rows(proxy_row, proxy_row)
+        elif self.sort_column >= 0:
+            del self.source_rows[proxy_row]
+            position = self.sorted_position(row)
+            self.source_rows.insert(proxy_row, row)
+            if position != proxy_row:
+                self.beginMoveRows(QModelIndex(), proxy_row, proxy_row, QModelIndex(),
+                                   position + 1 if position > proxy_row else position)
+                del self.source_rows[proxy_row]
+                self.source_rows.insert(position, row)
+                self.proxy_rows = None
+                self.endMoveRows()
+
+
+class ComplexityDelegate(QStyledItemDelegate):
+    def createEditor(self, parent, option, index):
+        editor = QComboBox(parent)
+        editor.addItems(COMPLEXITIES)
+        return editor
+
+    def setEditorData(self, editor, index):
+        editor.setCurrentText(index.data(Qt.ItemDataRole.EditRole))
+
+    def setModelData(self, editor, model, index):
+        model.setData(index, editor.currentText(), Qt.ItemDataRole.EditRole)
@@ -0,0 +1,79 @@
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QFileDialog
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
+from PyQt6.QtGui import QFont
+from application.modules import Instrumentation
+
+
+class SpanStats:
+    __slots__ = ('count', 'total', 'last', 'worst')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.last = 0.0
+        self.worst = 0.0
+
+
+class TimingOverlay(QWidget):
+    # Поверх окон приложения: последние и худшие времена по каждому span; обновляется раз в полсекунды
+    span_recorded = pyqtSignal(str, float)
+
+    def __init__(self, parent=None, rows=15):
+        super().__init__(parent, Qt.WindowType.Tool | Qt.WindowType.WindowStaysOnTopHint)
+        self.setWindowTitle("Timings")
+        self.rows = rows
+        self.stats = {}
+        self.dirty = False
+
+        layout = QVBoxLayout(self)
+        self.table_label = QLabel()
+        self.table_label.setFont(QFont("Courier New", 9))
+        self.table_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        layout.addWidget(self.table_label)
+        self.trace_button = QPushButton("Start trace")
+        self.trace_button.clicked.connect(self.toggle_trace)
+        layout.addWidget(self.trace_button)
+
+        # Замеры приходят и из фоновых потоков - сигнал доставит их в поток интерфейса
+        self.span_recorded.connect(self.on_span)
+        self.listener = self.span_recorded.emit
+        Instrumentation.add_listener(self.listener)
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start(500)
+        self.refresh()
+
+    def on_span(self, name, ms):
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = SpanStats()
+        stats.count += 1
+        stats.total += ms
+        stats.last = ms
+        stats.worst = max(stats.worst, ms)
+        self.dirty = True
+
+    def refresh(self):
+        if not self.dirty and self.stats:
+            return
+        self.dirty = False
+        lines = [f"{'span':<28}{'last':>9}{'avg':>9}{'max':>9}{'count':>7}"]
+        for name, stats in sorted(self.stats.items(), key=lambda item: -item[1].total)[:self.rows]:
+            lines.append(f"{name[:27]:<28}{stats.last:>9.2f}{stats.total / stats.count:>9.2f}"
+                         f"{stats.worst:>9.2f}{stats.count:>7}")
+        self.table_label.setText("\n".join(lines))
+
+    def toggle_trace(self):
+        if not Instrumentation.tracing():
+            Instrumentation.start_trace()
+            self.trace_button.setText("Stop and save trace...")
+            return
+        events = Instrumentation.stop_trace()
+        self.trace_button.setText("Start trace")
+        path, _ = QFileDialog.getSaveFileName(self, "Save Trace", "vocabify-trace.json", "Chrome Trace (*.json)")
+        if path:
+            Instrumentation.write_trace(path, events)
+
+    def closeEvent(self, event):
+        Instrumentation.remove_listener(self.listener)
+        event.accept()
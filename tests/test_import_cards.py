@@ -0,0 +1,36 @@
+import os
+import sys
+import unittest
+from io import StringIO
+
+# Модули импортируются как application.modules.*, как в benchmarks/
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_ROOT = os.path.dirname(REPO_DIR)
+if IMPORT_ROOT not in sys.path:
+    sys.path.insert(0, IMPORT_ROOT)
+
+from application.modules.Importer import iter_cards  # noqa: E402
+
+
+class IterCardsTest(unittest.TestCase):
+    def test_separator_split_across_chunks(self):
+        text = "dog - a pet\r\n\r\ncat - another pet\r\n\r\nbad card\r\n\r\nfox - wild"
+        expected = [("dog", "a pet", None), ("cat", "another pet", None), (None, None, "bad card"),
+                    ("fox", "wild", None)]
+        for chunk_size in range(1, 12):
+            cards = list(iter_cards(StringIO(text), ' - ', '\r\n\r\n', chunk_size=chunk_size))
+            self.assertEqual(cards, expected, chunk_size)
+
+    def test_oversized_card_is_reported_and_skipped(self):
+        text = "dog - a pet\n" + "x" * 100 + "\ncat - another pet\n" + "y" * 100
+        cards = list(iter_cards(StringIO(text), ' - ', '\n', chunk_size=8, max_card_length=50))
+        self.assertEqual(cards[0], ("dog", "a pet", None))
+        self.assertIsNone(cards[1][0])
+        self.assertTrue(cards[1][2].startswith("x" * 40))
+        self.assertEqual(cards[2], ("cat", "another pet", None))
+        self.assertIsNone(cards[3][0])
+        self.assertEqual(len(cards), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from io import StringIO
+
+# Модули импортируются как application.modules.*, как в benchmarks/
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_ROOT = os.path.dirname(REPO_DIR)
+if IMPORT_ROOT not in sys.path:
+    sys.path.insert(0, IMPORT_ROOT)
+
+from application.modules import Cli  # noqa: E402
+from application.modules.Database import close_connection  # noqa: E402
+from application.modules.MediaStore import MediaStore, MEDIA_DIR, OWNER_FILE  # noqa: E402
+from application.modules.Storage import Storage  # noqa: E402
+
+
+class MediaGarbageTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='vocabify-test-')
+        self.library = os.path.join(self.directory, 'library')
+        os.makedirs(self.library)
+        self.path = os.path.join(self.library, 'vocabify.db')
+        self.paths = [self.path]
+
+        media = MediaStore(self.path)
+        self.kept = media.add(self.make_image('kept.png', b'kept'))
+        self.orphan = media.add(self.make_image('orphan.png', b'orphan'))
+        Storage(self.path).save_module(None, "Pictures", "", "", [
+            {"id": None, "term": "kept", "definition": "an image", "complexity": "Normal", "image_path": self.kept}])
+
+        # Относительные пути раньше разрешались от текущего каталога, а не от папки базы
+        self.cwd = os.getcwd()
+        os.chdir(self.library)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        for path in self.paths:
+            close_connection(path)
+        shutil.rmtree(self.directory)
+
+    def make_image(self, name, data):
+        source = os.path.join(self.directory, name)
+        with open(source, 'wb') as f:
+            f.write(data)
+        return source
+
+    def library_file(self, image_path):
+        return os.path.join(self.library, image_path)
+
+    def gc(self, path):
+        self.paths.append(path)
+        with redirect_stdout(StringIO()), redirect_stderr(StringIO()):
+            return Cli.main(['--db', path, 'gc', '--grace', '0'])
+
+    def test_gc_removes_only_orphans(self):
+        self.assertEqual(self.gc(self.path), 0)
+        self.assertTrue(os.path.exists(self.library_file(self.kept)))
+        self.assertFalse(os.path.exists(self.library_file(self.orphan)))
+        self.assertTrue(os.path.exists(self.library_file(os.path.join(MEDIA_DIR, OWNER_FILE))))
+
+    def test_gc_with_other_db_keeps_library_images(self):
+        other = os.path.join(self.directory, 'other', 'x.db')
+        os.makedirs(os.path.dirname(other))
+        self.assertEqual(self.gc(other), 0)
+        self.assertTrue(os.path.exists(self.library_file(self.kept)))
+        self.assertTrue(os.path.exists(self.library_file(self.orphan)))
+
+    def test_gc_refuses_media_of_other_db_in_same_folder(self):
+        self.assertEqual(self.gc(os.path.join(self.library, 'x.db')), 1)
+        self.assertTrue(os.path.exists(self.library_file(self.kept)))
+        self.assertTrue(os.path.exists(self.library_file(self.orphan)))
+
+    def test_gc_refuses_unmarked_media_it_does_not_reference(self):
+        os.remove(self.library_file(os.path.join(MEDIA_DIR, OWNER_FILE)))
+        self.assertEqual(self.gc(os.path.join(self.library, 'x.db')), 1)
+        self.assertTrue(os.path.exists(self.library_file(self.orphan)))
+        # Своя база, ссылающаяся на файлы хранилища, снова отмечает его и чистит
+        self.assertEqual(self.gc(self.path), 0)
+        self.assertFalse(os.path.exists(self.library_file(self.orphan)))
+
+
+if __name__ == '__main__':
+    unittest.main()
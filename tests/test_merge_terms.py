@@ -0,0 +1,103 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+# Модули импортируются как application.modules.*, как в benchmarks/
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_ROOT = os.path.dirname(REPO_DIR)
+if IMPORT_ROOT not in sys.path:
+    sys.path.insert(0, IMPORT_ROOT)
+
+from application.modules.Database import close_connection  # noqa: E402
+from application.modules.Storage import Storage  # noqa: E402
+
+
+def make_terms(*pairs):
+    return [{"id": None, "term": term, "definition": definition, "complexity": "Normal", "image_path": ""}
+            for term, definition in pairs]
+
+
+class MergeTermsTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='vocabify-test-')
+        self.path = os.path.join(self.directory, 'vocabify.db')
+        self.storage = Storage(self.path)
+        self.first = self.storage.save_module(None, "Animals", "", "Nature",
+                                              make_terms(("dog", "a pet that barks"), ("cat", "a pet that meows")))
+        self.second = self.storage.save_module(None, "Pets", "", "Home",
+                                               make_terms(("dog", "a pet that barks"), ("cat", "a pet that meows")))
+
+    def tearDown(self):
+        close_connection(self.path)
+        shutil.rmtree(self.directory)
+
+    def merge_exact(self, keep_newest=False):
+        for term_ids in self.storage.exact_duplicate_groups():
+            term_ids = sorted(term_ids, reverse=keep_newest)
+            self.storage.merge_terms(term_ids[0], term_ids[1:])
+
+    def found_modules(self, query):
+        return sorted(row[3] for row in self.storage.search_terms(query))
+
+    def test_merged_terms_are_shared(self):
+        self.merge_exact()
+        self.assertEqual(self.storage.conn.execute('SELECT COUNT(*) FROM terms').fetchone()[0], 2)
+        self.assertEqual(self.found_modules('dog'), [self.first, self.second])
+        self.assertEqual([module['length'] for module in self.storage.list_modules()], [2, 2])
+
+    def check_delete_module_after_merge(self, keep_newest):
+        # Удаление модуля не должно убирать из поиска термины, которые остались в другом модуле
+        self.merge_exact(keep_newest)
+        self.storage.delete_module(self.second)
+        self.assertEqual(self.found_modules('dog'), [self.first])
+        self.assertEqual(self.found_modules('cat'), [self.first])
+        self.assertEqual(self.storage.search_terms('dog')[0][4], "Animals")
+        self.storage.delete_module(self.first)
+        self.assertEqual(self.storage.search_terms('dog'), [])
+        self.assertEqual(self.storage.conn.execute('SELECT COUNT(*) FROM search_index').fetchone()[0], 0)
+
+    def test_delete_module_after_merge_into_oldest(self):
+        self.check_delete_module_after_merge(keep_newest=False)
+
+    def test_delete_module_after_merge_into_newest(self):
+        self.check_delete_module_after_merge(keep_newest=True)
+
+    def test_rename_module_after_merge(self):
+        self.merge_exact()
+        self.storage.save_module(self.second, "Household", "", "Home", self.storage.get_module_terms(self.second))
+        self.assertEqual(sorted(row[4] for row in self.storage.search_terms('dog')), ["Animals", "Household"])
+        self.storage.reindex()
+        self.assertEqual(self.found_modules('cat'), [self.first, self.second])
+
+    def test_edit_shared_term_copies_it(self):
+        # Правка общего термина в одном модуле не должна менять его в другом
+        self.merge_exact()
+        shared_id = self.storage.get_module_terms(self.first)[0]['id']
+        conn = self.storage.conn
+        conn.execute('UPDATE review_state SET repetitions = 3 WHERE term_id = ?', (shared_id,))
+        conn.commit()
+
+        terms = self.storage.get_module_terms(self.second)
+        terms[0]['definition'] = "a loyal pet"
+        self.storage.save_module(self.second, "Pets", "", "Home", terms)
+        copy_id = terms[0]['id']
+        self.assertNotEqual(copy_id, shared_id)
+
+        self.assertEqual(self.storage.get_module_terms(self.first)[0]['definition'], "a pet that barks")
+        self.assertEqual([term['id'] for term in self.storage.get_module_terms(self.second)], [copy_id, terms[1]['id']])
+        self.assertEqual(sorted((row[2], row[3]) for row in self.storage.search_terms('dog')),
+                         [("a loyal pet", self.second), ("a pet that barks", self.first)])
+        self.assertEqual(conn.execute('SELECT repetitions FROM review_state WHERE term_id = ?',
+                                      (copy_id,)).fetchone()[0], 3)
+
+        # Термин, которым модуль больше ни с кем не делится, правится на месте
+        terms[0]['definition'] = "a very loyal pet"
+        self.storage.save_module(self.second, "Pets", "", "Home", terms)
+        self.assertEqual(terms[0]['id'], copy_id)
+        self.assertEqual(conn.execute('SELECT COUNT(*) FROM terms').fetchone()[0], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+# Модули импортируются как application.modules.*, как в benchmarks/
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_ROOT = os.path.dirname(REPO_DIR)
+if IMPORT_ROOT not in sys.path:
+    sys.path.insert(0, IMPORT_ROOT)
+
+from application.modules.Database import close_connection  # noqa: E402
+from application.modules.Storage import Storage  # noqa: E402
+
+MATCHES = 1500  # больше, чем ранжировалось раньше (1000)
+PAGE_SIZE = 50
+
+
+def make_terms(count, offset=0):
+    # Разное число повторов и длина определения дают разный bm25, одинаковые - проверяют порядок по rowid
+    return [{"id": None, "term": f"apple {number}" if number % 3 else f"apple apple {number}",
+             "definition": "fruit " * (number % 7) + "apple" * (number % 2),
+             "complexity": "Normal", "image_path": ""}
+            for number in range(offset, offset + count)]
+
+
+class SearchPagingTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='vocabify-test-')
+        self.path = os.path.join(self.directory, 'vocabify.db')
+        self.storage = Storage(self.path)
+        self.first = self.storage.save_module(None, "Orchard", "", "Food", make_terms(MATCHES // 2))
+        self.second = self.storage.save_module(None, "Market", "", "Food", make_terms(MATCHES // 2, MATCHES // 2))
+
+    def tearDown(self):
+        close_connection(self.path)
+        shutil.rmtree(self.directory)
+
+    def test_pages_cover_every_match_once_in_rank_order(self):
+        results = []
+        while True:
+            page = self.storage.search_terms('apple', limit=PAGE_SIZE, offset=len(results))
+            results.extend(page)
+            if len(page) < PAGE_SIZE:
+                break
+        keys = [(term_id, module_id) for term_id, term, definition, module_id, module_name in results]
+        self.assertEqual(len(keys), MATCHES)
+        self.assertEqual(len(set(keys)), MATCHES)
+
+        ranked = self.storage.conn.execute('''
+            SELECT rowid FROM search_index WHERE search_index MATCH 'apple'
+            ORDER BY bm25(search_index, 10.0, 2.0, 4.0, 3.0), rowid
+        ''').fetchall()
+        self.assertEqual([term_id for term_id, module_id in keys], [row[0] for row in ranked])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,23 @@
+import os
+import sys
+import unittest
+
+# Модули импортируются как application.modules.*, как в benchmarks/
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_ROOT = os.path.dirname(REPO_DIR)
+if IMPORT_ROOT not in sys.path:
+    sys.path.insert(0, IMPORT_ROOT)
+
+from application.benchmarks.startup import LAZY_MODULES, measure_imports  # noqa: E402
+
+
+class StartupImportsTest(unittest.TestCase):
+    def test_lazy_modules_are_not_imported_at_startup(self):
+        # Отдельный процесс с -X importtime: в этом процессе модули могли импортировать другие тесты
+        modules = measure_imports()
+        self.assertIn('application.modules.MainWindow', modules)
+        self.assertEqual([name for name in LAZY_MODULES if name in modules], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
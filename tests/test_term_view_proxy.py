@@ -0,0 +1,69 @@
+import os
+import sys
+import unittest
+
+# Модули импортируются как application.modules.*, как в benchmarks/
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_ROOT = os.path.dirname(REPO_DIR)
+if IMPORT_ROOT not in sys.path:
+    sys.path.insert(0, IMPORT_ROOT)
+
+from PyQt6.QtCore import Qt, QPersistentModelIndex, qInstallMessageHandler  # noqa: E402
+from PyQt6.QtTest import QAbstractItemModelTester  # noqa: E402
+from application.modules.TermTableModel import TermTableModel, TermViewProxy, TERM, DEFINITION  # noqa: E402
+
+
+def make_terms(*pairs):
+    return [{"id": None, "term": term, "definition": definition, "complexity": "Normal", "image_path": ""}
+            for term, definition in pairs]
+
+
+class TermViewProxyTest(unittest.TestCase):
+    def setUp(self):
+        self.model = TermTableModel()
+        self.model.append_terms(make_terms(("cat", "meows"), ("dog", "barks"), ("catfish", "swims"),
+                                           ("bird", "sings"), ("caterpillar", "crawls")))
+        self.proxy = TermViewProxy()
+        self.proxy.setSourceModel(self.model)
+        # Тестер проверяет согласованность уведомлений прокси и пишет нарушения в журнал Qt
+        self.warnings = []
+        qInstallMessageHandler(lambda mode, context, message: self.warnings.append(message))
+        self.tester = QAbstractItemModelTester(self.proxy, QAbstractItemModelTester.FailureReportingMode.Warning)
+
+    def tearDown(self):
+        qInstallMessageHandler(None)
+        self.assertEqual(self.warnings, [])
+
+    def shown(self):
+        return [self.proxy.index(row, TERM).data() for row in range(self.proxy.rowCount())]
+
+    def key(self, term):
+        return self.model.keys[self.model.columns[TERM].index(term)]
+
+    def test_edit_while_filtered(self):
+        self.proxy.set_filter_text("cat")
+        self.assertEqual(self.shown(), ["cat", "catfish", "caterpillar"])
+        self.model.update_term(self.key("catfish"), {"term": "goldfish"})
+        self.assertEqual(self.shown(), ["cat", "caterpillar"])
+        self.model.update_term(self.key("dog"), {"definition": "chases cats"})
+        self.assertEqual(self.shown(), ["cat", "dog", "caterpillar"])
+        self.model.setData(self.model.index(self.model.row_of(self.key("bird")), DEFINITION), "eats caterpillars")
+        self.assertEqual(self.shown(), ["cat", "dog", "bird", "caterpillar"])
+
+    def test_edit_while_filtered_and_sorted(self):
+        self.proxy.set_filter_text("cat")
+        self.proxy.sort(TERM, Qt.SortOrder.DescendingOrder)
+        self.assertEqual(self.shown(), ["catfish", "caterpillar", "cat"])
+        selected = QPersistentModelIndex(self.proxy.index(1, TERM))
+        self.model.update_term(self.key("caterpillar"), {"term": "bobcat"})
+        self.assertEqual(self.shown(), ["catfish", "cat", "bobcat"])
+        self.assertEqual(selected.data(), "bobcat")
+        self.assertEqual(selected.row(), 2)
+        self.model.update_term(self.key("dog"), {"term": "dogcatcher"})
+        self.assertEqual(self.shown(), ["dogcatcher", "catfish", "cat", "bobcat"])
+        self.model.update_term(self.key("cat"), {"term": "cow", "definition": "moos"})
+        self.assertEqual(self.shown(), ["dogcatcher", "catfish", "bobcat"])
+
+
+if __name__ == '__main__':
+    unittest.main()